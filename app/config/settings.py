@@ -38,12 +38,21 @@ class OpenAISettings(LLMSettings):
     api_key: str = Field(default_factory=lambda: os.getenv("OPENAI_API_KEY"))
     default_model: str = Field(default="gpt-4o")
     embedding_model: str = Field(default="text-embedding-3-small")
+    # Limits of the async embedding service (AsyncEmbeddingService); match them to the account's quota
+    embedding_max_concurrency: int = 8
+    embedding_requests_per_minute: int = 3000
+    embedding_tokens_per_minute: int = 1_000_000
 
 
 class DatabaseSettings(BaseModel):
     """Database connection settings."""
 
     service_url: str = Field(default_factory=lambda: os.getenv("TIMESCALE_SERVICE_URL"))
+    # Async connection pool (database.async_database.AsyncDatabase)
+    pool_min_size: int = 1
+    pool_max_size: int = Field(default_factory=lambda: int(os.getenv("DB_POOL_MAX_SIZE", "10")))
+    statement_cache_size: int = 256 # Prepared statements per connection; set to 0 behind pgbouncer in transaction mode
+    command_timeout: float = 30.0
 
 
 class VectorStoreSettings(BaseModel):
@@ -52,6 +61,36 @@ class VectorStoreSettings(BaseModel):
     table_name: str = "embeddings"
     embedding_dimensions: int = 1536
     time_partition_interval: timedelta = timedelta(days=7)
+    # Catalog (db_tables/db_columns) index storage, see database.vector_storage.VectorStorage
+    catalog_storage: str = Field(default_factory=lambda: os.getenv("CATALOG_VECTOR_STORAGE", "halfvec"))
+    catalog_index_dimensions: Optional[int] = Field(default_factory=lambda: int(os.getenv("CATALOG_INDEX_DIMENSIONS", "0")) or None)
+    catalog_rerank_factor: int = 4
+
+
+class EmbeddingSettings(BaseModel):
+    """Embedding provider selection: "openai", or "local" for deterministic offline hashing embeddings."""
+
+    provider: str = Field(default_factory=lambda: os.getenv("EMBEDDING_PROVIDER", "openai"))
+    local_model: str = "local-hashing"
+    local_latency: float = Field(default_factory=lambda: float(os.getenv("EMBEDDING_LOCAL_LATENCY", "0")))
+
+
+class RetrievalSettings(BaseModel):
+    """Settings for hybrid lexical + vector schema-linking retrieval (database.hybrid_retrieval)."""
+
+    lexical_budget_ms: float = 50
+    vector_budget_ms: float = 250 # Includes embedding the question
+    candidates: int = 50 # Rows fetched per leg before fusion
+    rrf_k: int = 60
+
+
+class EmbeddingCacheSettings(BaseModel):
+    """Settings for the on-disk embedding cache shared by the VectorStore and the generator scripts."""
+
+    enabled: bool = Field(default_factory=lambda: os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "false")
+    path: str = Field(default_factory=lambda: os.getenv("EMBEDDING_CACHE_PATH", os.path.join(BASE_DIR, '..', '.cache', 'embeddings.sqlite')))
+    max_entries: Optional[int] = 200_000
+    max_bytes: Optional[int] = 1024 * 1024 * 1024
 
 
 class Settings(BaseModel):
@@ -60,6 +99,9 @@ class Settings(BaseModel):
     openai: OpenAISettings = Field(default_factory=OpenAISettings)
     database: DatabaseSettings = Field(default_factory=DatabaseSettings)
     vector_store: VectorStoreSettings = Field(default_factory=VectorStoreSettings)
+    embedding: EmbeddingSettings = Field(default_factory=EmbeddingSettings)
+    retrieval: RetrievalSettings = Field(default_factory=RetrievalSettings)
+    embedding_cache: EmbeddingCacheSettings = Field(default_factory=EmbeddingCacheSettings)
 
 
 @lru_cache()
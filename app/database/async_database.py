@@ -0,0 +1,190 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+import asyncpg
+import numpy as np
+from pgvector.asyncpg import register_vector
+
+from database.vector_storage import VectorStorage
+
+_PYFORMAT_PARAMETER = re.compile(r"%\((\w+)\)s")
+
+
+def positional_sql(sql: str, names: Sequence[str]) -> str:
+    """Rewrites psycopg2 ``%(name)s`` parameters to asyncpg ``$n`` ones, numbered by ``names``."""
+    numbers = {name: number for number, name in enumerate(names, start=1)}
+    return _PYFORMAT_PARAMETER.sub(lambda match: f"${numbers[match.group(1)]}", sql)
+
+
+def _percentiles(samples) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50_ms": None, "p99_ms": None}
+    p50, p99 = np.percentile(np.fromiter(samples, dtype=np.float64), [50, 99]) * 1000
+    return {"p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3)}
+
+
+async def _init_connection(connection) -> None:
+    """Registers the pgvector and JSONB codecs on every new pool connection."""
+    await register_vector(connection)
+    await connection.set_type_codec("jsonb", schema="pg_catalog", encoder=json.dumps, decoder=json.loads)
+
+
+class AsyncDatabase:
+    """
+    Shared asyncpg connection pool with latency metrics.
+
+    Queries go through asyncpg's per-connection statement cache, so a hot query with a
+    stable SQL text is parsed and planned once per connection and then executed as a
+    prepared statement. Acquire wait and query times are sampled for ``metrics``.
+
+    Example:
+        async with AsyncDatabase(service_url, max_size=16) as database:
+            rows = await database.fetch("SELECT id FROM db_tables WHERE schema_id = $1", schema_id)
+            logging.info(database.metrics())
+    """
+
+    def __init__(
+        self,
+        service_url: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        statement_cache_size: int = 256,
+        command_timeout: float = 30.0,
+        max_samples: int = 10_000,
+    ):
+        """
+        Args:
+            service_url: Postgres connection URL.
+            min_size, max_size: Pool size bounds.
+            statement_cache_size: Prepared statements kept per connection (0 behind pgbouncer in transaction mode).
+            command_timeout: Seconds before a query is cancelled.
+            max_samples: Latency samples kept for the percentiles.
+        """
+        self.service_url = service_url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self.command_timeout = command_timeout
+        self._pool = None
+        self._open_lock = asyncio.Lock() # Concurrent first uses create a single pool
+        self._acquire_seconds = deque(maxlen=max_samples)
+        self._query_seconds = deque(maxlen=max_samples)
+        self.counters = {"acquisitions": 0, "queries": 0, "errors": 0}
+
+    @classmethod
+    def from_settings(cls, database_settings):
+        return cls(
+            database_settings.service_url,
+            database_settings.pool_min_size,
+            database_settings.pool_max_size,
+            database_settings.statement_cache_size,
+            database_settings.command_timeout,
+        )
+
+    async def open(self) -> "AsyncDatabase":
+        if self._pool is None:
+            async with self._open_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.service_url,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        statement_cache_size=self.statement_cache_size,
+                        command_timeout=self.command_timeout,
+                        init=_init_connection,
+                    )
+                    logging.info(f"Opened Postgres pool ({self.min_size}-{self.max_size} connections)")
+        return self
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        return await self.open()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Pool connection for several statements (e.g. a transaction); the wait is recorded."""
+        await self.open()
+        start_time = time.perf_counter()
+        async with self._pool.acquire() as connection:
+            self._acquire_seconds.append(time.perf_counter() - start_time)
+            self.counters["acquisitions"] += 1
+            yield connection
+
+    async def fetch(self, sql: str, *args) -> List[asyncpg.Record]:
+        """Runs a query on a pool connection and returns its rows."""
+        async with self.acquire() as connection:
+            start_time = time.perf_counter()
+            try:
+                return await connection.fetch(sql, *args)
+            except Exception:
+                self.counters["errors"] += 1
+                raise
+            finally:
+                self._query_seconds.append(time.perf_counter() - start_time)
+                self.counters["queries"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool occupancy, counters and p50/p99 acquire wait and query latency."""
+        metrics = {
+            "size": self._pool.get_size() if self._pool is not None else 0,
+            "idle": self._pool.get_idle_size() if self._pool is not None else 0,
+            "max_size": self.max_size,
+            **self.counters,
+        }
+        metrics.update({f"acquire_{name}": value for name, value in _percentiles(self._acquire_seconds).items()})
+        metrics.update({f"query_{name}": value for name, value in _percentiles(self._query_seconds).items()})
+        return metrics
+
+
+class AsyncVectorSearch:
+    """
+    Hot similarity queries over the shared pool, with fixed SQL texts so they stay prepared.
+
+    - ``search``: the Timescale Vector table of the VectorStore (lean rows: id, contents,
+      distance, metadata), optionally filtered by metadata containment.
+    - ``search_catalog``: db_tables/db_columns through the configured VectorStorage index.
+    """
+
+    def __init__(self, database: AsyncDatabase, table_name: str = "embeddings", catalog_storage: Optional[VectorStorage] = None):
+        self.database = database
+        self.table_name = table_name
+        self.catalog_storage = catalog_storage or VectorStorage()
+        base = f'SELECT id, contents, embedding <=> $1 AS distance, metadata FROM "{table_name}"'
+        self._search_sql = f"{base} ORDER BY embedding <=> $1 LIMIT $2"
+        self._filtered_search_sql = f"{base} WHERE metadata @> $3 ORDER BY embedding <=> $1 LIMIT $2"
+        self._catalog_sql = {}
+
+    async def search(self, embedding: Sequence[float], limit: int = 5, metadata_filter: Optional[dict] = None) -> List[asyncpg.Record]:
+        if metadata_filter:
+            return await self.database.fetch(self._filtered_search_sql, embedding, limit, metadata_filter)
+        return await self.database.fetch(self._search_sql, embedding, limit)
+
+    async def search_catalog(
+        self, table: str, embedding: Sequence[float], k: int = 10, columns: Sequence[str] = ("id",)
+    ) -> List[asyncpg.Record]:
+        """
+        Nearest catalog rows of ``table`` (db_tables or db_columns), re-ranked by exact distance.
+
+        Returns:
+            Records with ``columns`` and ``distance``, nearest first.
+        """
+        key = (table, tuple(columns))
+        if key not in self._catalog_sql:
+            sql = self.catalog_storage.search_sql(table, columns)
+            self._catalog_sql[key] = positional_sql(sql, ("embedding", "k", "candidates"))
+        if self.catalog_storage.is_exact:
+            return await self.database.fetch(self._catalog_sql[key], embedding, k)
+        return await self.database.fetch(self._catalog_sql[key], embedding, k, self.catalog_storage.candidates(k))
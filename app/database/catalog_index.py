@@ -0,0 +1,237 @@
+import logging
+import select
+import threading
+import time
+from contextlib import closing
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pgvector.psycopg2
+import psycopg2
+
+try:
+    import hnswlib
+except ImportError:  # Large catalogs fall back to exact search
+    hnswlib = None
+
+# --- Configuration ---
+EXACT_SEARCH_LIMIT = 5_000 # Vectors searched exactly; larger catalogs get an HNSW graph (needs hnswlib)
+HNSW_M = 16 # Graph degree (same default as pgvector)
+HNSW_EF_CONSTRUCTION = 200 # Build-time candidate list size
+HNSW_EF_SEARCH = 100 # Query-time candidate list size (raised to the candidate count when smaller)
+HNSW_CANDIDATE_FACTOR = 2 # HNSW candidates per requested row, re-ranked exactly
+NOTIFY_CHANNEL = "catalog_changed" # Channel of the catalog change triggers (see migrations)
+
+CATALOG_QUERIES = {
+    "tables": (
+        "SELECT t.id, d.name || '.' || t.table_name, t.embedding, d.name FROM db_tables t "
+        "JOIN database_schemas s ON s.id = t.schema_id JOIN databases d ON d.id = s.database_id "
+        "WHERE t.embedding IS NOT NULL ORDER BY t.id"
+    ),
+    "columns": (
+        "SELECT c.id, d.name || '.' || t.table_name || '.' || c.column_name, c.embedding, d.name FROM db_columns c "
+        "JOIN db_tables t ON t.id = c.table_id JOIN database_schemas s ON s.id = t.schema_id "
+        "JOIN databases d ON d.id = s.database_id WHERE c.embedding IS NOT NULL ORDER BY c.id"
+    ),
+    "relationships": (
+        "SELECT r.id, f.table_name || '.' || r.from_column || ' -> ' || t.table_name || '.' || r.to_column, r.embedding, d.name "
+        "FROM table_relationships r JOIN db_tables f ON f.id = r.from_table_id JOIN db_tables t ON t.id = r.to_table_id "
+        "JOIN databases d ON d.id = r.database_id WHERE r.embedding IS NOT NULL ORDER BY r.id"
+    ),
+}
+CATALOG_TABLES = {"tables": "db_tables", "columns": "db_columns", "relationships": "table_relationships"}
+
+
+class CatalogHit(NamedTuple):
+    id: str
+    name: str
+    distance: float
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorIndex:
+    """
+    In-memory cosine index over one catalog table.
+
+    Vectors are L2-normalized into one float32 matrix. Up to ``exact_limit`` vectors are
+    searched exactly with a matrix-vector product; larger sets are searched through an
+    hnswlib graph whose candidates are re-ranked with the exact distances, so distances
+    always equal pgvector's ``<=>`` (up to float rounding). Searches scoped to one
+    database (``databases`` gives each row's) are always exact over that database's rows.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        names: Sequence[str],
+        vectors: np.ndarray,
+        exact_limit: int = EXACT_SEARCH_LIMIT,
+        databases: Optional[Sequence[str]] = None,
+    ):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.matrix = _normalize(vectors) if len(self.ids) else np.zeros((0, 0), dtype=np.float32)
+        self.database_positions: Dict[str, np.ndarray] = {}
+        if databases is not None:
+            for position, database in enumerate(databases):
+                self.database_positions.setdefault(database, []).append(position)
+            self.database_positions = {database: np.array(positions) for database, positions in self.database_positions.items()}
+        self.graph = None
+        if len(self.ids) > exact_limit:
+            if hnswlib is None:
+                logging.warning(f"hnswlib is not installed, searching {len(self.ids)} vectors exactly")
+            else:
+                self.graph = hnswlib.Index(space="ip", dim=self.matrix.shape[1])
+                self.graph.init_index(max_elements=len(self.ids), M=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION)
+                self.graph.add_items(self.matrix, np.arange(len(self.ids)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query_embedding: Sequence[float], k: int = 10, database: Optional[str] = None) -> List[CatalogHit]:
+        """
+        The k nearest rows by cosine distance, nearest first.
+
+        Raises:
+            KeyError: If ``database`` is given but the index was built without row databases.
+        """
+        if database is not None and self.ids and not self.database_positions:
+            raise KeyError("Index built without row databases")
+        positions = None if database is None else self.database_positions.get(database, np.zeros(0, dtype=np.int64))
+        k = min(k, len(self.ids) if positions is None else len(positions))
+        if k == 0:
+            return []
+        query = _normalize(query_embedding)
+        if positions is not None:
+            distances = 1 - self.matrix[positions] @ query
+        elif self.graph is None:
+            positions = np.arange(len(self.ids))
+            distances = 1 - self.matrix @ query
+        else:
+            n_candidates = min(k * HNSW_CANDIDATE_FACTOR, len(self.ids))
+            self.graph.set_ef(max(HNSW_EF_SEARCH, n_candidates))
+            positions = self.graph.knn_query(query, k=n_candidates)[0][0].astype(np.int64)
+            distances = 1 - self.matrix[positions] @ query
+        top = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        top = top[np.lexsort((positions[top], distances[top]))]
+        return [CatalogHit(self.ids[positions[i]], self.names[positions[i]], float(distances[i])) for i in top]
+
+
+class CatalogIndex:
+    """
+    In-process snapshot of the catalog embeddings (db_tables, db_columns, table_relationships)
+    for schema linking without a database round trip.
+
+    ``refresh`` reloads the snapshot when the catalog tables' write counters
+    (pg_stat_user_tables) changed; ``watch`` refreshes from a background thread on
+    catalog change notifications (LISTEN catalog_changed) or every ``interval`` seconds.
+    Searches read the current snapshot and are never blocked by a refresh.
+
+    Example:
+        index = CatalogIndex(get_settings().database.service_url).refresh()
+        index.watch(interval=60)
+        hits = index.search("columns", query_embedding, k=10, database="student_transcripts_tracking")
+    """
+
+    def __init__(self, service_url: str, kinds: Sequence[str] = tuple(CATALOG_QUERIES), exact_limit: int = EXACT_SEARCH_LIMIT):
+        self.service_url = service_url
+        self.kinds = tuple(kinds)
+        self.exact_limit = exact_limit
+        self.indexes: Dict[str, VectorIndex] = {}
+        self.fingerprint = None
+        self.loaded_at = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def _connect(self):
+        connection = psycopg2.connect(self.service_url)
+        pgvector.psycopg2.register_vector(connection)
+        return connection
+
+    def _fingerprint(self, cursor) -> tuple:
+        # Cumulative write counters; unlike updated_at they also move on raw SQL/COPY upserts and deletes
+        cursor.execute(
+            "SELECT relname, n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_user_tables WHERE relname = ANY(%s) ORDER BY relname",
+            ([CATALOG_TABLES[kind] for kind in self.kinds],),
+        )
+        return tuple(cursor.fetchall())
+
+    def refresh(self, force: bool = False) -> "CatalogIndex":
+        """Reloads the snapshot if the catalog changed (always with ``force``)."""
+        with self._refresh_lock, closing(self._connect()) as connection, connection.cursor() as cursor:
+            fingerprint = self._fingerprint(cursor)
+            if fingerprint == self.fingerprint and not force:
+                return self
+            start_time = time.time()
+            indexes = {}
+            for kind in self.kinds:
+                cursor.execute(CATALOG_QUERIES[kind])
+                rows = cursor.fetchall()
+                vectors = np.stack([row[2] for row in rows]) if rows else np.zeros((0, 0), dtype=np.float32)
+                indexes[kind] = VectorIndex(
+                    [str(row[0]) for row in rows], [row[1] for row in rows], vectors, self.exact_limit, [row[3] for row in rows]
+                )
+            # Swap the whole snapshot at once so concurrent searches see a consistent catalog
+            self.indexes, self.fingerprint, self.loaded_at = indexes, fingerprint, time.time()
+        logging.info(
+            f"Loaded catalog snapshot in {time.time() - start_time:.3f} seconds: "
+            + ", ".join(f"{len(index)} {kind}" for kind, index in indexes.items())
+        )
+        return self
+
+    def search(self, kind: str, query_embedding: Sequence[float], k: int = 10, database: Optional[str] = None) -> List[CatalogHit]:
+        """
+        Nearest catalog rows of one kind ("tables", "columns" or "relationships"),
+        optionally only those of one database (by name).
+
+        Raises:
+            KeyError: If the kind is not indexed (or the snapshot was never loaded).
+        """
+        return self.indexes[kind].search(query_embedding, k, database)
+
+    def watch(self, interval: float = 60.0) -> None:
+        """Starts a daemon thread refreshing on catalog notifications or every ``interval`` seconds."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="catalog-index-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        connection = None
+        while not self._stop.is_set():
+            try:
+                if connection is None:
+                    connection = psycopg2.connect(self.service_url)
+                    connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                    connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # Wake up on a notification, after the interval, or at least every second to check for stop()
+                deadline = time.monotonic() + interval
+                while not self._stop.is_set() and time.monotonic() < deadline and not connection.notifies:
+                    if select.select([connection], [], [], min(1.0, max(0.0, deadline - time.monotonic()))) != ([], [], []):
+                        connection.poll()
+                # Statistics lag behind commits, so a notification always reloads
+                notified = bool(connection.notifies)
+                connection.notifies.clear()
+                if not self._stop.is_set():
+                    self.refresh(force=notified)
+            except Exception as e:
+                logging.error(f"Catalog index refresh failed: {e}")
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                self._stop.wait(min(interval, 5.0))
+        if connection is not None:
+            connection.close()
@@ -0,0 +1,68 @@
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database.schema_introspection import introspect_schema
+
+
+def discover_databases(spider_dir: str, tables_json_path: str = None):
+    """
+    Finds the SQLite databases of a Spider-style corpus.
+
+    Both the Spider layout (``database/<db_id>/<db_id>.sqlite``) and this repo's flat
+    layout (``sqlite/<db_id>.sqlite``) are searched. With a ``tables.json`` only the
+    db_ids listed in it are returned (missing files are logged).
+
+    Returns:
+        dict: {db_id: path to the .sqlite file}, sorted by db_id.
+    """
+    found = {}
+    for pattern in (os.path.join(spider_dir, 'database', '*', '*.sqlite'), os.path.join(spider_dir, 'sqlite', '*.sqlite')):
+        for path in glob.glob(pattern):
+            found.setdefault(os.path.splitext(os.path.basename(path))[0], path)
+
+    if tables_json_path and os.path.exists(tables_json_path):
+        with open(tables_json_path) as f:
+            db_ids = [entry['db_id'] for entry in json.load(f)]
+        missing = [db_id for db_id in db_ids if db_id not in found]
+        if missing:
+            logging.warning(f"{len(missing)} databases listed in {tables_json_path} were not found: {missing[:10]}")
+        found = {db_id: found[db_id] for db_id in db_ids if db_id in found}
+    return dict(sorted(found.items()))
+
+
+def introspect_database(db_id: str, db_path: str):
+    """
+    Reads the tables, columns and foreign keys of one SQLite database (see schema_introspection).
+
+    Returns:
+        dict: {"db_id", "tables": list of TableInfo, "seconds"}.
+    """
+    start_time = time.time()
+    tables = introspect_schema(db_path)
+    return {"db_id": db_id, "tables": tables, "seconds": time.time() - start_time}
+
+
+def introspect_databases(databases: dict, workers: int = None):
+    """
+    Introspects many databases concurrently in a process pool.
+
+    Args:
+        databases (dict): {db_id: path} as returned by discover_databases.
+        workers (int, optional): Number of processes (defaults to the CPU count).
+
+    Returns:
+        list: introspect_database results in db_id order; databases that fail are logged and left out.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(introspect_database, db_id, path): db_id for db_id, path in databases.items()}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.error(f"Failed to introspect database {futures[future]}: {e}")
+    return sorted(results, key=lambda result: result["db_id"])
@@ -0,0 +1,352 @@
+import json
+import logging
+import struct
+import time
+import uuid
+
+import numpy as np
+import psycopg2
+
+# Binary COPY format: signature, flags field and header extension length
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+COPY_CHUNK_ROWS = 1000 # Rows encoded per chunk handed to COPY
+
+# Columns written by the loader, in COPY order, with their binary encoders
+TABLE_COPY_COLUMNS = ("id", "schema_id", "table_name", "description", "embedding", "include_in_context", "extra_metadata")
+COLUMN_COPY_COLUMNS = (
+    "id", "table_id", "column_name", "data_type", "embedding", "is_primary_key", "is_foreign_key",
+    "is_nullable", "references_table", "references_column", "include_in_context", "extra_metadata",
+)
+RELATIONSHIP_COPY_COLUMNS = (
+    "id", "database_id", "from_table_id", "to_table_id", "relationship_type", "from_column", "to_column",
+)
+# Attributes refreshed on conflict; include_in_context and sample_data are maintained manually
+TABLE_UPDATE_COLUMNS = ("description", "extra_metadata")
+# Refreshed only by a non-empty value: loads without descriptions (the Spider ingestion) keep the
+# stored ones, e.g. those generate_db_tables_embeddings loads from table_descriptions.json
+KEEP_STORED_IF_EMPTY = ("description",)
+COLUMN_UPDATE_COLUMNS = (
+    "data_type", "is_primary_key", "is_foreign_key", "is_nullable", "references_table", "references_column", "extra_metadata",
+)
+
+
+def merge_assignments(target: str, update_columns):
+    """SET clause items of the ON CONFLICT merge into ``target``."""
+    updates = [
+        f"{column} = COALESCE(NULLIF(EXCLUDED.{column}, ''), {target}.{column})" if column in KEEP_STORED_IF_EMPTY
+        else f"{column} = EXCLUDED.{column}"
+        for column in update_columns
+    ]
+    # A NULL embedding keeps the stored one (metadata-only updates)
+    updates.append(f"embedding = COALESCE(EXCLUDED.embedding, {target}.embedding)")
+    updates.append("updated_at = NOW()")
+    return updates
+
+
+def encode_uuid(value):
+    return value.bytes
+
+
+def encode_text(value):
+    return value.encode("utf-8")
+
+
+def encode_bool(value):
+    return b"\x01" if value else b"\x00"
+
+
+def encode_json(value):
+    # The binary representation of json is its text
+    return json.dumps(value).encode("utf-8")
+
+
+def encode_vector(value):
+    """pgvector binary format: uint16 dimensions, uint16 unused, big-endian float32 values."""
+    vector = np.asarray(value, dtype=">f4")
+    return struct.pack(">HH", len(vector), 0) + vector.tobytes()
+
+
+ENCODERS = {
+    "id": encode_uuid,
+    "schema_id": encode_uuid,
+    "table_id": encode_uuid,
+    "database_id": encode_uuid,
+    "from_table_id": encode_uuid,
+    "to_table_id": encode_uuid,
+    "table_name": encode_text,
+    "column_name": encode_text,
+    "data_type": encode_text,
+    "description": encode_text,
+    "references_table": encode_text,
+    "references_column": encode_text,
+    "relationship_type": encode_text,
+    "from_column": encode_text,
+    "to_column": encode_text,
+    "embedding": encode_vector,
+    "is_primary_key": encode_bool,
+    "is_foreign_key": encode_bool,
+    "is_nullable": encode_bool,
+    "include_in_context": encode_bool,
+    "extra_metadata": encode_json,
+}
+
+
+def encode_copy_rows(rows, columns):
+    """
+    Encodes rows for ``COPY ... FROM STDIN WITH (FORMAT binary)``.
+
+    Args:
+        rows (iterable): Dicts with a value (or None for NULL) for every name in ``columns``.
+        columns (sequence): Column names in COPY order; each needs an entry in ENCODERS.
+
+    Yields:
+        bytes: The header, then chunks of COPY_CHUNK_ROWS encoded tuples, then the trailer.
+    """
+    encoders = [ENCODERS[column] for column in columns]
+    field_count = struct.pack(">h", len(columns))
+    null = struct.pack(">i", -1)
+    yield COPY_HEADER
+    chunk = []
+    for row in rows:
+        chunk.append(field_count)
+        for column, encode in zip(columns, encoders):
+            value = row.get(column)
+            if value is None:
+                chunk.append(null)
+            else:
+                data = encode(value)
+                chunk.append(struct.pack(">i", len(data)))
+                chunk.append(data)
+        if len(chunk) >= COPY_CHUNK_ROWS * (2 * len(columns) + 1):
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+    yield COPY_TRAILER
+
+
+class _ChunkReader:
+    """Minimal file object over an iterator of bytes, as expected by psycopg2's copy_expert."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = b""
+        self._offset = 0
+
+    def read(self, size=-1):
+        if size < 0:
+            data = self._chunk[self._offset:] + b"".join(self._chunks)
+            self._chunk, self._offset = b"", 0
+            return data
+        # Return at most one chunk per call so large chunks are not re-copied
+        while self._offset >= len(self._chunk):
+            self._chunk, self._offset = next(self._chunks, None), 0
+            if self._chunk is None:
+                self._chunk = b""
+                return b""
+        data = self._chunk[self._offset:self._offset + size]
+        self._offset += len(data)
+        return data
+
+
+class CatalogLoader:
+    """
+    Bulk loads the db_tables / db_columns / table_relationships rows of one catalog schema into Postgres.
+
+    The schema and table ids are resolved once per load and rows are streamed into a
+    temporary staging table with binary ``COPY``, then merged with one
+    ``INSERT ... SELECT ... ON CONFLICT`` statement. This replaces the per-row INSERT
+    files (and their correlated id subqueries) written to migrations/sql.
+
+    Example:
+        loader = CatalogLoader(get_settings().database.service_url, 'student_transcripts_tracking', 'public')
+        loader.load_tables([{"table_name": "Students", "description": "...", "embedding": [...], "extra_metadata": {}}])
+    """
+
+    def __init__(self, service_url: str, database_name: str, schema_name: str):
+        self.service_url = service_url
+        self.database_name = database_name
+        self.schema_name = schema_name
+
+    def _connect(self):
+        return psycopg2.connect(self.service_url)
+
+    def _schema_id(self, cursor):
+        cursor.execute(
+            "SELECT ds.id FROM database_schemas ds JOIN databases d ON ds.database_id = d.id "
+            "WHERE d.name = %s AND ds.schema_name = %s",
+            (self.database_name, self.schema_name),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"Schema {self.database_name}.{self.schema_name} is not in the catalog")
+        return uuid.UUID(str(row[0]))
+
+    def ensure_schema(self, description: str = None):
+        """Creates the databases / database_schemas rows of this schema if missing. Returns the schema id."""
+        with self._connect() as connection, connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO databases (id, name, description, created_at) VALUES (%s, %s, %s, NOW()) "
+                "ON CONFLICT (name) DO NOTHING",
+                (str(uuid.uuid4()), self.database_name, description),
+            )
+            cursor.execute(
+                "INSERT INTO database_schemas (id, database_id, schema_name, include_in_context, created_at) "
+                "SELECT %s, d.id, %s, TRUE, NOW() FROM databases d WHERE d.name = %s "
+                "ON CONFLICT (database_id, schema_name) DO NOTHING",
+                (str(uuid.uuid4()), self.schema_name, self.database_name),
+            )
+            schema_id = self._schema_id(cursor)
+        connection.close()
+        return schema_id
+
+    def _table_ids(self, cursor, schema_id):
+        cursor.execute("SELECT table_name, id FROM db_tables WHERE schema_id = %s", (str(schema_id),))
+        return {table_name: uuid.UUID(str(table_id)) for table_name, table_id in cursor.fetchall()}
+
+    def _copy_upsert(self, cursor, target, columns, rows, conflict_columns, update_columns):
+        """Streams rows into a staging copy of ``target`` and merges them in one statement."""
+        stage = f"_stage_{target}"
+        column_list = ", ".join(columns)
+        updates = merge_assignments(target, update_columns)
+
+        cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cursor.copy_expert(
+            f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT binary)",
+            _ChunkReader(encode_copy_rows(rows, columns)),
+        )
+        cursor.execute(
+            f"INSERT INTO {target} ({column_list}, created_at, updated_at) "
+            f"SELECT {column_list}, NOW(), NULL FROM {stage} "
+            f"ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET {', '.join(updates)}"
+        )
+        return cursor.rowcount
+
+    def load_tables(self, rows):
+        """
+        Upserts db_tables rows.
+
+        Args:
+            rows (iterable): Dicts with table_name, description (empty keeps the stored
+                description), embedding (None keeps the stored embedding) and extra_metadata.
+
+        Returns:
+            int: Number of rows inserted or updated.
+        """
+        start_time = time.time()
+        with self._connect() as connection, connection.cursor() as cursor:
+            schema_id = self._schema_id(cursor)
+            copy_rows = (
+                {**row, "id": uuid.uuid4(), "schema_id": schema_id, "include_in_context": True}
+                for row in rows
+            )
+            count = self._copy_upsert(cursor, "db_tables", TABLE_COPY_COLUMNS, copy_rows, ("schema_id", "table_name"), TABLE_UPDATE_COLUMNS)
+        connection.close()
+        logging.info(f"Loaded {count} db_tables rows in {time.time() - start_time:.3f} seconds")
+        return count
+
+    def load_columns(self, rows):
+        """
+        Upserts db_columns rows.
+
+        Args:
+            rows (iterable): Dicts with table_name, column_name, data_type, embedding (None
+                keeps the stored embedding), is_primary_key, is_foreign_key, is_nullable,
+                references_table, references_column and extra_metadata. Rows of tables that
+                are not in db_tables are skipped.
+
+        Returns:
+            int: Number of rows inserted or updated.
+        """
+        start_time = time.time()
+        with self._connect() as connection, connection.cursor() as cursor:
+            table_ids = self._table_ids(cursor, self._schema_id(cursor))
+            missing = set()
+
+            def copy_rows():
+                for row in rows:
+                    table_id = table_ids.get(row["table_name"])
+                    if table_id is None:
+                        missing.add(row["table_name"])
+                        continue
+                    yield {**row, "id": uuid.uuid4(), "table_id": table_id, "include_in_context": True}
+
+            count = self._copy_upsert(cursor, "db_columns", COLUMN_COPY_COLUMNS, copy_rows(), ("table_id", "column_name"), COLUMN_UPDATE_COLUMNS)
+        connection.close()
+        if missing:
+            logging.warning(f"Skipped the columns of tables missing from db_tables: {sorted(missing)}")
+        logging.info(f"Loaded {count} db_columns rows in {time.time() - start_time:.3f} seconds")
+        return count
+
+    def load_relationships(self, foreign_keys):
+        """
+        Replaces the table_relationships rows between the tables of this schema.
+
+        Args:
+            foreign_keys (iterable): schema_introspection.ForeignKey entries. References to
+                tables that are not in db_tables are skipped.
+
+        Returns:
+            int: Number of relationships written.
+        """
+        with self._connect() as connection, connection.cursor() as cursor:
+            schema_id = self._schema_id(cursor)
+            table_ids = self._table_ids(cursor, schema_id)
+            cursor.execute("SELECT database_id FROM database_schemas WHERE id = %s", (str(schema_id),))
+            database_id = uuid.UUID(str(cursor.fetchone()[0]))
+            cursor.execute(
+                "DELETE FROM table_relationships WHERE from_table_id IN (SELECT id FROM db_tables WHERE schema_id = %s)",
+                (str(schema_id),),
+            )
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "database_id": database_id,
+                    "from_table_id": table_ids[fk.from_table],
+                    "to_table_id": table_ids[fk.to_table],
+                    "relationship_type": fk.relationship_type,
+                    "from_column": fk.from_column,
+                    "to_column": fk.to_column,
+                }
+                for fk in foreign_keys
+                if fk.from_table in table_ids and fk.to_table in table_ids
+            ]
+            cursor.copy_expert(
+                f"COPY table_relationships ({', '.join(RELATIONSHIP_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+                _ChunkReader(encode_copy_rows(rows, RELATIONSHIP_COPY_COLUMNS)),
+            )
+        connection.close()
+        logging.info(f"Loaded {len(rows)} table_relationships rows")
+        return len(rows)
+
+    def delete_tables(self, table_names):
+        """Deletes db_tables rows by name (their columns cascade). Returns the number deleted."""
+        table_names = list(table_names)
+        if not table_names:
+            return 0
+        with self._connect() as connection, connection.cursor() as cursor:
+            schema_id = self._schema_id(cursor)
+            cursor.execute(
+                "DELETE FROM db_tables WHERE schema_id = %s AND table_name = ANY(%s)",
+                (str(schema_id), table_names),
+            )
+            count = cursor.rowcount
+        connection.close()
+        return count
+
+    def delete_columns(self, keys):
+        """Deletes db_columns rows by (table_name, column_name). Returns the number deleted."""
+        keys = list(keys)
+        if not keys:
+            return 0
+        with self._connect() as connection, connection.cursor() as cursor:
+            schema_id = self._schema_id(cursor)
+            cursor.execute(
+                "DELETE FROM db_columns dc USING db_tables dt, unnest(%s::text[], %s::text[]) AS k(table_name, column_name) "
+                "WHERE dc.table_id = dt.id AND dt.schema_id = %s AND dt.table_name = k.table_name AND dc.column_name = k.column_name",
+                ([table_name for table_name, _ in keys], [column_name for _, column_name in keys], str(schema_id)),
+            )
+            count = cursor.rowcount
+        connection.close()
+        return count
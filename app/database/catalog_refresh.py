@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+
+from sqlalchemy import create_engine, text
+
+CONTENT_HASH_KEY = "content_hash" # extra_metadata key holding the hash of the embedded text
+
+_SCHEMA_JOIN = (
+    "JOIN database_schemas ds ON dt.schema_id = ds.id "
+    "JOIN databases d ON ds.database_id = d.id "
+    "WHERE d.name = :database_name AND ds.schema_name = :schema_name"
+)
+
+
+def content_hash(text_to_embed: str, model: str):
+    """SHA-256 of the embedding model and the exact text sent to it."""
+    return hashlib.sha256(f"{model}\n{text_to_embed}".encode("utf-8")).hexdigest()
+
+
+def column_extra_metadata(column, text_to_embed: str, model: str):
+    """
+    extra_metadata of a column: its full definition plus the content hash.
+
+    The definition attributes duplicate the db_columns fields on purpose, because
+    plan_refresh compares extra_metadata only. A changed type, nullability, key or
+    reference therefore becomes a metadata update even when the embedded text is unchanged.
+    """
+    return {
+        "data_type": column.data_type,
+        "is_nullable": column.is_nullable,
+        "is_primary_key": column.is_primary_key,
+        "is_unique": column.is_unique,
+        "default_value": column.default_value,
+        "references_table": column.references_table,
+        "references_column": column.references_column,
+        CONTENT_HASH_KEY: content_hash(text_to_embed, model),
+    }
+
+
+def _metadata(value):
+    """extra_metadata as a dict, whether the driver returns JSON parsed or as text."""
+    if value is None:
+        return {}
+    if isinstance(value, str):
+        return json.loads(value)
+    return dict(value)
+
+
+def _fetch(service_url: str, query: str, database_name: str, schema_name: str):
+    engine = create_engine(service_url)
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(text(query), {"database_name": database_name, "schema_name": schema_name})
+            return [tuple(row) for row in rows]
+    finally:
+        engine.dispose()
+
+
+def load_table_metadata(service_url: str, database_name: str, schema_name: str):
+    """Returns {table_name: extra_metadata} for the catalogued tables of a schema."""
+    query = f"SELECT dt.table_name, dt.extra_metadata FROM db_tables dt {_SCHEMA_JOIN}"
+    return {table_name: _metadata(metadata) for table_name, metadata in _fetch(service_url, query, database_name, schema_name)}
+
+
+def load_column_metadata(service_url: str, database_name: str, schema_name: str):
+    """Returns {(table_name, column_name): extra_metadata} for the catalogued columns of a schema."""
+    query = f"SELECT dt.table_name, dc.column_name, dc.extra_metadata FROM db_columns dc JOIN db_tables dt ON dc.table_id = dt.id {_SCHEMA_JOIN}"
+    return {
+        (table_name, column_name): _metadata(metadata)
+        for table_name, column_name, metadata in _fetch(service_url, query, database_name, schema_name)
+    }
+
+
+def plan_refresh(current: dict, existing: dict):
+    """
+    Compares freshly generated extra_metadata (including CONTENT_HASH_KEY) with the catalog.
+
+    Args:
+        current (dict): {key: extra_metadata} of the objects found in the source database.
+        existing (dict): {key: extra_metadata} currently stored in the catalog.
+
+    Returns:
+        tuple: (keys to re-embed and upsert, keys whose metadata changed but whose embedded
+        text did not, keys to delete). Objects identical to the catalog are in none of them.
+    """
+    embed, update = [], []
+    for key, metadata in current.items():
+        stored = existing.get(key)
+        if stored is None or stored.get(CONTENT_HASH_KEY) != metadata.get(CONTENT_HASH_KEY):
+            embed.append(key)
+        elif stored != metadata:
+            update.append(key)
+    delete = [key for key in existing if key not in current]
+    logging.info(
+        f"Catalog refresh: {len(embed)} to embed, {len(update)} metadata updates, "
+        f"{len(delete)} to delete, {len(current) - len(embed) - len(update)} unchanged"
+    )
+    return embed, update, delete
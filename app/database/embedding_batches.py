@@ -0,0 +1,99 @@
+import logging
+import math
+
+from openai import OpenAIError
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a conservative character-based estimate
+    tiktoken = None
+
+# --- Configuration ---
+DEFAULT_BATCH_SIZE = 512 # Maximum inputs per embeddings request (the API accepts up to 2048)
+DEFAULT_MAX_BATCH_TOKENS = 100_000 # Maximum estimated tokens per request (the API limit is 300k)
+
+
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str, model: str = None):
+    """Counts the tokens of a text with tiktoken, or over-estimates them (~3 bytes per token) without it."""
+    encoding = _encoding(model) if model else None
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text.encode("utf-8")) / 3)
+
+
+def make_batches(token_counts, batch_size=DEFAULT_BATCH_SIZE, max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS):
+    """
+    Groups item positions into batches of at most batch_size items and max_batch_tokens tokens.
+
+    Items keep their order; an item larger than max_batch_tokens is sent in a batch of its own.
+
+    Returns:
+        list: Lists of item positions, one per batch.
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for position, tokens in enumerate(token_counts):
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(position)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_texts(openai_client, texts, model, batch_size=DEFAULT_BATCH_SIZE, max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS, cache=None):
+    """
+    Generates embeddings for many texts with one embeddings request per batch.
+
+    Empty texts are skipped. Results are put back in input order using the index the API
+    returns with every embedding, so callers can zip them with their texts. With an
+    EmbeddingCache, cached texts are not sent and new embeddings are stored in it.
+
+    Returns:
+        list: One embedding (list of floats) per text, or None if the text was empty or its batch failed.
+    """
+    embeddings = [None] * len(texts)
+    pending = [position for position, text in enumerate(texts) if text]
+    if len(pending) < len(texts):
+        logging.warning(f"Skipping {len(texts) - len(pending)} empty texts.")
+
+    if cache is not None and pending:
+        cached = cache.get_many(model, [texts[position] for position in pending])
+        for position, embedding in zip(pending, cached):
+            embeddings[position] = embedding
+        pending = [position for position, embedding in zip(pending, cached) if embedding is None]
+        logging.info(f"Embedding cache: {len(cached) - len(pending)} hits, {len(pending)} misses")
+
+    encoding = _encoding(model)
+    token_counts = [
+        len(encoding.encode(texts[position])) if encoding is not None else estimate_tokens(texts[position])
+        for position in pending
+    ]
+    batches = make_batches(token_counts, batch_size, max_batch_tokens)
+    for number, batch in enumerate(batches, start=1):
+        positions = [pending[i] for i in batch]
+        try:
+            response = openai_client.embeddings.create(input=[texts[position] for position in positions], model=model)
+        except OpenAIError as e:
+            logging.error(f"OpenAI API error for embedding batch {number}/{len(batches)}: {e}")
+            continue
+        except Exception as e:
+            logging.error(f"An unexpected error occurred during embedding batch {number}/{len(batches)}: {e}")
+            continue
+        for item in response.data:
+            embeddings[positions[item.index]] = item.embedding
+        if cache is not None:
+            cache.put_many(model, [texts[position] for position in positions], [embeddings[position] for position in positions])
+        logging.info(f"Embedded batch {number}/{len(batches)} ({len(positions)} texts)")
+    return embeddings
@@ -0,0 +1,206 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache lookups: trim and collapse all whitespace (including newlines)."""
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    """Content address of an embedding: SHA-256 of the model and the normalized text."""
+    return hashlib.sha256(f"{model}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model, normalized text), stored in SQLite as float32 blobs.
+
+    Least recently used entries are evicted once ``max_entries`` or ``max_bytes`` is exceeded.
+    Hits and misses are counted per instance (see ``stats``). The cache can be shared by
+    several threads and, through SQLite locking, by several processes.
+
+    Example:
+        cache = EmbeddingCache("embeddings.sqlite", max_entries=100_000)
+        embedding = cache.get("text-embedding-3-small", "Column Name: first_name")
+        if embedding is None:
+            embedding = ...  # call the embeddings API
+            cache.put("text-embedding-3-small", "Column Name: first_name", embedding)
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path: SQLite file of the cache (created if missing).
+            max_entries: Maximum number of cached embeddings (unbounded if None).
+            max_bytes: Maximum total size of the stored vectors in bytes (unbounded if None).
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, "
+            "nbytes INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._connection.commit()
+        self._create_totals()
+
+    def _create_totals(self) -> None:
+        """
+        Keeps the entry count and byte total in a one-row table maintained by triggers.
+
+        Summing nbytes reads every row past its vector blob (overflow pages), so the bounds are
+        checked against these totals instead. Triggers keep them exact for every process
+        writing to the file; existing caches are counted once, when the table is created.
+        """
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, nbytes INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "INSERT OR IGNORE INTO embedding_totals (id, entries, nbytes) "
+                "SELECT 0, COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings"
+            )
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS embeddings_inserted AFTER INSERT ON embeddings BEGIN "
+                "UPDATE embedding_totals SET entries = entries + 1, nbytes = nbytes + new.nbytes; END"
+            )
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS embeddings_deleted AFTER DELETE ON embeddings BEGIN "
+                "UPDATE embedding_totals SET entries = entries - 1, nbytes = nbytes - old.nbytes; END"
+            )
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS embeddings_resized AFTER UPDATE OF nbytes ON embeddings BEGIN "
+                "UPDATE embedding_totals SET nbytes = nbytes - old.nbytes + new.nbytes; END"
+            )
+            self._connection.commit()
+        except Exception:
+            self._connection.rollback()
+            raise
+
+    def _totals(self):
+        """(entries, bytes) of the cache (caller holds the lock)."""
+        return self._connection.execute("SELECT entries, nbytes FROM embedding_totals").fetchone()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Cached embedding of a text, or None on a miss."""
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached embeddings of several texts (None for every miss), in input order."""
+        keys = [cache_key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time_ns()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._connection.commit()
+            self.hits += sum(key in found for key in keys)
+            self.misses += sum(key not in found for key in keys)
+        return [np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None for key in keys]
+
+    def put(self, model: str, text: str, embedding: Sequence[float]) -> None:
+        """Store the embedding of a text."""
+        self.put_many(model, [text], [embedding])
+
+    def put_many(self, model: str, texts: Sequence[str], embeddings: Sequence[Optional[Sequence[float]]]) -> None:
+        """Store several embeddings at once; None embeddings are ignored."""
+        now = time.time_ns()
+        rows = []
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                continue
+            vector = np.asarray(embedding, dtype=np.float32).tobytes()
+            rows.append((cache_key(model, text), model, vector, len(vector), now))
+        if not rows:
+            return
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the delete trigger
+            self._connection.executemany(
+                "INSERT INTO embeddings (key, model, vector, nbytes, last_used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET vector = excluded.vector, nbytes = excluded.nbytes, last_used = excluded.last_used",
+                rows,
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until both bounds hold (caller holds the lock)."""
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        entries, total_bytes = self._totals()
+        excess_entries = entries - self.max_entries if self.max_entries is not None else 0
+        excess_bytes = total_bytes - self.max_bytes if self.max_bytes is not None else 0
+        if excess_entries <= 0 and excess_bytes <= 0:
+            return
+
+        victims = []
+        for key, nbytes in self._connection.execute("SELECT key, nbytes FROM embeddings ORDER BY last_used"):
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            victims.append((key,))
+            excess_entries -= 1
+            excess_bytes -= nbytes
+        self._connection.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        logging.debug(f"Evicted {len(victims)} embeddings from {self.path}")
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss counters of this instance plus the current size of the cache."""
+        with self._lock:
+            entries, total_bytes = self._totals()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def clear(self) -> None:
+        """Remove every cached embedding."""
+        with self._lock:
+            self._connection.execute("DELETE FROM embeddings")
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def open_embedding_cache(cache_settings) -> Optional[EmbeddingCache]:
+    """Open the cache described by ``EmbeddingCacheSettings``, or return None when it is disabled."""
+    if not cache_settings.enabled:
+        return None
+    return EmbeddingCache(cache_settings.path, max_entries=cache_settings.max_entries, max_bytes=cache_settings.max_bytes)
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import List, Sequence, Union
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+from openai.types import CreateEmbeddingResponse, Embedding
+from openai.types.create_embedding_response import Usage
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def hashing_embedding(text: str, dimensions: int) -> List[float]:
+    """
+    Deterministic feature-hashing embedding of a text (unit length).
+
+    Words and their character trigrams are hashed (blake2b, stable across processes) into
+    ``dimensions`` signed buckets, so texts sharing words or word fragments
+    (``student_id`` / ``student``) get a positive cosine similarity.
+    """
+    vector = np.zeros(dimensions, dtype=np.float64)
+    words = _WORD_PATTERN.findall(text.lower()) or [""]
+    for word in words:
+        padded = f" {word} "
+        features = [(word, 1.0)] + [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+        for feature, weight in features:
+            value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            vector[value % dimensions] += weight if value >> 63 else -weight
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _response(texts: Sequence[str], model: str, dimensions: int) -> CreateEmbeddingResponse:
+    data = [Embedding(embedding=hashing_embedding(text, dimensions), index=index, object="embedding") for index, text in enumerate(texts)]
+    tokens = sum(len(_WORD_PATTERN.findall(text.lower())) for text in texts)
+    return CreateEmbeddingResponse(data=data, model=model, object="list", usage=Usage(prompt_tokens=tokens, total_tokens=tokens))
+
+
+class _LocalEmbeddings:
+    def __init__(self, dimensions: int, latency: float):
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def create(self, input: Union[str, Sequence[str]], model: str, **kwargs) -> CreateEmbeddingResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        return _response([input] if isinstance(input, str) else input, model, kwargs.get("dimensions") or self.dimensions)
+
+
+class _AsyncLocalEmbeddings(_LocalEmbeddings):
+    async def create(self, input: Union[str, Sequence[str]], model: str, **kwargs) -> CreateEmbeddingResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return _response([input] if isinstance(input, str) else input, model, kwargs.get("dimensions") or self.dimensions)
+
+
+class LocalEmbeddingClient:
+    """
+    Offline stand-in for ``OpenAI``: ``client.embeddings.create(input=..., model=...)``
+    returns hashing embeddings in the same response shape and dimensions.
+
+    ``latency`` (seconds) is slept per request to simulate the network round trip in benchmarks.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency: float = 0.0):
+        self.embeddings = _LocalEmbeddings(dimensions, latency)
+
+
+class AsyncLocalEmbeddingClient:
+    """Offline stand-in for ``AsyncOpenAI`` (see LocalEmbeddingClient)."""
+
+    def __init__(self, dimensions: int = 1536, latency: float = 0.0):
+        self.embeddings = _AsyncLocalEmbeddings(dimensions, latency)
+
+
+def embedding_model(settings) -> str:
+    """
+    Model name of the configured embedding provider.
+
+    It is also the embedding cache and content-hash key, so local embeddings never mix
+    with OpenAI ones.
+    """
+    if settings.embedding.provider == "local":
+        return f"{settings.embedding.local_model}-{settings.vector_store.embedding_dimensions}"
+    return settings.openai.embedding_model
+
+
+def create_embedding_client(settings, asynchronous: bool = False):
+    """
+    Embeddings client of the provider selected by ``settings.embedding.provider``.
+
+    Every client exposes ``embeddings.create(input=[...], model=...)`` like the OpenAI SDK,
+    so embed_texts, AsyncEmbeddingService and the VectorStore work with any of them.
+    Async OpenAI clients are created with max_retries=0 (AsyncEmbeddingService retries).
+
+    Raises:
+        ValueError: If the provider is not supported.
+    """
+    dimensions = settings.vector_store.embedding_dimensions
+    client_initializers = {
+        "openai": lambda s: AsyncOpenAI(api_key=s.openai.api_key, max_retries=0) if asynchronous else OpenAI(api_key=s.openai.api_key),
+        "local": lambda s: (AsyncLocalEmbeddingClient if asynchronous else LocalEmbeddingClient)(dimensions, s.embedding.local_latency),
+    }
+    initializer = client_initializers.get(settings.embedding.provider)
+    if initializer:
+        return initializer(settings)
+    raise ValueError(f"Unsupported embedding provider: {settings.embedding.provider}")
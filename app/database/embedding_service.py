@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+from openai import APIConnectionError, APIStatusError, OpenAIError, RateLimitError
+
+from database.embedding_batches import DEFAULT_BATCH_SIZE, DEFAULT_MAX_BATCH_TOKENS, estimate_tokens, make_batches
+from database.embedding_cache import normalize_text
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``rate_per_minute``.
+
+    ``acquire`` waits until enough tokens are available; waiters are served in order.
+    Requests larger than the capacity are clamped to it so they can still go through.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> None:
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """429s, 5xx responses and connection errors/timeouts are retried."""
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if the error carries one."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AsyncEmbeddingService:
+    """
+    Asyncio embedding client that keeps several batched requests in flight.
+
+    - At most ``max_concurrency`` requests run at once.
+    - Token buckets keep the request rate within ``requests_per_minute`` and the
+      estimated token rate within ``tokens_per_minute``.
+    - 429s, 5xx responses and connection errors are retried with full-jitter
+      exponential backoff (or the server's Retry-After), up to ``max_retries`` times.
+    - Texts are sent whitespace-normalized; identical texts requested while one is in
+      flight share that request instead of sending another. Requests outlive a cancelled
+      caller, so coalesced callers still get their embedding and it is still cached.
+    - With an EmbeddingCache, cached texts are not sent and new embeddings are stored.
+
+    Example:
+        service = AsyncEmbeddingService(AsyncOpenAI(max_retries=0), "text-embedding-3-small")
+        embeddings = await service.embed_many(["Column Name: first_name", "Column Name: last_name"])
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        max_concurrency: int = 8,
+        requests_per_minute: float = 3000,
+        tokens_per_minute: float = 1_000_000,
+        max_retries: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+        cache=None,
+    ):
+        """
+        Args:
+            client: An ``AsyncOpenAI`` client; create it with max_retries=0 so retries happen here.
+            model: Embedding model name.
+        """
+        self.client = client
+        self.model = model
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._tasks = set() # Running _fetch tasks (strong references until they finish)
+        self.stats = {"requests": 0, "retries": 0, "failed_requests": 0, "coalesced": 0, "texts": 0}
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Embedding of one text (None if it is empty or its request failed)."""
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Embeddings of many texts, in input order.
+
+        Returns:
+            list: One embedding per text, or None if the text was empty or its request failed.
+        """
+        keys = [normalize_text(text) if text else None for text in texts]
+        waiting = {}
+        new = {}
+        for key, text in zip(keys, texts):
+            if key is None or key in waiting:
+                continue
+            if key in self._in_flight:
+                self.stats["coalesced"] += 1
+                waiting[key] = self._in_flight[key]
+            else:
+                waiting[key] = new[key] = asyncio.get_running_loop().create_future()
+                self._in_flight[key] = new[key]
+
+        if new:
+            # The requests run in their own task: a caller that is cancelled (e.g. by wait_for)
+            # stops waiting, but the texts other calls coalesced onto are still embedded and cached
+            task = asyncio.create_task(self._fetch(list(new)))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+            await asyncio.shield(task)
+
+        results = {key: await asyncio.shield(future) for key, future in waiting.items()}
+        return [results.get(key) for key in keys]
+
+    async def _fetch(self, keys: List[str]) -> None:
+        """Serves newly in-flight texts from the cache or the API and resolves their futures."""
+        try:
+            pending = keys
+            if self.cache is not None:
+                cached = self.cache.get_many(self.model, pending)
+                for key, embedding in zip(pending, cached):
+                    if embedding is not None:
+                        self._resolve(key, embedding)
+                pending = [key for key, embedding in zip(pending, cached) if embedding is None]
+
+            token_counts = [estimate_tokens(key, self.model) for key in pending]
+            batches = make_batches(token_counts, self.batch_size, self.max_batch_tokens)
+            await asyncio.gather(
+                *(self._embed_batch([pending[i] for i in batch], sum(token_counts[i] for i in batch)) for batch in batches)
+            )
+        finally:
+            # Never leave waiters hanging (e.g. on an unexpected error)
+            for key in keys:
+                self._resolve(key, None)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Embedding requests failed: {task.exception()}")
+
+    def _resolve(self, key: str, embedding) -> None:
+        future = self._in_flight.get(key)
+        if future is not None and not future.done():
+            future.set_result(embedding)
+            del self._in_flight[key]
+
+    async def _embed_batch(self, texts: List[str], tokens: int) -> None:
+        response = None
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._requests.acquire(1)
+                await self._tokens.acquire(tokens)
+                self.stats["requests"] += 1
+                try:
+                    response = await self.client.embeddings.create(input=texts, model=self.model)
+                    break
+                except OpenAIError as e:
+                    if not _is_retryable(e) or attempt == self.max_retries:
+                        logging.error(f"Embedding request for {len(texts)} texts failed: {e}")
+                        break
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    self.stats["retries"] += 1
+                    logging.warning(f"Embedding request failed ({e.__class__.__name__}), retrying in {delay:.2f} seconds")
+                    await asyncio.sleep(delay)
+
+        if response is None:
+            self.stats["failed_requests"] += 1
+            return
+        embeddings = [None] * len(texts)
+        for item in response.data:
+            embeddings[item.index] = item.embedding
+        if self.cache is not None:
+            self.cache.put_many(self.model, texts, embeddings)
+        self.stats["texts"] += len(texts)
+        for key, embedding in zip(texts, embeddings):
+            self._resolve(key, embedding)
+
+
+def embed_texts_concurrently(client, texts, model, cache=None, **service_options):
+    """
+    Synchronous entry point for scripts: embeds ``texts`` with an AsyncEmbeddingService.
+
+    Args:
+        client: An ``AsyncOpenAI`` client (max_retries=0), used for this call only.
+        texts (list): Texts to embed.
+        model (str): Embedding model name.
+        cache (EmbeddingCache, optional): Cache consulted before sending texts.
+        **service_options: Passed to AsyncEmbeddingService (max_concurrency, requests_per_minute, ...).
+
+    Returns:
+        list: One embedding per text, or None if the text was empty or its request failed.
+    """
+    async def run():
+        service = AsyncEmbeddingService(client, model, cache=cache, **service_options)
+        start_time = time.time()
+        embeddings = await service.embed_many(texts)
+        logging.info(f"Embedded {len(texts)} texts in {time.time() - start_time:.3f} seconds: {service.stats}")
+        return embeddings
+
+    return asyncio.run(run())
@@ -2,7 +2,7 @@
 import os
 import json
 import logging
-from openai import OpenAI, OpenAIError
+from openai import OpenAIError
 import sys
 
 
@@ -10,9 +10,18 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
+# The embedding service uses app-rooted imports (database.embedding_batches)
+app_root = os.path.join(project_root, 'app')
+if app_root not in sys.path:
+    sys.path.insert(0, app_root)
 
 from app.config.settings import get_settings
-from app.database.sqlite_client import SQLiteClient
+from app.database.schema_introspection import introspect_schema
+from app.database.embedding_service import embed_texts_concurrently
+from app.database.embedding_cache import open_embedding_cache
+from app.database.embedding_providers import create_embedding_client, embedding_model
+from app.database.catalog_loader import CatalogLoader
+from app.database.catalog_refresh import CONTENT_HASH_KEY, content_hash, load_table_metadata, plan_refresh
 
 # --- Configuration ---
 SQLITE_DB_PATH = os.path.join(project_root, 'data', 'spider', 'sqlite', 'student_transcripts_tracking.sqlite')
@@ -20,60 +29,30 @@ DESCRIPTIONS_PATH = os.path.join(project_root, 'data', 'table_descriptions.json'
 OUTPUT_SQL_PATH = os.path.join(project_root, 'migrations', 'sql', 'db_tables_inserts.sql') # Updated output path
 TARGET_DATABASE_NAME = 'student_transcripts_tracking' # Database name to look up
 TARGET_SCHEMA_NAME = 'public' # Schema name to look up
-EMBEDDING_MODEL = "text-embedding-3-small" # Or your preferred OpenAI model
+EMBEDDING_MODEL = embedding_model(get_settings()) # text-embedding-3-small, or the local hashing model with EMBEDDING_PROVIDER=local
+EMBEDDING_BATCH_SIZE = 512 # Tables embedded per API request
+EMBEDDING_MAX_BATCH_TOKENS = 100_000 # Token budget per API request
+# Incremental mode compares content hashes with the catalog in Postgres and writes only the diff
+INCREMENTAL = False
+OUTPUT_REFRESH_SQL_PATH = os.path.join(project_root, 'migrations', 'sql', 'db_tables_refresh.sql')
+# Bulk load the rows into Postgres with COPY (CatalogLoader) instead of writing a SQL file
+BULK_LOAD = False
 # Ensure OPENAI_API_KEY environment variable is set
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# --- OpenAI Client ---
+# --- Embeddings Client ---
 try:
-    openai_client = OpenAI() # Reads OPENAI_API_KEY from environment variable
-except OpenAIError as e:
-    logging.error(f"Failed to initialize OpenAI client: {e}")
+    embedding_client = create_embedding_client(get_settings(), asynchronous=True) # Provider from EmbeddingSettings; retries and rate limits are handled by the embedding service
+except (OpenAIError, ValueError) as e:
+    logging.error(f"Failed to initialize embeddings client: {e}")
     sys.exit(1)
 
-# --- Helper Functions ---
-def get_openai_embedding(text_to_embed: str):
-    """Generates embedding for the given text using OpenAI."""
-    try:
-        response = openai_client.embeddings.create(
-            input=text_to_embed,
-            model=EMBEDDING_MODEL
-        )
-        # Correct access to embedding data based on v1.0+ openai library
-        return response.data[0].embedding
-    except OpenAIError as e:
-        logging.error(f"OpenAI API error: {e}")
-        return None
-    except Exception as e:
-        logging.error(f"An unexpected error occurred during embedding: {e}")
-        return None
-
-def get_tables(client: SQLiteClient):
-    """Retrieves a list of table names from the SQLite database."""
-    try:
-        query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';"
-        df = client.execute_query(query)
-        return df['name'].tolist()
-    except Exception as e:
-        logging.error(f"Failed to retrieve tables: {e}")
-        return []
-
-def get_table_schema(client: SQLiteClient, table_name: str):
-    """Retrieves the CREATE TABLE statement for a given table (used for default description)."""
-    try:
-        # Pass the query as a plain string
-        query = "SELECT sql FROM sqlite_master WHERE type='table' AND name = :table_name"
-        df = client.execute_query(query, params={"table_name": table_name})
-        if not df.empty:
-            return df['sql'].iloc[0]
-        else:
-            logging.warning(f"Schema not found for table: {table_name}")
-            return None
-    except Exception as e:
-        logging.error(f"Failed to retrieve schema for table {table_name}: {e}")
-        return None
+# --- Embedding Cache ---
+# Unchanged texts are served from the local cache instead of the API (see EmbeddingCacheSettings)
+embedding_cache = open_embedding_cache(get_settings().embedding_cache)
 
+# --- Helper Functions ---
 def load_descriptions(path: str):
     """Loads table descriptions from a JSON file."""
     try:
@@ -91,6 +70,60 @@ def load_descriptions(path: str):
         logging.error(f"Failed to load descriptions: {e}")
         return {}
 
+def build_table_upsert_sql(table_name: str, description: str, embedding, extra_metadata: dict):
+    """
+    Builds the INSERT ... ON CONFLICT statement for one table.
+
+    With embedding None the stored embedding is kept (only the other attributes are updated).
+    The include_in_context flag and sample data of an existing row are never overwritten.
+    """
+    # Format embedding list as string for PostgreSQL vector type
+    embedding_sql = f"'{str(embedding).replace(' ', '')}'" if embedding else "NULL" # Compact string representation
+
+    # Escape single quotes in text fields for SQL
+    table_name_sql = table_name.replace("'", "''")
+    description_sql = description.replace("'", "''")
+    escaped_metadata = json.dumps(extra_metadata).replace("'", "''")
+
+    updated_columns = ['description', 'extra_metadata']
+    if embedding:
+        updated_columns.insert(1, 'embedding')
+    update_sql = ",\n".join(f"    {column} = EXCLUDED.{column}" for column in updated_columns)
+
+    # Fetches schema_id dynamically
+    # id is explicitly set using uuid_generate_v4()
+    # created_at uses NOW()
+    return (
+        f"INSERT INTO db_tables (id, schema_id, table_name, description, embedding, include_in_context, sample_data, extra_metadata, created_at, updated_at) VALUES (\n"
+        f"    uuid_generate_v4(),\n"
+        f"    (SELECT ds.id FROM database_schemas ds JOIN databases d ON ds.database_id = d.id WHERE d.name = '{TARGET_DATABASE_NAME}' AND ds.schema_name = '{TARGET_SCHEMA_NAME}' LIMIT 1),\n"
+        f"    '{table_name_sql}',\n"
+        f"    '{description_sql}',\n"
+        f"    {embedding_sql},\n"
+        f"    TRUE, -- include_in_context\n"
+        f"    NULL, -- sample_data\n"
+        f"    '{escaped_metadata}', -- extra_metadata (JSON with schema and content hash)\n"
+        f"    NOW(), -- created_at\n"
+        f"    NULL -- updated_at\n"
+        f")\n"
+        f"ON CONFLICT (schema_id, table_name) DO UPDATE SET\n"
+        f"{update_sql},\n"
+        f"    updated_at = NOW();"
+    )
+
+def build_table_row(table_name: str, description: str, embedding, extra_metadata: dict):
+    """Builds the CatalogLoader row for one table; with embedding None the stored embedding is kept."""
+    return {"table_name": table_name, "description": description, "embedding": embedding or None, "extra_metadata": extra_metadata}
+
+def build_table_delete_sql(table_name: str):
+    """Builds the DELETE statement for a table that no longer exists in the source database (its columns cascade)."""
+    table_name_sql = table_name.replace("'", "''")
+    return (
+        f"DELETE FROM db_tables WHERE table_name = '{table_name_sql}' AND schema_id = "
+        f"(SELECT ds.id FROM database_schemas ds JOIN databases d ON ds.database_id = d.id WHERE d.name = '{TARGET_DATABASE_NAME}' AND ds.schema_name = '{TARGET_SCHEMA_NAME}' LIMIT 1);"
+    )
+
+
 # --- Main Script ---
 if __name__ == "__main__":
     logging.info("Starting db_tables embedding generation process...")
@@ -105,107 +138,116 @@ if __name__ == "__main__":
     if not table_descriptions:
         logging.warning("No table descriptions loaded. Proceeding without them.")
 
-    sql_inserts = []
-    sqlite_client = None
+    sql_statements = []
+    load_rows = [] # CatalogLoader rows when BULK_LOAD is set
+    to_delete = []
+    tables_to_embed = {} # table_name -> (description, text to embed)
+    table_metadata = {} # table_name -> extra_metadata
 
     try:
-        # Connect to SQLite
-        logging.info(f"Connecting to SQLite database: {SQLITE_DB_PATH}")
-        sqlite_client = SQLiteClient(db_path=SQLITE_DB_PATH)
-
-        # Get table names
-        tables = get_tables(sqlite_client)
-        logging.info(f"Found tables: {tables}")
+        # Read all tables in one query
+        logging.info(f"Reading schema of SQLite database: {SQLITE_DB_PATH}")
+        tables = introspect_schema(SQLITE_DB_PATH)
+        logging.info(f"Found tables: {[table.name for table in tables]}")
 
         if not tables:
             logging.warning("No tables found in the database.")
             sys.exit(0)
 
         # Process each table
-        for table_name in tables:
+        for table in tables:
+            table_name = table.name
             logging.info(f"Processing table: {table_name}")
 
             # Get description (schema is no longer needed for embedding text)
             description = table_descriptions.get(table_name)
             if not description:
-                 # Optionally get schema just for a default description if needed
-                 # schema_for_desc = get_table_schema(sqlite_client, table_name) or ""
-                 # description = f"Definition for the {table_name} table." # Simpler default
                  logging.warning(f"No description found for table '{table_name}'. Using empty description.")
                  description = "" # Use empty string if no description found
 
             # Prepare text for embedding (only table name and description)
             text_to_embed = f"Table Name: {table_name}\nDescription: {description}"
+            tables_to_embed[table_name] = (description, text_to_embed)
+
+            # Table schema for metadata
+            extra_metadata = {"schema_definition": table.sql}
+            extra_metadata[CONTENT_HASH_KEY] = content_hash(text_to_embed, EMBEDDING_MODEL)
+            table_metadata[table_name] = extra_metadata
+
+        # Decide what to (re-)embed
+        if INCREMENTAL:
+            existing_metadata = load_table_metadata(get_settings().database.service_url, TARGET_DATABASE_NAME, TARGET_SCHEMA_NAME)
+            to_embed, to_update, to_delete = plan_refresh(table_metadata, existing_metadata)
+        else:
+            to_embed, to_update, to_delete = list(tables_to_embed), [], []
+
+        # Generate embeddings, returned in the same order as the collected tables
+        logging.info(f"Generating embeddings for {len(to_embed)} tables...")
+        embeddings = embed_texts_concurrently(
+            embedding_client,
+            [tables_to_embed[table_name][1] for table_name in to_embed],
+            EMBEDDING_MODEL,
+            cache=embedding_cache,
+            batch_size=EMBEDDING_BATCH_SIZE,
+            max_batch_tokens=EMBEDDING_MAX_BATCH_TOKENS,
+            max_concurrency=get_settings().openai.embedding_max_concurrency,
+            requests_per_minute=get_settings().openai.embedding_requests_per_minute,
+            tokens_per_minute=get_settings().openai.embedding_tokens_per_minute,
+        )
 
-            # Generate embedding
-            logging.info(f"Generating embedding for {table_name}...")
-            embedding = get_openai_embedding(text_to_embed)
+        for table_name, embedding in zip(to_embed, embeddings):
             if not embedding:
                 logging.warning(f"Could not generate embedding for {table_name}. Skipping.")
                 continue
+            if BULK_LOAD:
+                load_rows.append(build_table_row(table_name, tables_to_embed[table_name][0], embedding, table_metadata[table_name]))
+                continue
+            sql_statements.append(build_table_upsert_sql(table_name, tables_to_embed[table_name][0], embedding, table_metadata[table_name]))
+            logging.info(f"Generated upsert statement for {table_name}")
+
+        # Changed schemas with an unchanged embedded text keep their stored embedding
+        for table_name in to_update:
+            if BULK_LOAD:
+                load_rows.append(build_table_row(table_name, tables_to_embed[table_name][0], None, table_metadata[table_name]))
+                continue
+            sql_statements.append(build_table_upsert_sql(table_name, tables_to_embed[table_name][0], None, table_metadata[table_name]))
+            logging.info(f"Generated metadata update for {table_name}")
+
+        # Bulk loads delete through the loader
+        for table_name in ([] if BULK_LOAD else to_delete):
+            sql_statements.append(build_table_delete_sql(table_name))
+            logging.info(f"Generated DELETE statement for {table_name}")
 
-            # Format embedding list as string for PostgreSQL vector type
-            embedding_str = str(embedding).replace(" ", "") # Compact string representation
-
-            # Escape single quotes in text fields for SQL
-            table_name_sql = table_name.replace("'", "''")
-            description_sql = description.replace("'", "''")
-
-            # Get table schema for metadata
-            table_schema = get_table_schema(sqlite_client, table_name)
-            if not table_schema:
-                logging.warning(f"Could not retrieve schema for table {table_name} for metadata.")
-                table_schema_json_sql = "NULL"
-            else:
-                # Format schema as JSON string for extra_metadata
-                extra_metadata = {"schema_definition": table_schema}
-                # Escape single quotes for SQL
-                table_schema_json_sql = f"'{json.dumps(extra_metadata).replace("'", "''")}'"
-
-            # Create INSERT statement for db_tables
-            # Fetches schema_id dynamically
-            # id is now explicitly set using uuid_generate_v4()
-            # created_at uses NOW()
-            insert_sql = (
-                f"INSERT INTO db_tables (id, schema_id, table_name, description, embedding, include_in_context, sample_data, extra_metadata, created_at, updated_at) VALUES (\n"
-                f"    uuid_generate_v4(),\n"
-                f"    (SELECT ds.id FROM database_schemas ds JOIN databases d ON ds.database_id = d.id WHERE d.name = '{TARGET_DATABASE_NAME}' AND ds.schema_name = '{TARGET_SCHEMA_NAME}' LIMIT 1),\n"
-                f"    '{table_name_sql}',\n"
-                f"    '{description_sql}',\n"
-                f"    '{embedding_str}',\n"
-                f"    TRUE, -- include_in_context\n"
-                f"    NULL, -- sample_data\n"
-                f"    {table_schema_json_sql}, -- extra_metadata (JSON with schema)\n"
-                f"    NOW(), -- created_at\n"
-                f"    NULL -- updated_at\n"
-                f");"
-            )
-            sql_inserts.append(insert_sql)
-            logging.info(f"Generated INSERT statement for {table_name}")
-
-    except ConnectionError as e:
-         logging.error(f"Database connection error: {e}")
     except Exception as e:
         logging.error(f"An unexpected error occurred: {e}", exc_info=True)
-    finally:
-        if sqlite_client:
-            logging.info("Closing SQLite connection.")
-            sqlite_client.close()
 
-    # Write INSERT statements to file
-    if sql_inserts:
+    if BULK_LOAD:
+        # Ids are resolved once and the rows are streamed with binary COPY
+        try:
+            loader = CatalogLoader(get_settings().database.service_url, TARGET_DATABASE_NAME, TARGET_SCHEMA_NAME)
+            loader.load_tables(load_rows)
+            deleted = loader.delete_tables(to_delete)
+            logging.info(f"Deleted {deleted} db_tables rows")
+        except Exception as e:
+            logging.error(f"Failed to bulk load db_tables: {e}", exc_info=True)
+        logging.info("db_tables embedding generation process finished.")
+        sys.exit(0)
+
+    # Write statements to file
+    output_path = OUTPUT_REFRESH_SQL_PATH if INCREMENTAL else OUTPUT_SQL_PATH
+    if sql_statements:
         try:
             # Ensure the directory exists
-            os.makedirs(os.path.dirname(OUTPUT_SQL_PATH), exist_ok=True)
-            with open(OUTPUT_SQL_PATH, 'w') as f:
-                f.write("-- SQL INSERT statements for db_tables\n")
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'w') as f:
+                f.write(f"-- SQL {'refresh' if INCREMENTAL else 'INSERT'} statements for db_tables\n")
                 f.write(f"-- Generated on: {logging.Formatter().formatTime(logging.LogRecord(None, None, '', 0, '', (), None, None))}\n\n")
-                for stmt in sql_inserts:
+                for stmt in sql_statements:
                     f.write(stmt + "\n\n") # Add extra newline for readability
-            logging.info(f"Successfully wrote {len(sql_inserts)} INSERT statements to {OUTPUT_SQL_PATH}")
+            logging.info(f"Successfully wrote {len(sql_statements)} statements to {output_path}")
         except IOError as e:
             logging.error(f"Failed to write SQL output file: {e}")
     else:
-        logging.warning("No INSERT statements were generated.")
+        logging.warning("No statements were generated.")
 
     logging.info("db_tables embedding generation process finished.")
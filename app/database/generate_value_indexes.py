@@ -0,0 +1,84 @@
+import os
+import logging
+import sys
+
+from sqlalchemy import create_engine, text
+
+# Add project root to sys.path to allow imports from app package
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# The matching utilities use app-rooted imports (utils.match_index)
+app_root = os.path.join(project_root, 'app')
+if app_root not in sys.path:
+    sys.path.insert(0, app_root)
+
+from app.database.sqlite_client import SQLiteClient
+from app.config.settings import get_settings
+from utils.value_index import build_value_indexes, is_text_type, value_index_path
+
+# --- Configuration ---
+SQLITE_DB_PATH = os.path.join(project_root, 'data', 'spider', 'sqlite', 'student_transcripts_tracking.sqlite')
+OUTPUT_DIR = value_index_path(SQLITE_DB_PATH) # Stored next to the database
+TARGET_DATABASE_NAME = 'student_transcripts_tracking' # Database name to look up in the catalog
+TARGET_SCHEMA_NAME = 'public' # Schema name to look up in the catalog
+ACRONYM_DICT = {} # Optional acronym expansions applied to the indexed values
+BATCH_SIZE = 10000 # Rows fetched per batch while reading distinct values
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def get_catalog_columns(service_url: str, database_name: str, schema_name: str):
+    """Returns (table_name, column_name, data_type) of the db_columns rows flagged include_in_context."""
+    query = text(
+        "SELECT dt.table_name, dc.column_name, dc.data_type "
+        "FROM db_columns dc "
+        "JOIN db_tables dt ON dc.table_id = dt.id "
+        "JOIN database_schemas ds ON dt.schema_id = ds.id "
+        "JOIN databases d ON ds.database_id = d.id "
+        "WHERE d.name = :database_name AND ds.schema_name = :schema_name AND dc.include_in_context "
+        "ORDER BY dt.table_name, dc.column_name"
+    )
+    engine = create_engine(service_url)
+    try:
+        with engine.connect() as connection:
+            rows = connection.execute(query, {"database_name": database_name, "schema_name": schema_name})
+            return [tuple(row) for row in rows]
+    finally:
+        engine.dispose()
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    logging.info("Starting value index generation process...")
+
+    if not os.path.exists(SQLITE_DB_PATH):
+        logging.error(f"SQLite database not found at: {SQLITE_DB_PATH}")
+        sys.exit(1)
+
+    try:
+        catalog_columns = get_catalog_columns(get_settings().database.service_url, TARGET_DATABASE_NAME, TARGET_SCHEMA_NAME)
+    except Exception as e:
+        logging.error(f"Failed to read the db_columns catalog: {e}")
+        sys.exit(1)
+
+    text_columns = [(table_name, column_name) for table_name, column_name, data_type in catalog_columns if is_text_type(data_type)]
+    logging.info(f"Found {len(text_columns)} text columns of {len(catalog_columns)} catalog columns flagged include_in_context")
+    if not text_columns:
+        logging.warning("No text columns to index.")
+        sys.exit(0)
+
+    sqlite_client = None
+    try:
+        logging.info(f"Connecting to SQLite database: {SQLITE_DB_PATH}")
+        sqlite_client = SQLiteClient(db_path=SQLITE_DB_PATH)
+        manifest = build_value_indexes(sqlite_client, text_columns, OUTPUT_DIR, ACRONYM_DICT, batch_size=BATCH_SIZE)
+        logging.info(f"Successfully wrote {len(manifest['columns'])} value indexes to {OUTPUT_DIR}")
+    except Exception as e:
+        logging.error(f"An unexpected error occurred: {e}", exc_info=True)
+    finally:
+        if sqlite_client:
+            logging.info("Closing SQLite connection.")
+            sqlite_client.close()
+
+    logging.info("Value index generation process finished.")
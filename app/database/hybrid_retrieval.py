@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from config.settings import get_settings
+from database.async_database import AsyncDatabase, positional_sql
+from database.vector_storage import VectorStorage
+
+# --- Configuration ---
+RRF_K = 60 # Rank constant of reciprocal rank fusion (the value from the original RRF paper)
+MAX_IDENTIFIER_WORDS = 3 # Longest run of question words joined into a candidate identifier
+STOPWORDS = frozenset(
+    "a all an and are be by did do does each for from give has have how in is its list many me of on or show that the their there to was were what which who with".split()
+)
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Per kind: catalog table, columns selected from it, the joins from a row (alias {row}) to its
+# database d, the expression naming a row database.table[.column], and the identifier column
+_CATALOG = {
+    "tables": (
+        "db_tables",
+        ("id", "schema_id", "table_name"),
+        "JOIN database_schemas s ON s.id = {row}.schema_id JOIN databases d ON d.id = s.database_id",
+        "d.name || '.' || {row}.table_name",
+        "table_name",
+    ),
+    "columns": (
+        "db_columns",
+        ("id", "table_id", "column_name"),
+        "JOIN db_tables t ON t.id = {row}.table_id JOIN database_schemas s ON s.id = t.schema_id "
+        "JOIN databases d ON d.id = s.database_id",
+        "d.name || '.' || t.table_name || '.' || {row}.column_name",
+        "column_name",
+    ),
+}
+
+
+class HybridHit(NamedTuple):
+    id: str
+    name: str
+    score: float
+    lexical_rank: Optional[int]
+    vector_rank: Optional[int]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Fuses ranked id lists: score(id) = sum over rankings of 1 / (k + rank), ranks starting at 1.
+
+    Returns:
+        list: (id, score) pairs, best first (ties keep first-seen order).
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def question_terms(question: str) -> List[str]:
+    """Lower-cased question words without stopwords, in order (underscored identifiers are split)."""
+    return [word for word in _WORD_PATTERN.findall(question.lower()) if word not in STOPWORDS]
+
+
+def identifier_candidates(question: str, max_words: int = MAX_IDENTIFIER_WORDS) -> List[str]:
+    """
+    Identifiers a question may name: identifiers typed as such (``student_id``), single
+    words, and runs of up to ``max_words`` words joined with and without underscores
+    ("zip code" -> zip_code, zipcode).
+    """
+    candidates = dict.fromkeys(re.findall(r"[a-z0-9]+(?:_[a-z0-9]+)+", question.lower()))
+    words = question_terms(question)
+    for size in range(1, max_words + 1):
+        for start in range(len(words) - size + 1):
+            run = words[start:start + size]
+            candidates.setdefault("_".join(run))
+            candidates.setdefault("".join(run))
+    return list(candidates)
+
+
+class HybridRetriever:
+    """
+    Schema-linking retrieval over db_tables/db_columns fusing a lexical and a vector leg with RRF.
+
+    - Lexical leg: exact identifier matches, full-text matches of the identifier words and
+      trigram similarity (typos), in one query (indexes from the hybrid retrieval migration).
+    - Vector leg: the question embedding against the catalog index in process when a
+      CatalogIndex is given, otherwise the VectorStorage query in Postgres.
+
+    Both legs run concurrently, each within its own latency budget; a leg that misses its
+    budget or fails is dropped from the fusion (counted in ``stats``) instead of delaying
+    the answer. With ``database`` both legs only return rows of that database (the
+    target of the question); otherwise the whole catalog is searched. Names are
+    database.table[.column].
+
+    Example:
+        retriever = HybridRetriever.from_settings(get_settings(), vector_store.aget_embedding)
+        hits = await retriever.retrieve("average grade per student_id", "columns", k=10, database="student_transcripts_tracking")
+    """
+
+    def __init__(
+        self,
+        database: AsyncDatabase,
+        embed: Callable[[str], Awaitable[Sequence[float]]],
+        storage: Optional[VectorStorage] = None,
+        catalog_index=None,
+        lexical_budget: float = 0.05,
+        vector_budget: float = 0.25,
+        candidates: int = 50,
+        rrf_k: int = RRF_K,
+    ):
+        """
+        Args:
+            database: Pool the lexical (and database vector) queries run on.
+            embed: Coroutine function embedding the question, e.g. VectorStore.aget_embedding.
+            storage: Catalog vector index storage; defaults to the configured one
+                (VectorStorage.from_settings), whose expression index the vector query must use.
+            catalog_index: Optional loaded CatalogIndex used instead of Postgres for the vector leg.
+            lexical_budget, vector_budget: Seconds each leg may take (the vector one includes embedding).
+            candidates: Rows fetched per leg before fusion.
+            rrf_k: RRF rank constant.
+        """
+        self.database = database
+        self.embed = embed
+        self.storage = storage or VectorStorage.from_settings(get_settings().vector_store)
+        self.catalog_index = catalog_index
+        self.lexical_budget = lexical_budget
+        self.vector_budget = vector_budget
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.stats = {"retrievals": 0, "lexical_timeouts": 0, "vector_timeouts": 0, "lexical_errors": 0, "vector_errors": 0}
+        # Fixed SQL texts per (kind, scoped to a database) so they stay prepared
+        self._lexical_sql = {(kind, scoped): self._build_lexical_sql(kind, scoped) for kind in _CATALOG for scoped in (False, True)}
+        self._vector_sql = {(kind, scoped): self._build_vector_sql(kind, scoped) for kind in _CATALOG for scoped in (False, True)}
+
+    @classmethod
+    def from_settings(cls, settings, embed, catalog_index=None):
+        retrieval = settings.retrieval
+        return cls(
+            AsyncDatabase.from_settings(settings.database),
+            embed,
+            VectorStorage.from_settings(settings.vector_store),
+            catalog_index,
+            retrieval.lexical_budget_ms / 1000,
+            retrieval.vector_budget_ms / 1000,
+            retrieval.candidates,
+            retrieval.rrf_k,
+        )
+
+    @staticmethod
+    def _build_lexical_sql(kind: str, scoped: bool) -> str:
+        table, _, joins, name, identifier = _CATALOG[kind]
+        words = f"to_tsvector('simple', replace({{row}}.{identifier}, '_', ' '))"
+        # $1: OR tsquery of the question words, $2: candidate identifiers, $3: limit, $4: database name.
+        # Each match kind is its own index scan (lower btree, FTS GIN, one trigram GIN probe per
+        # candidate: GIN cannot serve `% ANY(...)`); only the matched rows are scored.
+        matches = (
+            f"SELECT id FROM {table} WHERE lower({identifier}) = ANY($2) "
+            f"UNION SELECT id FROM {table} m WHERE {words.format(row='m')} @@ to_tsquery('simple', $1) "
+            f"UNION SELECT m.id FROM unnest($2::text[]) candidate JOIN {table} m ON lower(m.{identifier}) % candidate"
+        )
+        score = (
+            f"(lower(c.{identifier}) = ANY($2))::int * 2 "
+            f"+ ts_rank_cd({words.format(row='c')}, to_tsquery('simple', $1)) "
+            f"+ (SELECT coalesce(max(similarity(lower(c.{identifier}), candidate)), 0) FROM unnest($2::text[]) candidate)"
+        )
+        return (
+            f"SELECT c.id, {name.format(row='c')} AS name FROM ({matches}) matches "
+            f"JOIN {table} c ON c.id = matches.id {joins.format(row='c')} "
+            f"{'WHERE d.name = $4 ' if scoped else ''}ORDER BY {score} DESC, c.id LIMIT $3"
+        )
+
+    def _build_vector_sql(self, kind: str, scoped: bool) -> str:
+        table, columns, joins, name, _ = _CATALOG[kind]
+        if scoped:
+            # One database holds few rows: exact distances over them (an HNSW scan filtered
+            # afterwards would return too few of them)
+            return (
+                f"SELECT c.id, {name.format(row='c')} AS name FROM {table} c {joins.format(row='c')} "
+                f"WHERE d.name = $3 AND c.embedding IS NOT NULL "
+                f"ORDER BY c.embedding <=> $1::vector({self.storage.full_dimensions}), c.id LIMIT $2"
+            )
+        sql = self.storage.search_sql(table, columns)
+        return positional_sql(
+            f"SELECT hits.id, {name.format(row='hits')} AS name FROM ({sql}) hits {joins.format(row='hits')} "
+            f"ORDER BY hits.distance, hits.id",
+            ("embedding", "k", "candidates"),
+        )
+
+    async def _lexical(self, question: str, kind: str, database: Optional[str]) -> List[Tuple[str, str]]:
+        terms = question_terms(question)
+        identifiers = identifier_candidates(question)
+        if not identifiers:
+            return []
+        args = [" | ".join(dict.fromkeys(terms)), identifiers, self.candidates]
+        if database is not None:
+            args.append(database)
+        rows = await self.database.fetch(self._lexical_sql[(kind, database is not None)], *args)
+        return [(str(row[0]), row[1]) for row in rows]
+
+    async def _vector(self, question: str, kind: str, database: Optional[str]) -> List[Tuple[str, str]]:
+        embedding = await self.embed(question)
+        if embedding is None:
+            raise RuntimeError("question could not be embedded")
+        if self.catalog_index is not None:
+            return [(hit.id, hit.name) for hit in self.catalog_index.search(kind, embedding, self.candidates, database)]
+        args = [embedding, self.candidates]
+        if database is not None:
+            args.append(database)
+        elif not self.storage.is_exact:
+            args.append(self.storage.candidates(self.candidates))
+        rows = await self.database.fetch(self._vector_sql[(kind, database is not None)], *args)
+        return [(str(row[0]), row[1]) for row in rows]
+
+    async def _within_budget(self, leg: str, coroutine, budget: float) -> List[Tuple[str, str]]:
+        start_time = time.perf_counter()
+        try:
+            return await asyncio.wait_for(coroutine, budget)
+        except asyncio.TimeoutError:
+            self.stats[f"{leg}_timeouts"] += 1
+            logging.warning(f"{leg.capitalize()} retrieval exceeded its {budget * 1000:.0f} ms budget, skipped")
+        except Exception as e:
+            self.stats[f"{leg}_errors"] += 1
+            logging.error(f"{leg.capitalize()} retrieval failed after {time.perf_counter() - start_time:.3f} seconds: {e}")
+        return []
+
+    async def retrieve(self, question: str, kind: str = "columns", k: int = 10, database: Optional[str] = None) -> List[HybridHit]:
+        """
+        Top-k catalog rows of ``kind`` ("tables" or "columns") for a question, only from
+        ``database`` (its name in the databases table) when given.
+
+        Returns:
+            list: HybridHit per row (RRF score, 1-based rank in each leg or None), best first.
+        """
+        if kind not in _CATALOG:
+            raise ValueError(f"Unknown catalog kind '{kind}', expected one of {tuple(_CATALOG)}")
+        self.stats["retrievals"] += 1
+        lexical, vector = await asyncio.gather(
+            self._within_budget("lexical", self._lexical(question, kind, database), self.lexical_budget),
+            self._within_budget("vector", self._vector(question, kind, database), self.vector_budget),
+        )
+        names = {**dict(vector), **dict(lexical)}
+        lexical_ranks = {key: rank for rank, (key, _) in enumerate(lexical, start=1)}
+        vector_ranks = {key: rank for rank, (key, _) in enumerate(vector, start=1)}
+        fused = reciprocal_rank_fusion([[key for key, _ in lexical], [key for key, _ in vector]], self.rrf_k)
+        return [
+            HybridHit(key, names[key], score, lexical_ranks.get(key), vector_ranks.get(key))
+            for key, score in fused[:k]
+        ]
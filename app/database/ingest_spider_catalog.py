@@ -0,0 +1,160 @@
+import os
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from openai import OpenAIError
+
+# Add project root to sys.path to allow imports from app package
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+# The ingestion helpers use app-rooted imports (database.schema_introspection)
+app_root = os.path.join(project_root, 'app')
+if app_root not in sys.path:
+    sys.path.insert(0, app_root)
+
+from app.config.settings import get_settings
+from app.database.catalog_ingest import discover_databases, introspect_databases
+from app.database.catalog_loader import CatalogLoader
+from app.database.catalog_refresh import CONTENT_HASH_KEY, column_extra_metadata, content_hash
+from app.database.embedding_service import embed_texts_concurrently
+from app.database.embedding_cache import open_embedding_cache
+from app.database.embedding_providers import create_embedding_client, embedding_model
+
+# --- Configuration ---
+SPIDER_DIR = os.path.join(project_root, 'data', 'spider')
+TABLES_JSON_PATH = os.path.join(SPIDER_DIR, 'tables.json') # Lists the db_ids to ingest (optional)
+TARGET_SCHEMA_NAME = 'public' # Schema name every database is catalogued under
+EMBEDDING_MODEL = embedding_model(get_settings()) # text-embedding-3-small, or the local hashing model with EMBEDDING_PROVIDER=local
+EMBEDDING_BATCH_SIZE = 512 # Texts embedded per API request
+EMBEDDING_MAX_BATCH_TOKENS = 100_000 # Token budget per API request
+INTROSPECTION_WORKERS = None # Processes reading the SQLite schemas (defaults to the CPU count)
+LOAD_WORKERS = 4 # Databases loaded into Postgres concurrently
+# Usage: python app/database/ingest_spider_catalog.py [db_id ...]  (all discovered databases by default)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+# --- Helper Functions ---
+def table_text(table_name: str, description: str = ""):
+    """Text embedded for a table (same format as generate_db_tables_embeddings)."""
+    return f"Table Name: {table_name}\nDescription: {description}"
+
+def column_text(column_name: str):
+    """Text embedded for a column (same format as generate_db_columns_embeddings)."""
+    return f"Column Name: {column_name}"
+
+def collect_texts(schemas):
+    """Unique texts to embed over all databases; shared column names are embedded once."""
+    texts = {}
+    for schema in schemas:
+        for table in schema["tables"]:
+            texts.setdefault(table_text(table.name))
+            for column in table.columns:
+                texts.setdefault(column_text(column.name))
+    return list(texts)
+
+def build_rows(schema, embeddings: dict):
+    """Builds the CatalogLoader db_tables and db_columns rows of one introspected database."""
+    table_rows, column_rows = [], []
+    for table in schema["tables"]:
+        text_to_embed = table_text(table.name)
+        table_rows.append({
+            "table_name": table.name,
+            "description": None, # Spider has no table descriptions; the loader keeps any stored one
+            "embedding": embeddings.get(text_to_embed),
+            "extra_metadata": {"schema_definition": table.sql, CONTENT_HASH_KEY: content_hash(text_to_embed, EMBEDDING_MODEL)},
+        })
+        for column in table.columns:
+            text_to_embed = column_text(column.name)
+            column_rows.append({
+                "table_name": table.name,
+                "column_name": column.name,
+                "data_type": column.data_type,
+                "embedding": embeddings.get(text_to_embed),
+                "is_primary_key": column.is_primary_key,
+                "is_foreign_key": column.is_foreign_key,
+                "is_nullable": column.is_nullable,
+                "references_table": column.references_table,
+                "references_column": column.references_column,
+                "extra_metadata": column_extra_metadata(column, text_to_embed, EMBEDDING_MODEL),
+            })
+    return table_rows, column_rows
+
+def load_database(service_url: str, schema, embeddings: dict):
+    """Loads one database into the catalog. Returns its timing row."""
+    start_time = time.time()
+    loader = CatalogLoader(service_url, schema["db_id"], TARGET_SCHEMA_NAME)
+    table_rows, column_rows = build_rows(schema, embeddings)
+    loader.ensure_schema()
+    loader.load_tables(table_rows)
+    loader.load_columns(column_rows)
+    relationships = loader.load_relationships([fk for table in schema["tables"] for fk in table.foreign_keys])
+    return {
+        "db_id": schema["db_id"],
+        "tables": len(table_rows),
+        "columns": len(column_rows),
+        "relationships": relationships,
+        "introspect_seconds": round(schema["seconds"], 3),
+        "load_seconds": round(time.time() - start_time, 3),
+    }
+
+
+# --- Main Script ---
+if __name__ == "__main__":
+    logging.info("Starting Spider catalog ingestion...")
+    start_time = time.time()
+
+    databases = discover_databases(SPIDER_DIR, TABLES_JSON_PATH)
+    if sys.argv[1:]:
+        databases = {db_id: path for db_id, path in databases.items() if db_id in sys.argv[1:]}
+    if not databases:
+        logging.error(f"No SQLite databases found under {SPIDER_DIR}")
+        sys.exit(1)
+    logging.info(f"Found {len(databases)} databases")
+
+    # Introspect every database in a process pool
+    schemas = introspect_databases(databases, INTROSPECTION_WORKERS)
+    logging.info(f"Introspected {len(schemas)} databases in {time.time() - start_time:.3f} seconds")
+
+    # Embed all unique texts through one batched embedder
+    try:
+        embedding_client = create_embedding_client(get_settings(), asynchronous=True) # Provider from EmbeddingSettings; retries and rate limits are handled by the embedding service
+    except (OpenAIError, ValueError) as e:
+        logging.error(f"Failed to initialize embeddings client: {e}")
+        sys.exit(1)
+    settings = get_settings()
+    embedding_cache = open_embedding_cache(settings.embedding_cache)
+    texts = collect_texts(schemas)
+    embed_start = time.time()
+    embeddings = dict(zip(texts, embed_texts_concurrently(
+        embedding_client,
+        texts,
+        EMBEDDING_MODEL,
+        cache=embedding_cache,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        max_batch_tokens=EMBEDDING_MAX_BATCH_TOKENS,
+        max_concurrency=settings.openai.embedding_max_concurrency,
+        requests_per_minute=settings.openai.embedding_requests_per_minute,
+        tokens_per_minute=settings.openai.embedding_tokens_per_minute,
+    )))
+    logging.info(f"Embedded {len(texts)} unique texts in {time.time() - embed_start:.3f} seconds")
+    if embedding_cache is not None:
+        logging.info(f"Embedding cache: {embedding_cache.stats}")
+
+    # Load the databases into Postgres
+    timings = []
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+        futures = {executor.submit(load_database, settings.database.service_url, schema, embeddings): schema["db_id"] for schema in schemas}
+        for future, db_id in futures.items():
+            try:
+                timings.append(future.result())
+            except Exception as e:
+                logging.error(f"Failed to load database {db_id}: {e}", exc_info=True)
+
+    if timings:
+        logging.info("Per-database timings:\n" + pd.DataFrame(timings).to_string(index=False))
+    logging.info(f"Ingested {len(timings)} of {len(databases)} databases in {time.time() - start_time:.3f} seconds")
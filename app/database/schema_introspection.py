@@ -0,0 +1,143 @@
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# One pass over the whole schema: every column of every table with its foreign key
+# references and whether a single-column unique index (or the primary key) covers it.
+SCHEMA_QUERY = """
+SELECT
+    m.name AS table_name,
+    m.sql AS table_sql,
+    c.cid,
+    c.name AS column_name,
+    c.type AS data_type,
+    c."notnull" AS not_null,
+    c.dflt_value AS default_value,
+    c.pk,
+    EXISTS (
+        SELECT 1 FROM pragma_index_list(m.name) il
+        JOIN pragma_index_info(il.name) ii
+        WHERE il."unique" AND ii.name = c.name
+          AND (SELECT COUNT(*) FROM pragma_index_info(il.name)) = 1
+    ) AS has_unique_index,
+    fk.id AS fk_id,
+    fk."table" AS references_table,
+    fk."to" AS references_column
+FROM sqlite_master m
+JOIN pragma_table_info(m.name) c
+LEFT JOIN pragma_foreign_key_list(m.name) fk ON fk."from" = c.name
+WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+ORDER BY m.name, c.cid, fk.id
+"""
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    """One column-to-column reference (composite keys produce one entry per column pair)."""
+
+    from_table: str
+    from_column: str
+    to_table: str
+    to_column: str
+    is_unique: bool = False # The referencing column is unique, so the relationship is one-to-one
+
+    @property
+    def relationship_type(self) -> str:
+        return "one_to_one" if self.is_unique else "many_to_one"
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    name: str
+    data_type: Optional[str]
+    is_primary_key: bool
+    is_nullable: bool
+    is_unique: bool
+    default_value: Optional[str] = None
+    references_table: Optional[str] = None
+    references_column: Optional[str] = None
+
+    @property
+    def is_foreign_key(self) -> bool:
+        return self.references_table is not None
+
+
+@dataclass
+class TableInfo:
+    name: str
+    sql: Optional[str]
+    columns: List[ColumnInfo] = field(default_factory=list)
+    foreign_keys: List[ForeignKey] = field(default_factory=list)
+
+    @property
+    def primary_keys(self) -> List[str]:
+        return [column.name for column in self.columns if column.is_primary_key]
+
+
+def read_schema(connection: sqlite3.Connection) -> List[TableInfo]:
+    """
+    Reads every table, column and foreign key of a SQLite database with SCHEMA_QUERY.
+
+    References without an explicit target column (``REFERENCES Owners``) resolve to the
+    primary key of the referenced table. Referenced names are matched case-insensitively,
+    like SQLite identifiers, and returned as declared in the referenced table
+    (``REFERENCES Student`` -> ``student``). References that still cannot be resolved
+    (missing table or column, or a bare reference to a table without a primary key) are
+    logged and skipped.
+
+    Returns:
+        list: TableInfo objects ordered by table name, columns in declaration order.
+    """
+    tables = {}
+    columns = {} # (table_name, cid) -> column attributes; a column may have several references
+    references = {} # (table_name, cid) -> [(to_table, to_column)]
+    for row in connection.execute(SCHEMA_QUERY):
+        table_name, table_sql, cid, column_name, data_type, not_null, default_value, pk, has_unique_index, fk_id, to_table, to_column = row
+        tables.setdefault(table_name, TableInfo(table_name, table_sql))
+        key = (table_name, cid)
+        if key not in columns:
+            columns[key] = (column_name, data_type or None, pk > 0, not not_null and pk == 0, bool(has_unique_index), default_value)
+            references[key] = []
+        if fk_id is not None:
+            references[key].append((to_table, to_column))
+
+    primary_keys = {}
+    table_names = {table_name.lower(): table_name for table_name in tables}
+    column_names = {} # (table_name, lower-case column name) -> column_name
+    for (table_name, _), (column_name, _, is_primary_key, _, _, _) in sorted(columns.items()):
+        column_names[(table_name, column_name.lower())] = column_name
+        if is_primary_key:
+            primary_keys.setdefault(table_name, []).append(column_name)
+
+    for (table_name, cid), (column_name, data_type, is_primary_key, is_nullable, is_unique, default_value) in sorted(columns.items()):
+        # A single-column primary key is unique even without an index (INTEGER PRIMARY KEY)
+        is_unique = is_unique or (is_primary_key and len(primary_keys[table_name]) == 1)
+        table = tables[table_name]
+        resolved = []
+        for declared_table, declared_column in references[(table_name, cid)]:
+            to_table = table_names.get(declared_table.lower())
+            if declared_column is None:
+                to_column = (primary_keys.get(to_table) or [None])[0]
+            else:
+                to_column = column_names.get((to_table, declared_column.lower()))
+            if to_column is None:
+                logging.warning(
+                    f"Skipped unresolved reference {table_name}.{column_name} -> {declared_table}"
+                    + (f"({declared_column})" if declared_column else "")
+                )
+                continue
+            resolved.append((to_table, to_column))
+            table.foreign_keys.append(ForeignKey(table_name, column_name, to_table, to_column, is_unique))
+        to_table, to_column = resolved[0] if resolved else (None, None)
+        table.columns.append(ColumnInfo(column_name, data_type, is_primary_key, is_nullable, is_unique, default_value, to_table, to_column))
+    return [tables[name] for name in sorted(tables)]
+
+
+def introspect_schema(db_path: str) -> List[TableInfo]:
+    """Reads the schema of a SQLite database file over one read-only connection (see read_schema)."""
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return read_schema(connection)
+    finally:
+        connection.close()
@@ -61,6 +61,33 @@ class SQLiteClient:
         except SQLAlchemyError as e:
             raise RuntimeError(f"Error executing query: {str(e)}")
     
+    def iter_query(self, query, params=None, batch_size=10000):
+        """
+        Execute a SQL query and yield the results as pandas DataFrames of at most batch_size rows
+        
+        Rows are fetched from the cursor one batch at a time, so the full result set is never
+        held in memory. The connection stays open until the generator is exhausted or closed.
+        
+        Args:
+            query (str): SQL query to execute
+            params (dict, optional): Parameters to bind to the query
+            batch_size (int): Maximum number of rows per yielded DataFrame
+            
+        Yields:
+            pd.DataFrame: The next batch of query results
+        """
+        if not self.engine:
+            raise ConnectionError("Database connection not established")
+            
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execution_options(stream_results=True).execute(text(query), params or {})
+                columns = list(result.keys())
+                for rows in result.partitions(batch_size):
+                    yield pd.DataFrame(rows, columns=columns)
+        except SQLAlchemyError as e:
+            raise RuntimeError(f"Error executing query: {str(e)}")
+    
     def close(self):
         """Close the database connection"""
         if self.engine:
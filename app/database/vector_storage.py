@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+STORAGE_MODES = ("vector", "halfvec", "binary")
+
+_OPCLASS = {"vector": "vector_cosine_ops", "halfvec": "halfvec_cosine_ops", "binary": "bit_hamming_ops"}
+_OPERATOR = {"vector": "<=>", "halfvec": "<=>", "binary": "<~>"}
+
+
+@dataclass(frozen=True)
+class VectorStorage:
+    """
+    How catalog embeddings are indexed and searched in Postgres.
+
+    The embedding columns keep the full-precision ``vector(full_dimensions)``; the HNSW
+    index is built over an expression that compresses it:
+
+    - ``vector``: the vector itself (or its first ``dimensions`` values, re-normalized).
+    - ``halfvec``: the same as half-precision floats (half the index size).
+    - ``binary``: one sign bit per dimension compared by Hamming distance (1/32 of the
+      size); candidates are re-ranked by exact cosine distance on the full vectors.
+
+    ``dimensions`` truncates to the leading values, which is what the text-embedding-3
+    ``dimensions`` parameter does, so stored vectors remain usable at every size.
+    Compressed modes fetch ``rerank_factor * k`` candidates from the index and re-rank
+    them with the full vectors.
+    Requires pgvector 0.7+ (halfvec, bit, subvector, l2_normalize, binary_quantize).
+    """
+
+    mode: str = "vector"
+    dimensions: Optional[int] = None
+    full_dimensions: int = 1536
+    rerank_factor: int = 4
+
+    def __post_init__(self):
+        if self.mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown vector storage mode '{self.mode}', expected one of {STORAGE_MODES}")
+        if self.dimensions is not None and not 0 < self.dimensions <= self.full_dimensions:
+            raise ValueError(f"dimensions must be between 1 and {self.full_dimensions}, got {self.dimensions}")
+
+    @classmethod
+    def from_settings(cls, vector_settings):
+        """Storage configured by VectorStoreSettings (catalog_storage, catalog_index_dimensions, ...)."""
+        return cls(
+            vector_settings.catalog_storage,
+            vector_settings.catalog_index_dimensions,
+            vector_settings.embedding_dimensions,
+            vector_settings.catalog_rerank_factor,
+        )
+
+    @property
+    def index_dimensions(self) -> int:
+        return self.dimensions or self.full_dimensions
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether index distances are exact cosine distances (no re-ranking needed)."""
+        return self.mode == "vector" and self.dimensions is None
+
+    @property
+    def bytes_per_vector(self) -> float:
+        """Size of one indexed vector (excluding the HNSW graph links)."""
+        return {"vector": 4, "halfvec": 2, "binary": 1 / 8}[self.mode] * self.index_dimensions
+
+    def expression(self, value_sql: str) -> str:
+        """SQL mapping a full-precision vector expression to the indexed representation."""
+        n = self.index_dimensions
+        if self.mode == "binary":
+            truncated = value_sql if self.dimensions is None else f"subvector({value_sql}, 1, {n})"
+            return f"(binary_quantize({truncated})::bit({n}))"
+        if self.dimensions is not None:
+            value_sql = f"l2_normalize(subvector({value_sql}, 1, {n}))"
+        if self.mode == "halfvec":
+            return f"({value_sql}::halfvec({n}))"
+        return value_sql if self.dimensions is None else f"({value_sql}::vector({n}))"
+
+    def index_name(self, table: str) -> str:
+        if self.is_exact:
+            return f"idx_{table}_embedding"
+        suffix = "" if self.dimensions is None else str(self.dimensions)
+        return f"idx_{table}_embedding_{self.mode}{suffix}"
+
+    def create_index_sql(self, table: str) -> str:
+        return (
+            f"CREATE INDEX IF NOT EXISTS {self.index_name(table)} ON {table} "
+            f"USING hnsw ({self.expression('embedding')} {_OPCLASS[self.mode]})"
+        )
+
+    def drop_index_sql(self, table: str) -> str:
+        return f"DROP INDEX IF EXISTS {self.index_name(table)}"
+
+    def search_sql(self, table: str, columns: Sequence[str]) -> str:
+        """
+        Nearest-neighbour query over ``table``.
+
+        Parameters (psycopg2 style): ``%(embedding)s`` (vector text, e.g. '[0.1,...]'),
+        ``%(k)s`` and, for compressed modes, ``%(candidates)s`` (see candidates()).
+        Returns ``columns`` plus the exact cosine ``distance``, nearest first.
+        """
+        column_list = ", ".join(columns)
+        query_vector = f"%(embedding)s::vector({self.full_dimensions})"
+        if self.is_exact:
+            return (
+                f"SELECT {column_list}, embedding <=> {query_vector} AS distance FROM {table} "
+                f"WHERE embedding IS NOT NULL ORDER BY embedding <=> {query_vector} LIMIT %(k)s"
+            )
+        return (
+            f"SELECT {column_list}, embedding <=> {query_vector} AS distance FROM ("
+            f"SELECT {column_list}, embedding FROM {table} WHERE embedding IS NOT NULL "
+            f"ORDER BY {self.expression('embedding')} {_OPERATOR[self.mode]} {self.expression(query_vector)} "
+            f"LIMIT %(candidates)s) candidates ORDER BY distance LIMIT %(k)s"
+        )
+
+    def candidates(self, k: int) -> int:
+        """Rows fetched from the compressed index for a top-k query."""
+        return k if self.is_exact else k * self.rerank_factor
+
+    # --- NumPy equivalents, used to measure recall offline ---
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """The indexed representation of row vectors, as the SQL expression computes it."""
+        vectors = np.asarray(vectors, dtype=np.float32)[:, :self.index_dimensions]
+        if self.mode == "binary":
+            return np.packbits(vectors > 0, axis=1)
+        if self.dimensions is not None:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors.astype(np.float16) if self.mode == "halfvec" else vectors
+
+    def search(self, query: np.ndarray, encoded: np.ndarray, full: np.ndarray, k: int) -> np.ndarray:
+        """
+        Exhaustive version of search_sql over NumPy arrays (no HNSW approximation).
+
+        Args:
+            query: Full-precision query vector.
+            encoded: encode(full).
+            full: Full-precision row vectors, used for re-ranking.
+            k: Number of rows returned.
+
+        Returns:
+            np.ndarray: Row positions of the k nearest rows, nearest first.
+        """
+        if len(full) == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        query = np.asarray(query, dtype=np.float32)
+        encoded_query = self.encode(query[None, :])[0]
+        if self.mode == "binary":
+            index_distance = np.unpackbits(encoded ^ encoded_query, axis=1).sum(axis=1)
+        else:
+            rows = encoded.astype(np.float32)
+            norms = np.linalg.norm(rows, axis=1) * np.linalg.norm(encoded_query.astype(np.float32))
+            index_distance = 1 - rows @ encoded_query.astype(np.float32) / np.where(norms == 0, 1, norms)
+        n_candidates = min(self.candidates(k), len(full))
+        candidates = np.argpartition(index_distance, n_candidates - 1)[:n_candidates]
+        if not self.is_exact:
+            # Re-rank with the full-precision vectors
+            rows = full[candidates]
+            norms = np.linalg.norm(rows, axis=1) * np.linalg.norm(query)
+            exact = 1 - rows @ query / np.where(norms == 0, 1, norms)
+            return candidates[np.argsort(exact, kind="stable")[:k]]
+        return candidates[np.argsort(index_distance[candidates], kind="stable")[:k]]
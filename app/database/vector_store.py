@@ -1,22 +1,56 @@
+import json
 import logging
 import time
-from typing import Any, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+import re
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 from config.settings import get_settings
-from openai import OpenAI
+from database.async_database import AsyncDatabase, AsyncVectorSearch
+from database.embedding_batches import embed_texts
+from database.embedding_cache import open_embedding_cache
+from database.embedding_providers import create_embedding_client, embedding_model
+from database.embedding_service import AsyncEmbeddingService
+from database.vector_storage import VectorStorage
 from timescale_vector import client
 
+# Numbered parameter of the Predicates / UUIDTimeRange conditions ($1, $2, ...)
+_DOLLAR_PARAMETER = re.compile(r"\$(\d+)")
+
+# Pyformat parameter, renamed per query in search_many
+_PARAMETER = re.compile(r"%\((\w+)\)s")
+
+
+@dataclass
+class UpsertProgress:
+    """Progress and throughput of a streaming upsert, updated after every chunk."""
+
+    chunks: int = 0
+    records: int = 0
+    skipped: int = 0
+    embedded: int = 0
+    embed_seconds: float = 0.0
+    insert_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
 
 class VectorStore:
     """A class for managing vector operations and database interactions."""
 
     def __init__(self):
-        """Initialize the VectorStore with settings, OpenAI client, and Timescale Vector client."""
+        """Initialize the VectorStore with settings, embeddings client, and Timescale Vector client."""
         self.settings = get_settings()
-        self.openai_client = OpenAI(api_key=self.settings.openai.api_key)
-        self.embedding_model = self.settings.openai.embedding_model
+        self.embedding_client = create_embedding_client(self.settings) # OpenAI or local, see EmbeddingSettings
+        self.embedding_model = embedding_model(self.settings)
         self.vector_settings = self.settings.vector_store
         self.vec_client = client.Sync(
             self.settings.database.service_url,
@@ -24,6 +58,9 @@ class VectorStore:
             self.vector_settings.embedding_dimensions,
             time_partition_interval=self.vector_settings.time_partition_interval,
         )
+        self.embedding_cache = open_embedding_cache(self.settings.embedding_cache)
+        self._embedding_service = None # Created on first async use, inside the running event loop
+        self._async_search = None # Pooled asyncpg access (AsyncVectorSearch), also created on first async use
 
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -36,9 +73,15 @@ class VectorStore:
             A list of floats representing the embedding.
         """
         text = text.replace("\n", " ")
+        if self.embedding_cache is not None:
+            embedding = self.embedding_cache.get(self.embedding_model, text)
+            if embedding is not None:
+                logging.info("Embedding served from cache")
+                return embedding
+
         start_time = time.time()
         embedding = (
-            self.openai_client.embeddings.create(
+            self.embedding_client.embeddings.create(
                 input=[text],
                 model=self.embedding_model,
             )
@@ -47,8 +90,83 @@ class VectorStore:
         )
         elapsed_time = time.time() - start_time
         logging.info(f"Embedding generated in {elapsed_time:.3f} seconds")
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(self.embedding_model, text, embedding)
         return embedding
 
+    async def aget_embedding(self, text: str) -> List[float]:
+        """
+        Async variant of get_embedding for concurrent callers.
+
+        Requests go through one AsyncEmbeddingService, so concurrent searches share the
+        rate limits and identical in-flight texts are embedded once.
+
+        Args:
+            text: The input text to generate an embedding for.
+
+        Returns:
+            A list of floats representing the embedding.
+        """
+        if self._embedding_service is None:
+            openai_settings = self.settings.openai
+            self._embedding_service = AsyncEmbeddingService(
+                create_embedding_client(self.settings, asynchronous=True),
+                self.embedding_model,
+                max_concurrency=openai_settings.embedding_max_concurrency,
+                requests_per_minute=openai_settings.embedding_requests_per_minute,
+                tokens_per_minute=openai_settings.embedding_tokens_per_minute,
+                cache=self.embedding_cache,
+            )
+        start_time = time.time()
+        embedding = await self._embedding_service.embed(text.replace("\n", " "))
+        logging.info(f"Embedding generated in {time.time() - start_time:.3f} seconds")
+        return embedding
+
+    @property
+    def async_search(self) -> AsyncVectorSearch:
+        """Hot similarity queries over the shared asyncpg pool (see DatabaseSettings for its size)."""
+        if self._async_search is None:
+            self._async_search = AsyncVectorSearch(
+                AsyncDatabase.from_settings(self.settings.database),
+                self.vector_settings.table_name,
+                VectorStorage.from_settings(self.vector_settings),
+            )
+        return self._async_search
+
+    async def asearch(
+        self,
+        query_text: str,
+        limit: int = 5,
+        metadata_filter: Optional[dict] = None,
+        return_dataframe: bool = True,
+    ) -> Union[List[Tuple[Any, ...]], pd.DataFrame]:
+        """
+        Async lean search for concurrent callers (e.g. request handlers).
+
+        The query is embedded through the shared AsyncEmbeddingService and searched over a
+        pooled connection with a prepared statement, so concurrent searches neither open
+        connections nor queue on a single one.
+
+        Args:
+            query_text: The input text to search for.
+            limit: The maximum number of results to return.
+            metadata_filter: A dictionary for equality-based metadata filtering.
+            return_dataframe: Whether to return results as a DataFrame (default: True).
+
+        Returns:
+            (id, content, distance, metadata) tuples, or their lean DataFrame.
+        """
+        query_embedding = await self.aget_embedding(query_text)
+        start_time = time.time()
+        results = [tuple(row) for row in await self.async_search.search(query_embedding, limit, metadata_filter)]
+        logging.info(f"Vector search completed in {time.time() - start_time:.3f} seconds")
+        return self._create_lean_dataframe(results) if return_dataframe else results
+
+    async def aclose(self) -> None:
+        """Close the async connection pool."""
+        if self._async_search is not None:
+            await self._async_search.database.close()
+
     def create_tables(self) -> None:
         """Create the necessary tablesin the database"""
         self.vec_client.create_tables()
@@ -61,20 +179,94 @@ class VectorStore:
         """Drop the StreamingDiskANN index in the database"""
         self.vec_client.drop_embedding_index()
 
-    def upsert(self, df: pd.DataFrame) -> None:
+    def upsert(self, df: pd.DataFrame, chunk_size: int = 1000) -> None:
         """
         Insert or update records in the database from a pandas DataFrame.
 
         Args:
             df: A pandas DataFrame containing the data to insert or update.
                 Expected columns: id, metadata, contents, embedding
+            chunk_size: Records written per insert (see upsert_stream).
         """
-        records = df.to_records(index=False)
-        self.vec_client.upsert(list(records))
+        progress = self.upsert_stream(df.itertuples(index=False, name=None), chunk_size=chunk_size)
         logging.info(
-            f"Inserted {len(df)} records into {self.vector_settings.table_name}"
+            f"Inserted {progress.records} records into {self.vector_settings.table_name}"
         )
 
+    def upsert_stream(
+        self,
+        records: Iterable[Union[tuple, dict]],
+        chunk_size: int = 500,
+        on_progress: Optional[Callable[[UpsertProgress], None]] = None,
+    ) -> UpsertProgress:
+        """
+        Insert or update records from an iterator, in chunks of ``chunk_size``.
+
+        Records without an embedding are embedded in batches (through the embedding cache).
+        The next chunk is read and embedded in a background thread while the current one is
+        inserted, so at most two chunks are held in memory. Records whose contents could
+        not be embedded are skipped and counted.
+
+        Args:
+            records: (id, metadata, contents, embedding) tuples or dicts with those keys;
+                the embedding may be None.
+            chunk_size: Records per insert.
+            on_progress: Called with the UpsertProgress after every inserted chunk.
+
+        Returns:
+            The final UpsertProgress.
+
+        Example:
+            rows = ((uuid_from_time(datetime.now()), {"category": c}, text, None) for c, text in read_faq())
+            progress = vector_store.upsert_stream(rows, chunk_size=200)
+        """
+        progress = UpsertProgress()
+        start_time = time.time()
+        records = iter(records)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Only the worker consumes ``records``, so a lazy source (file, cursor) is read while chunks are inserted
+            pending = executor.submit(self._prepare_chunk, records, chunk_size)
+            while True:
+                chunk, embedded, embed_seconds, skipped = pending.result()
+                if not chunk and not skipped:
+                    break
+                pending = executor.submit(self._prepare_chunk, records, chunk_size)
+
+                insert_start = time.time()
+                if chunk:
+                    self.vec_client.upsert(chunk)
+                progress.insert_seconds += time.time() - insert_start
+                progress.chunks += 1
+                progress.records += len(chunk)
+                progress.skipped += skipped
+                progress.embedded += embedded
+                progress.embed_seconds += embed_seconds
+                progress.elapsed_seconds = time.time() - start_time
+                logging.info(
+                    f"Upserted chunk {progress.chunks}: {progress.records} records "
+                    f"({progress.records_per_second:.1f} records/s, {progress.skipped} skipped)"
+                )
+                if on_progress is not None:
+                    on_progress(progress)
+        return progress
+
+    def _prepare_chunk(self, records: Iterable[Union[tuple, dict]], chunk_size: int) -> Tuple[List[tuple], int, float, int]:
+        """Reads the next chunk of ``records``, converts it to record tuples and embeds the missing embeddings."""
+        chunk = list(islice(records, chunk_size))
+        start_time = time.time()
+        rows = [
+            (record["id"], record["metadata"], record["contents"], record.get("embedding")) if isinstance(record, dict) else tuple(record)
+            for record in chunk
+        ]
+        missing = [position for position, row in enumerate(rows) if row[3] is None]
+        if missing:
+            texts = [(rows[position][2] or "").replace("\n", " ") for position in missing]
+            embeddings = embed_texts(self.embedding_client, texts, self.embedding_model, cache=self.embedding_cache)
+            for position, embedding in zip(missing, embeddings):
+                rows[position] = rows[position][:3] + (embedding,)
+        prepared = [row for row in rows if row[3] is not None]
+        return prepared, len(missing), time.time() - start_time, len(rows) - len(prepared)
+
     def search(
         self,
         query_text: str,
@@ -83,10 +275,17 @@ class VectorStore:
         predicates: Optional[client.Predicates] = None,
         time_range: Optional[Tuple[datetime, datetime]] = None,
         return_dataframe: bool = True,
+        lean: bool = False,
+        metadata_keys: Optional[Sequence[str]] = None,
     ) -> Union[List[Tuple[Any, ...]], pd.DataFrame]:
         """
         Query the vector database for similar embeddings based on input text.
 
+        Lean mode (``lean=True``) selects only id, contents, distance and metadata in SQL,
+        so hits carry no embedding. ``metadata_keys`` further restricts the metadata to
+        those keys (all keys if None, none if empty); results are then
+        (id, content, distance, metadata) tuples.
+
         More info:
             https://github.com/timescale/docs/blob/latest/ai/python-interface-for-pgvector-and-timescale-vector.md
 
@@ -101,6 +300,8 @@ class VectorStore:
                 - | is used to combine multiple predicates with OR operator.
             time_range: A tuple of (start_date, end_date) to filter results by time.
             return_dataframe: Whether to return results as a DataFrame (default: True).
+            lean: Whether to leave the embeddings out of the results (default: False).
+            metadata_keys: Metadata keys returned in lean mode (default: all).
 
         Returns:
             Either a list of tuples or a pandas DataFrame containing the search results.
@@ -110,6 +311,8 @@ class VectorStore:
                 vector_store.search("What are your shipping options?")
             Search with metadata filter:
                 vector_store.search("Shipping options", metadata_filter={"category": "Shipping"})
+            Lean search returning only the category metadata:
+                vector_store.search("Shipping options", lean=True, metadata_keys=["category"])
         
         Predicates Examples:
             Search with predicates:
@@ -127,6 +330,105 @@ class VectorStore:
 
         start_time = time.time()
 
+        search_args = self._search_args(limit, metadata_filter, predicates, time_range)
+        if lean:
+            results = self._lean_search(query_embedding, metadata_keys, **search_args)
+        else:
+            results = self.vec_client.search(query_embedding, **search_args)
+        elapsed_time = time.time() - start_time
+
+        logging.info(f"Vector search completed in {elapsed_time:.3f} seconds")
+
+        if return_dataframe:
+            if lean:
+                return self._create_lean_dataframe(results)
+            return self._create_dataframe_from_results(results)
+        else:
+            return results
+
+    def search_many(
+        self,
+        queries: Sequence[Union[str, dict]],
+        limit: int = 5,
+        metadata_filter: Union[dict, List[dict]] = None,
+        predicates: Optional[client.Predicates] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+        return_dataframe: bool = True,
+        lean: bool = False,
+        metadata_keys: Optional[Sequence[str]] = None,
+    ) -> List[Union[List[Tuple[Any, ...]], pd.DataFrame]]:
+        """
+        Run several similarity searches with one embeddings request and one database round trip.
+
+        All query texts are embedded together (through the embedding cache), and the
+        searches are sent as a single UNION ALL statement over one pooled connection.
+
+        Args:
+            queries: Query texts, or dicts with a "query_text" key and any of "limit",
+                "metadata_filter", "predicates" and "time_range" overriding the shared arguments.
+            limit, metadata_filter, predicates, time_range, return_dataframe, lean, metadata_keys:
+                As in search, shared by all queries.
+
+        Returns:
+            One result per query, in query order (DataFrame or list of tuples as in search).
+
+        Raises:
+            RuntimeError: If a query text could not be embedded.
+
+        Example:
+            tables, columns = vector_store.search_many(
+                [{"query_text": question, "metadata_filter": {"kind": "table"}},
+                 {"query_text": question, "metadata_filter": {"kind": "column"}, "limit": 10}],
+                lean=True,
+            )
+        """
+        specs = [{"query_text": query} if isinstance(query, str) else dict(query) for query in queries]
+        if not specs:
+            return []
+        texts = [spec["query_text"].replace("\n", " ") for spec in specs]
+        start_time = time.time()
+        embeddings = embed_texts(self.embedding_client, texts, self.embedding_model, cache=self.embedding_cache)
+        for text, embedding in zip(texts, embeddings):
+            if embedding is None:
+                raise RuntimeError(f"Failed to embed search query: {text!r}")
+        logging.info(f"Embedded {len(texts)} search queries in {time.time() - start_time:.3f} seconds")
+
+        start_time = time.time()
+        parts, params = [], {}
+        for number, (spec, embedding) in enumerate(zip(specs, embeddings)):
+            search_args = self._search_args(
+                spec.get("limit", limit),
+                spec.get("metadata_filter", metadata_filter),
+                spec.get("predicates", predicates),
+                spec.get("time_range", time_range),
+            )
+            query, query_params = self._search_query(embedding, lean, metadata_keys, **search_args)
+            # Give every query its own parameter names
+            query = _PARAMETER.sub(lambda match: f"%(q{number}_{match.group(1)})s", query)
+            parts.append(f"(SELECT {number} AS query_index, hits.* FROM ({query}) hits)")
+            params.update({f"q{number}_{name}": value for name, value in query_params.items()})
+        with self.vec_client.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(" UNION ALL ".join(parts) + " ORDER BY query_index, distance", params)
+                rows = cur.fetchall()
+        logging.info(f"{len(specs)} vector searches completed in {time.time() - start_time:.3f} seconds")
+
+        results = [[] for _ in specs]
+        for row in rows:
+            results[row[0]].append(tuple(row[1:]))
+        if not return_dataframe:
+            return results
+        create_dataframe = self._create_lean_dataframe if lean else self._create_dataframe_from_results
+        return [create_dataframe(result) for result in results]
+
+    def _search_args(
+        self,
+        limit: int,
+        metadata_filter: Union[dict, List[dict]] = None,
+        predicates: Optional[client.Predicates] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+    ) -> dict:
+        """Keyword arguments of vec_client.search for the search filters."""
         search_args = {
             "limit": limit,
         }
@@ -141,15 +443,87 @@ class VectorStore:
             start_date, end_date = time_range
             search_args["uuid_time_filter"] = client.UUIDTimeRange(start_date, end_date)
 
-        results = self.vec_client.search(query_embedding, **search_args)
-        elapsed_time = time.time() - start_time
+        return search_args
 
-        logging.info(f"Vector search completed in {elapsed_time:.3f} seconds")
+    def _lean_search(self, query_embedding: List[float], metadata_keys: Optional[Sequence[str]], **search_args) -> List[Tuple[Any, ...]]:
+        """Runs the search query with a projection without the embedding."""
+        query, params = self._search_query(query_embedding, True, metadata_keys, **search_args)
+        with self.vec_client.connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return [tuple(row) for row in cur.fetchall()]
 
-        if return_dataframe:
-            return self._create_dataframe_from_results(results)
+    def _search_query(
+        self,
+        query_embedding: List[float],
+        lean: bool,
+        metadata_keys: Optional[Sequence[str]],
+        limit: int,
+        filter: Union[dict, List[dict]] = None,
+        predicates: Optional[client.Predicates] = None,
+        uuid_time_filter: Optional[client.UUIDTimeRange] = None,
+    ) -> Tuple[str, dict]:
+        """
+        Builds the similarity search query (cosine distance) and its pyformat parameters.
+
+        The query has the same filters as vec_client.search: metadata containment for
+        ``filter``, and the conditions Predicates and UUIDTimeRange build themselves. The
+        client's inference of a time range from __start_date/__end_date filter keys is not
+        applied (pass ``time_range``). Lean queries project id, contents, distance and
+        (selected) metadata instead of whole rows.
+        """
+        params = [np.array(query_embedding)]
+        conditions = []
+        if isinstance(filter, dict):
+            conditions.append(f"metadata @> ${len(params) + 1}")
+            params.append(json.dumps(filter))
+        elif filter:
+            conditions.append(f"metadata @> ANY(${len(params) + 1}::jsonb[])")
+            params.append([json.dumps(item) for item in filter])
+        if predicates is not None and predicates.clauses:
+            condition, params = predicates.build_query(params)
+            conditions.append(condition)
+        if uuid_time_filter is not None:
+            condition, params = uuid_time_filter.build_query(params)
+            conditions.append(condition)
+        where = " AND ".join(f"({condition})" for condition in conditions) or "TRUE"
+
+        if not lean:
+            projection = "id, metadata, contents, embedding, embedding <=> $1 AS distance"
         else:
-            return results
+            if metadata_keys is None:
+                metadata = "metadata"
+            else:
+                # Keys are bound as parameters; jsonb_build_object keeps absent keys as JSON null
+                metadata = "jsonb_build_object({})".format(", ".join(
+                    f"%(metadata_key_{number})s::text, metadata->%(metadata_key_{number})s::text"
+                    for number in range(len(metadata_keys))
+                ))
+            projection = f"id, contents, embedding <=> $1 AS distance, {metadata} AS metadata"
+        query = (
+            f'SELECT {projection} FROM "{self.vector_settings.table_name}" '
+            f"WHERE {where} ORDER BY embedding <=> $1 LIMIT {int(limit)}"
+        )
+        query = _DOLLAR_PARAMETER.sub(lambda match: f"%({match.group(1)})s", query)
+        named = {str(number): value for number, value in enumerate(params, start=1)}
+        named.update({f"metadata_key_{number}": key for number, key in enumerate(metadata_keys or ())})
+        return query, named
+
+    def _create_lean_dataframe(self, results: List[Tuple[Any, ...]]) -> pd.DataFrame:
+        """
+        Create a pandas DataFrame from lean search results (id, content, distance, metadata).
+
+        Metadata keys become columns through one vectorized json_normalize call.
+        """
+        ids, contents, distances, metadata = zip(*results) if results else ((), (), (), ())
+        df = pd.DataFrame(
+            {
+                "id": [str(id) for id in ids],
+                "content": list(contents),
+                "distance": np.asarray(distances, dtype=np.float64),
+            }
+        )
+        return pd.concat([df, pd.json_normalize(list(metadata), max_level=0)], axis=1)
 
     def _create_dataframe_from_results(
         self,
@@ -169,9 +543,9 @@ class VectorStore:
             results, columns=["id", "metadata", "content", "embedding", "distance"]
         )
 
-        # Expand metadata column
+        # Expand metadata column (one json_normalize call instead of a Series per row)
         df = pd.concat(
-            [df.drop(["metadata"], axis=1), df["metadata"].apply(pd.Series)], axis=1
+            [df.drop(["metadata"], axis=1), pd.json_normalize(df["metadata"].tolist(), max_level=0)], axis=1
         )
 
         # Convert id to string for better readability
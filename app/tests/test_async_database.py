@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+import database.async_database as async_database
+from database.async_database import AsyncDatabase, AsyncVectorSearch, positional_sql
+from database.vector_storage import VectorStorage
+
+class _Connection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetch(self, sql, *args):
+        self.pool.executed.append((sql, args))
+        await asyncio.sleep(0.01)
+        if 'fail' in sql:
+            raise RuntimeError('query failed')
+        return [{'id': 1, 'distance': 0.5}]
+
+class _Pool:
+    """Stand-in for an asyncpg pool with ``size`` connections."""
+
+    def __init__(self, size):
+        self.executed, self.size = [], size
+        self.semaphore = asyncio.Semaphore(size)
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self.semaphore:
+            yield _Connection(self)
+
+    def get_size(self):
+        return self.size
+
+    def get_idle_size(self):
+        return self.semaphore._value
+
+    async def close(self):
+        pass
+
+def test_positional_sql():
+    sql = VectorStorage('binary').search_sql('db_columns', ['id'])
+    converted = positional_sql(sql, ('embedding', 'k', 'candidates'))
+    assert '%(' not in converted and converted.count('$1::vector(1536)') == 2
+    assert converted.endswith('LIMIT $3) candidates ORDER BY distance LIMIT $2')
+
+def test_concurrent_first_use_opens_one_pool(monkeypatch):
+    pools = []
+
+    async def create_pool(service_url, **options):
+        await asyncio.sleep(0.01)
+        pools.append(_Pool(options['max_size']))
+        return pools[-1]
+
+    monkeypatch.setattr(async_database.asyncpg, 'create_pool', create_pool)
+
+    async def scenario():
+        database = AsyncDatabase('postgres://unused', max_size=4)
+        await asyncio.gather(*(database.fetch('SELECT 1') for _ in range(16)))
+        await database.close()
+        return database
+
+    database = asyncio.run(scenario())
+    assert len(pools) == 1 and len(pools[0].executed) == 16
+    assert database._pool is None and database.counters['queries'] == 16
+
+def test_pool_metrics_and_hot_queries():
+    async def scenario():
+        database = AsyncDatabase('postgres://unused', max_size=2)
+        database._pool = _Pool(2)
+        search = AsyncVectorSearch(database, catalog_storage=VectorStorage('halfvec'))
+        await asyncio.gather(*(search.search([0.1, 0.2], 3) for _ in range(6)))
+        await search.search([0.1, 0.2], 3, {'category': 'Shipping'})
+        await search.search_catalog('db_tables', [0.1, 0.2], k=5, columns=('id', 'table_name'))
+        with pytest.raises(RuntimeError):
+            await database.fetch('SELECT fail')
+        return database, database._pool.executed
+
+    database, executed = asyncio.run(scenario())
+    assert len({sql for sql, _ in executed[:6]}) == 1 and executed[0][1] == ([0.1, 0.2], 3)
+    assert 'WHERE metadata @> $3' in executed[6][0] and executed[6][1][2] == {'category': 'Shipping'}
+    assert executed[7][1] == ([0.1, 0.2], 5, 20) and '($1::vector(1536)::halfvec(1536))' in executed[7][0]
+    metrics = database.metrics()
+    assert (metrics['queries'], metrics['acquisitions'], metrics['errors']) == (9, 9, 1)
+    # Six concurrent searches on two connections: later ones wait for a connection
+    assert metrics['acquire_p99_ms'] >= 10 and metrics['query_p50_ms'] >= 10
+    assert (metrics['size'], metrics['idle'], metrics['max_size']) == (2, 2, 2)
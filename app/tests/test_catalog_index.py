@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from database.catalog_index import VectorIndex
+from database.vector_storage import VectorStorage
+
+def _catalog(rows, dimensions=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dimensions))
+    vectors = (centers[rng.integers(0, 20, rows)] + 0.5 * rng.standard_normal((rows, dimensions))).astype(np.float32)
+    return [f'id-{i}' for i in range(rows)], [f'db.table_{i}' for i in range(rows)], vectors
+
+def test_exact_index_agrees_with_pgvector_cosine_search():
+    ids, names, vectors = _catalog(500)
+    index = VectorIndex(ids, names, vectors)
+    storage = VectorStorage(full_dimensions=64)  # NumPy model of the exact pgvector query
+    for query in vectors[:10] * 3:
+        hits = index.search(query, k=5)
+        expected = storage.search(query, storage.encode(vectors), vectors, 5)
+        assert [hit.id for hit in hits] == [ids[i] for i in expected]
+        rows = vectors[expected]
+        cosine = 1 - rows @ query / (np.linalg.norm(rows, axis=1) * np.linalg.norm(query))
+        assert [hit.distance for hit in hits] == pytest.approx(cosine.tolist(), abs=1e-5)
+    assert index.search(vectors[0], k=1)[0] == ('id-0', 'db.table_0', pytest.approx(0.0, abs=1e-5))
+    assert index.search(vectors[0], k=1000)[-1].distance >= index.search(vectors[0], k=1000)[0].distance
+    assert VectorIndex([], [], np.zeros((0, 0))).search(vectors[0]) == []
+
+def test_hnsw_index_for_large_catalogs():
+    pytest.importorskip('hnswlib')
+    ids, names, vectors = _catalog(3000)
+    exact, approximate = VectorIndex(ids, names, vectors), VectorIndex(ids, names, vectors, exact_limit=1000)
+    assert exact.graph is None and approximate.graph is not None
+    queries = vectors[:50] + 0.1
+    recall = np.mean([
+        len({hit.id for hit in exact.search(query, 10)} & {hit.id for hit in approximate.search(query, 10)}) / 10
+        for query in queries
+    ])
+    assert recall >= 0.95
+    # Distances of HNSW hits are the exact cosine distances
+    hit = approximate.search(queries[0], 1)[0]
+    assert hit.distance == pytest.approx(exact.search(queries[0], 1)[0].distance, abs=1e-5)
+
+def test_search_scoped_to_one_database():
+    ids, names, vectors = _catalog(300)
+    databases = ['school' if i % 3 == 0 else 'flights' for i in range(300)]
+    index = VectorIndex(ids, names, vectors, exact_limit=100, databases=databases)
+    hits = index.search(vectors[1], k=5, database='school')
+    school = [i for i in range(300) if databases[i] == 'school']
+    expected = VectorIndex([ids[i] for i in school], [names[i] for i in school], vectors[school]).search(vectors[1], k=5)
+    assert hits == expected and all(int(hit.id.split('-')[1]) % 3 == 0 for hit in hits)
+    assert index.search(vectors[1], k=5, database='missing') == []
+    with pytest.raises(KeyError):
+        VectorIndex(ids, names, vectors).search(vectors[1], database='school')
@@ -0,0 +1,30 @@
+import json
+import sqlite3
+
+from database.catalog_ingest import discover_databases, introspect_databases
+
+def _create(path, statements):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript(';'.join(statements))
+    connection.close()
+
+def test_discover_and_introspect_databases(tmp_path):
+    _create(tmp_path / 'database' / 'pets_1' / 'pets_1.sqlite', [
+        'CREATE TABLE Owners (owner_id INTEGER PRIMARY KEY, name VARCHAR(80) NOT NULL)',
+        'CREATE TABLE Pets (pet_id INTEGER, owner_id INTEGER REFERENCES Owners(owner_id), nickname TEXT, PRIMARY KEY (pet_id))',
+    ])
+    _create(tmp_path / 'sqlite' / 'concert_singer.sqlite', ['CREATE TABLE singer (singer_id INT, name TEXT)'])
+    _create(tmp_path / 'sqlite' / 'unlisted.sqlite', ['CREATE TABLE t (a INT)'])
+    (tmp_path / 'tables.json').write_text(json.dumps([{'db_id': 'pets_1'}, {'db_id': 'concert_singer'}, {'db_id': 'missing'}]))
+
+    databases = discover_databases(str(tmp_path), str(tmp_path / 'tables.json'))
+    assert list(databases) == ['concert_singer', 'pets_1']
+    assert len(discover_databases(str(tmp_path))) == 3
+
+    schemas = introspect_databases(databases, workers=2)
+    assert [schema['db_id'] for schema in schemas] == ['concert_singer', 'pets_1']
+    owners, pets = schemas[1]['tables']
+    assert [column.name for column in pets.columns] == ['pet_id', 'owner_id', 'nickname']
+    assert owners.primary_keys == ['owner_id']
+    assert [(fk.from_column, fk.to_table, fk.to_column) for fk in pets.foreign_keys] == [('owner_id', 'Owners', 'owner_id')]
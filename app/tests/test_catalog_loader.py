@@ -0,0 +1,64 @@
+import json
+import struct
+import uuid
+
+import numpy as np
+from database.catalog_loader import COPY_HEADER, COPY_TRAILER, TABLE_UPDATE_COLUMNS, _ChunkReader, encode_copy_rows, merge_assignments
+
+def _decode(data, columns):
+    """Parses binary COPY data back into lists of raw field bytes."""
+    assert data.startswith(COPY_HEADER) and data.endswith(COPY_TRAILER)
+    offset, rows = len(COPY_HEADER), []
+    while True:
+        (field_count,) = struct.unpack_from('>h', data, offset)
+        offset += 2
+        if field_count == -1:
+            return rows
+        assert field_count == len(columns)
+        fields = []
+        for _ in range(field_count):
+            (length,) = struct.unpack_from('>i', data, offset)
+            offset += 4
+            fields.append(None if length == -1 else data[offset:offset + length])
+            offset += max(length, 0)
+        rows.append(fields)
+
+def test_encode_copy_rows_binary_format():
+    columns = ('id', 'column_name', 'embedding', 'is_nullable', 'references_table', 'extra_metadata')
+    row_id = uuid.uuid4()
+    rows = [
+        {'id': row_id, 'column_name': 'étudiant', 'embedding': [0.5, -1.25], 'is_nullable': False,
+         'references_table': None, 'extra_metadata': {'content_hash': 'abc'}},
+        {'id': row_id, 'column_name': 'x', 'embedding': None, 'is_nullable': True, 'references_table': 'T', 'extra_metadata': {}},
+    ]
+    decoded = _decode(b''.join(encode_copy_rows(rows, columns)), columns)
+
+    assert len(decoded) == 2
+    first = decoded[0]
+    assert uuid.UUID(bytes=first[0]) == row_id
+    assert first[1].decode('utf-8') == 'étudiant'
+    assert struct.unpack_from('>HH', first[2]) == (2, 0)
+    assert np.frombuffer(first[2][4:], dtype='>f4').tolist() == [0.5, -1.25]
+    assert first[3] == b'\x00' and first[4] is None
+    assert json.loads(first[5]) == {'content_hash': 'abc'}
+    assert decoded[1][2] is None and decoded[1][3] == b'\x01' and decoded[1][4] == b'T'
+
+def test_chunk_reader_returns_stream_in_pieces():
+    reader = _ChunkReader([b'abcdef', b'', b'gh'])
+    pieces = []
+    while True:
+        piece = reader.read(4)
+        if not piece:
+            break
+        assert len(piece) <= 4
+        pieces.append(piece)
+    assert b''.join(pieces) == b'abcdefgh'
+    assert _ChunkReader([b'ab', b'cd']).read() == b'abcd'
+
+def test_merge_keeps_stored_descriptions_and_embeddings():
+    assert merge_assignments('db_tables', TABLE_UPDATE_COLUMNS) == [
+        "description = COALESCE(NULLIF(EXCLUDED.description, ''), db_tables.description)",
+        'extra_metadata = EXCLUDED.extra_metadata',
+        'embedding = COALESCE(EXCLUDED.embedding, db_tables.embedding)',
+        'updated_at = NOW()',
+    ]
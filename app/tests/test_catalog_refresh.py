@@ -0,0 +1,55 @@
+import sqlite3
+
+from database.catalog_refresh import CONTENT_HASH_KEY, column_extra_metadata, content_hash, plan_refresh
+from database.schema_introspection import introspect_schema
+
+def _metadata(definition, text, model='text-embedding-3-small'):
+    return {'column_definition': definition, CONTENT_HASH_KEY: content_hash(text, model)}
+
+def test_content_hash_depends_on_text_and_model():
+    assert content_hash('Column Name: id', 'text-embedding-3-small') == content_hash('Column Name: id', 'text-embedding-3-small')
+    assert content_hash('Column Name: id', 'text-embedding-3-small') != content_hash('Column Name: id', 'text-embedding-3-large')
+    assert content_hash('Column Name: id', 'text-embedding-3-small') != content_hash('Column Name: ids', 'text-embedding-3-small')
+
+def test_plan_refresh_only_touches_the_diff():
+    existing = {
+        ('Students', 'student_id'): _metadata('student_id INTEGER', 'Column Name: student_id'),
+        ('Students', 'first_name'): _metadata('first_name VARCHAR(80)', 'Column Name: first_name'),
+        ('Students', 'nickname'): _metadata('nickname VARCHAR(80)', 'Column Name: nickname'),
+        ('Courses', 'course_name'): _metadata('course_name VARCHAR(120)', 'Column Name: course_name', 'text-embedding-ada-002'),
+    }
+    current = {
+        ('Students', 'student_id'): _metadata('student_id INTEGER', 'Column Name: student_id'),
+        ('Students', 'first_name'): _metadata('first_name VARCHAR(255)', 'Column Name: first_name'),
+        ('Courses', 'course_name'): _metadata('course_name VARCHAR(120)', 'Column Name: course_name'),
+        ('Courses', 'course_id'): _metadata('course_id INTEGER', 'Column Name: course_id'),
+    }
+
+    embed, update, delete = plan_refresh(current, existing)
+    assert embed == [('Courses', 'course_name'), ('Courses', 'course_id')]
+    assert update == [('Students', 'first_name')]
+    assert delete == [('Students', 'nickname')]
+
+def _schema_metadata(path, script, model='text-embedding-3-small'):
+    connection = sqlite3.connect(path)
+    connection.executescript(script)
+    connection.close()
+    return {
+        (table.name, column.name): column_extra_metadata(column, f'Column Name: {column.name}', model)
+        for table in introspect_schema(str(path))
+        for column in table.columns
+    }
+
+def test_plan_refresh_updates_columns_whose_definition_changed(tmp_path):
+    existing = _schema_metadata(tmp_path / 'old.sqlite', 'CREATE TABLE s (id INTEGER PRIMARY KEY); CREATE TABLE t (name TEXT, age TEXT);')
+    current = _schema_metadata(
+        tmp_path / 'new.sqlite',
+        'CREATE TABLE s (id INTEGER PRIMARY KEY); CREATE TABLE t (name TEXT, age INTEGER NOT NULL REFERENCES s(id));',
+    )
+
+    embed, update, delete = plan_refresh(current, existing)
+    assert (embed, update, delete) == ([], [('t', 'age')], [])
+    assert current[('t', 'age')] == {
+        'data_type': 'INTEGER', 'is_nullable': False, 'is_primary_key': False, 'is_unique': False, 'default_value': None,
+        'references_table': 's', 'references_column': 'id', CONTENT_HASH_KEY: existing[('t', 'age')][CONTENT_HASH_KEY],
+    }
@@ -0,0 +1,54 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from openai import OpenAI
+from database.embedding_batches import embed_texts, make_batches
+
+class _EmbeddingHandler(BaseHTTPRequestHandler):
+    """Stand-in for the OpenAI embeddings endpoint: embeds each text as [len(text), 1.0] and returns them shuffled."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body['input'])
+        data = []
+        for index, text in reversed(list(enumerate(body['input']))):
+            vector = np.array([len(text), 1.0], dtype=np.float32)
+            if body.get('encoding_format') == 'base64':
+                embedding = base64.b64encode(vector.tobytes()).decode()
+            else:
+                embedding = vector.tolist()
+            data.append({'object': 'embedding', 'index': index, 'embedding': embedding})
+        payload = json.dumps({'object': 'list', 'data': data, 'model': body['model'],
+                              'usage': {'prompt_tokens': 0, 'total_tokens': 0}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def test_make_batches_respects_size_and_token_limits():
+    assert make_batches([1, 1, 1, 1, 1], batch_size=2, max_batch_tokens=100) == [[0, 1], [2, 3], [4]]
+    assert make_batches([5, 5, 20, 1], batch_size=10, max_batch_tokens=10) == [[0, 1], [2], [3]]
+
+def test_embed_texts_batches_requests_and_keeps_order():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _EmbeddingHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = OpenAI(api_key='test', base_url=f'http://127.0.0.1:{server.server_address[1]}/v1', max_retries=0)
+        texts = [f"Column Name: {'x' * length}" for length in range(10)] + ['']
+        embeddings = embed_texts(client, texts, 'text-embedding-3-small', batch_size=4)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [len(batch) for batch in server.requests] == [4, 4, 2]
+    assert embeddings[-1] is None
+    assert [embedding[0] for embedding in embeddings[:-1]] == [len(text) for text in texts[:-1]]
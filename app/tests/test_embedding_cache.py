@@ -0,0 +1,75 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+from openai import OpenAI
+from database.embedding_batches import embed_texts
+from database.embedding_cache import EmbeddingCache
+from test_embedding_batches import _EmbeddingHandler
+
+MODEL = 'text-embedding-3-small'
+
+def test_cache_counts_hits_and_normalizes_text(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'embeddings.sqlite'))
+    assert cache.get(MODEL, 'Column Name: city') is None
+    cache.put(MODEL, 'Column Name: city', [0.5, 1.0])
+
+    assert cache.get(MODEL, '  Column Name:\ncity ') == [0.5, 1.0]
+    assert cache.get('text-embedding-3-large', 'Column Name: city') is None
+    stats = cache.stats
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 2, 1, 8)
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path / 'embeddings.sqlite'))
+    assert reopened.get(MODEL, 'Column Name: city') == [0.5, 1.0]
+    reopened.close()
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'embeddings.sqlite'), max_entries=2)
+    cache.put(MODEL, 'a', [1.0])
+    cache.put(MODEL, 'b', [2.0])
+    cache.get(MODEL, 'a')
+    cache.put(MODEL, 'c', [3.0])
+    assert cache.get_many(MODEL, ['a', 'b', 'c']) == [[1.0], None, [3.0]]
+
+    cache.max_entries, cache.max_bytes = None, 8
+    cache.put(MODEL, 'd', [4.0, 4.0])
+    assert cache.get_many(MODEL, ['a', 'c', 'd']) == [None, None, [4.0, 4.0]]
+    cache.close()
+
+def test_embed_texts_only_sends_cache_misses(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _EmbeddingHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    cache = EmbeddingCache(str(tmp_path / 'embeddings.sqlite'))
+    try:
+        client = OpenAI(api_key='test', base_url=f'http://127.0.0.1:{server.server_address[1]}/v1', max_retries=0)
+        first = embed_texts(client, ['Column Name: a', 'Column Name: bb'], MODEL, cache=cache)
+        second = embed_texts(client, ['Column Name: bb', 'Column Name: ccc', 'Column Name: a'], MODEL, cache=cache)
+    finally:
+        server.shutdown()
+        server.server_close()
+        cache.close()
+
+    assert server.requests == [['Column Name: a', 'Column Name: bb'], ['Column Name: ccc']]
+    assert second == [first[1], [16.0, 1.0], first[0]]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+def test_cache_totals_follow_inserts_replacements_and_evictions(tmp_path):
+    path = str(tmp_path / 'embeddings.sqlite')
+    cache = EmbeddingCache(path, max_entries=3)
+    cache.put_many(MODEL, ['a', 'b'], [[1.0], [2.0, 2.0]])
+    cache.put(MODEL, 'a', [1.0, 1.0, 1.0])
+    cache.put_many(MODEL, ['c', 'd'], [[3.0], [4.0]])
+    assert (cache.stats['entries'], cache.stats['bytes']) == (3, 20)
+    assert cache.get_many(MODEL, ['a', 'b']) == [[1.0, 1.0, 1.0], None]
+
+    # Caches written before the totals table existed are counted once on open
+    cache._connection.execute('DROP TABLE embedding_totals')
+    cache._connection.commit()
+    cache.close()
+    reopened = EmbeddingCache(path)
+    assert (reopened.stats['entries'], reopened.stats['bytes']) == (3, 20)
+    reopened.clear()
+    assert (reopened.stats['entries'], reopened.stats['bytes']) == (0, 0)
+    reopened.close()
@@ -0,0 +1,42 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from config.settings import Settings
+from database.embedding_batches import embed_texts
+from database.embedding_providers import (
+    AsyncLocalEmbeddingClient, LocalEmbeddingClient, create_embedding_client, embedding_model, hashing_embedding,
+)
+from database.embedding_service import AsyncEmbeddingService
+
+def test_hashing_embedding_is_deterministic_and_similarity_preserving():
+    first, again = hashing_embedding('Column Name: student_id', 1536), hashing_embedding('Column Name: student_id', 1536)
+    assert first == again and len(first) == 1536
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+    related = np.dot(first, hashing_embedding('Column Name: student_name', 1536))
+    unrelated = np.dot(first, hashing_embedding('Column Name: flight_price', 1536))
+    assert related > unrelated
+    assert np.linalg.norm(hashing_embedding('', 256)) == pytest.approx(1.0)
+
+def test_local_clients_match_openai_response_shape():
+    client = LocalEmbeddingClient(dimensions=64)
+    texts = ['Column Name: a', '', 'Column Name: bb', 'Column Name: a']
+    embeddings = embed_texts(client, texts, 'local-hashing-64', batch_size=2)
+    assert embeddings[1] is None and embeddings[0] == embeddings[3] == hashing_embedding('Column Name: a', 64)
+
+    service = AsyncEmbeddingService(AsyncLocalEmbeddingClient(dimensions=64, latency=0.01), 'local-hashing-64', batch_size=1)
+    assert asyncio.run(service.embed_many(texts)) == embeddings
+    assert service.stats['requests'] == 2
+
+def test_provider_selected_by_settings():
+    settings = Settings()
+    settings.embedding.provider = 'local'
+    assert isinstance(create_embedding_client(settings), LocalEmbeddingClient)
+    assert isinstance(create_embedding_client(settings, asynchronous=True), AsyncLocalEmbeddingClient)
+    assert embedding_model(settings) == 'local-hashing-1536'
+    settings.embedding.provider = 'openai'
+    assert embedding_model(settings) == 'text-embedding-3-small'
+    settings.embedding.provider = 'cohere'
+    with pytest.raises(ValueError):
+        create_embedding_client(settings)
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+from openai import AsyncOpenAI
+from database.embedding_cache import EmbeddingCache
+from database.embedding_providers import AsyncLocalEmbeddingClient, hashing_embedding
+from database.embedding_service import AsyncEmbeddingService, TokenBucket
+from test_embedding_batches import _EmbeddingHandler
+
+MODEL = 'text-embedding-3-small'
+
+class _RateLimitedHandler(_EmbeddingHandler):
+    """Answers the first ``server.rate_limited`` requests with a 429."""
+
+    def do_POST(self):
+        with self.server.lock:
+            limited = self.server.rate_limited > 0
+            self.server.rate_limited -= limited
+        if not limited:
+            return super().do_POST()
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append(None)
+        payload = b'{"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}'
+        self.send_response(429)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def _run_with_server(rate_limited, scenario):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RateLimitedHandler)
+    server.requests, server.rate_limited, server.lock = [], rate_limited, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = AsyncOpenAI(api_key='test', base_url=f'http://127.0.0.1:{server.server_address[1]}/v1', max_retries=0)
+        return asyncio.run(scenario(client)), server.requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_service_coalesces_identical_in_flight_texts():
+    async def scenario(client):
+        service = AsyncEmbeddingService(client, MODEL, batch_size=2)
+        results = await asyncio.gather(
+            service.embed('Column Name: city'),
+            service.embed('Column Name:  city'),
+            service.embed_many(['Column Name: a', 'Column Name: city', '', 'Column Name: bb', 'Column Name: a']),
+        )
+        return results, service.stats
+
+    (results, stats), requests = _run_with_server(0, scenario)
+    single, duplicate, many = results
+    assert single == duplicate == [17.0, 1.0]
+    assert many == [[14.0, 1.0], single, None, [15.0, 1.0], [14.0, 1.0]]
+    assert sorted(text for batch in requests for text in batch) == ['Column Name: a', 'Column Name: bb', 'Column Name: city']
+    assert stats['coalesced'] == 2
+
+def test_service_retries_rate_limited_requests():
+    async def scenario(client):
+        service = AsyncEmbeddingService(client, MODEL, base_delay=0.01)
+        return await service.embed_many(['Column Name: a', 'Column Name: bb']), service.stats
+
+    (embeddings, stats), requests = _run_with_server(2, scenario)
+    assert embeddings == [[14.0, 1.0], [15.0, 1.0]]
+    assert requests[:2] == [None, None] and len(requests) == 3
+    assert (stats['retries'], stats['failed_requests']) == (2, 0)
+
+def test_cancelled_caller_does_not_fail_coalesced_waiters(tmp_path):
+    async def scenario(cache):
+        service = AsyncEmbeddingService(AsyncLocalEmbeddingClient(dimensions=8, latency=0.1), 'local-hashing-8', cache=cache)
+        results = await asyncio.gather(
+            asyncio.wait_for(service.embed('Column Name: city'), 0.02),
+            service.embed('Column Name: city'),
+            return_exceptions=True,
+        )
+        # The request of a caller that timed out alone still completes and fills the cache
+        timed_out = await asyncio.gather(asyncio.wait_for(service.embed('Column Name: zip'), 0.02), return_exceptions=True)
+        await asyncio.sleep(0.2)
+        return results, timed_out, await service.embed('Column Name: zip'), service.stats
+
+    cache = EmbeddingCache(str(tmp_path / 'embeddings.sqlite'))
+    (cancelled, coalesced), (timed_out,), zip_embedding, stats = asyncio.run(scenario(cache))
+    assert isinstance(cancelled, asyncio.TimeoutError) and isinstance(timed_out, asyncio.TimeoutError)
+    assert coalesced == hashing_embedding('Column Name: city', 8)
+    assert zip_embedding == pytest.approx(hashing_embedding('Column Name: zip', 8), abs=1e-6) # float32 from the cache
+    assert (stats['requests'], stats['coalesced']) == (2, 1)
+    cache.close()
+
+def test_token_bucket_limits_rate():
+    async def scenario():
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)
+        start_time = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start_time
+
+    assert 0.25 <= asyncio.run(scenario()) < 1.0
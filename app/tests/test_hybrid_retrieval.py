@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from config.settings import get_settings
+from database.catalog_index import CatalogHit
+from database.hybrid_retrieval import HybridRetriever, identifier_candidates, reciprocal_rank_fusion
+from database.vector_storage import VectorStorage
+
+class _Database:
+    """Stand-in for AsyncDatabase: canned rows (and delays) per leg."""
+
+    def __init__(self, lexical, vector, lexical_delay=0.0, vector_delay=0.0):
+        self.rows = {'lexical': lexical, 'vector': vector}
+        self.delays = {'lexical': lexical_delay, 'vector': vector_delay}
+        self.calls = []
+
+    async def fetch(self, sql, *args):
+        leg = 'lexical' if 'ts_rank_cd' in sql else 'vector'
+        self.calls.append((leg, args))
+        await asyncio.sleep(self.delays[leg])
+        return self.rows[leg]
+
+async def _embed(text):
+    return [0.1, 0.2]
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([['a', 'b', 'c'], ['c', 'a']], k=60)
+    assert [key for key, _ in fused] == ['a', 'c', 'b']
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+def test_identifier_candidates():
+    candidates = identifier_candidates('Show the student_id and zip code of each Student')
+    assert candidates[:3] == ['student_id', 'student', 'id']
+    assert {'zip_code', 'zipcode', 'studentid'} <= set(candidates)
+    assert 'the' not in candidates and identifier_candidates('what is the') == []
+
+def test_retrieve_fuses_both_legs_concurrently():
+    database = _Database(
+        lexical=[('c1', 'school.students.student_id'), ('c2', 'school.grades.student_id')],
+        vector=[('c3', 'school.students.pupil_number'), ('c1', 'school.students.student_id')],
+        lexical_delay=0.05, vector_delay=0.05,
+    )
+    retriever = HybridRetriever(database, _embed, VectorStorage(), lexical_budget=0.5, vector_budget=0.5, candidates=20)
+    hits = asyncio.run(retriever.retrieve('Which student_id has the best grade?', 'columns', k=3))
+    assert [hit.id for hit in hits] == ['c1', 'c3', 'c2']
+    assert (hits[0].lexical_rank, hits[0].vector_rank, hits[1].lexical_rank) == (1, 2, None)
+    assert hits[0].name == 'school.students.student_id'
+    lexical_args = dict(database.calls)['lexical']
+    assert lexical_args[0] == 'student | id | best | grade' and 'student_id' in lexical_args[1] and lexical_args[2] == 20
+    assert dict(database.calls)['vector'] == ([0.1, 0.2], 20)
+
+def test_vector_leg_defaults_to_the_configured_storage():
+    database = _Database(lexical=[], vector=[('c1', 'school.students.student_id')])
+    retriever = HybridRetriever(database, _embed, candidates=10)
+    assert retriever.storage == VectorStorage.from_settings(get_settings().vector_store)
+    asyncio.run(retriever.retrieve('student', 'columns'))
+    assert retriever.storage.expression('embedding') in retriever._vector_sql[('columns', False)]
+    if not retriever.storage.is_exact:
+        assert dict(database.calls)['vector'] == ([0.1, 0.2], 10, retriever.storage.candidates(10))
+
+def test_slow_leg_is_dropped_within_budget():
+    database = _Database(lexical=[('t1', 'school.students')], vector=[('t2', 'school.teachers')], vector_delay=1.0)
+    retriever = HybridRetriever(database, _embed, lexical_budget=0.2, vector_budget=0.05)
+
+    async def scenario():
+        start = asyncio.get_running_loop().time()
+        hits = await retriever.retrieve('students', 'tables')
+        return hits, asyncio.get_running_loop().time() - start
+
+    hits, elapsed = asyncio.run(scenario())
+    assert [hit.id for hit in hits] == ['t1'] and elapsed < 0.5
+    assert (retriever.stats['vector_timeouts'], retriever.stats['lexical_timeouts']) == (1, 0)
+    with pytest.raises(ValueError):
+        asyncio.run(retriever.retrieve('students', 'relationships'))
+
+def test_vector_leg_uses_the_in_process_catalog_index():
+    class _Index:
+        def search(self, kind, embedding, k, database=None):
+            return [CatalogHit('t2', f'{database}.teachers', 0.1)]
+
+    database = _Database(lexical=[], vector=[('unused', 'x')])
+    retriever = HybridRetriever(database, _embed, catalog_index=_Index())
+    hits = asyncio.run(retriever.retrieve('who teaches', 'tables', database='school'))
+    assert [(hit.id, hit.name, hit.vector_rank) for hit in hits] == [('t2', 'school.teachers', 1)]
+    assert [leg for leg, _ in database.calls] == ['lexical']
+
+def test_retrieve_scoped_to_one_database():
+    database = _Database(lexical=[('c1', 'school.students.student_id')], vector=[('c1', 'school.students.student_id')])
+    retriever = HybridRetriever(database, _embed, candidates=20)
+    sql = []
+    fetch = database.fetch
+    database.fetch = lambda query, *args: sql.append(query) or fetch(query, *args)
+    hits = asyncio.run(retriever.retrieve('student_id', 'columns', database='school'))
+    assert [hit.id for hit in hits] == ['c1']
+    calls = dict(database.calls)
+    assert calls['lexical'][3] == 'school' and calls['vector'] == ([0.1, 0.2], 20, 'school')
+    lexical, vector = sorted(sql, key=lambda query: 'ts_rank_cd' not in query)
+    assert 'WHERE d.name = $4 ORDER BY' in lexical and 'WHERE d.name = $3 AND c.embedding IS NOT NULL' in vector
+    # Trigram matches probe the GIN index once per candidate instead of `% ANY($2)`
+    assert 'JOIN db_columns m ON lower(m.column_name) % candidate' in lexical and '% ANY' not in lexical
@@ -0,0 +1,72 @@
+import pandas as pd
+from utils.matching import find_top_matches, jaro_winkler_match, ngram_match, phonetic_match
+from utils.match_index import MatchIndex
+
+def _sample():
+    df = pd.DataFrame({
+        'full_name': [
+            'JS Plumbing',
+            'Jon Smyth Plumbing',
+            'JB Electrical',
+            'Jim Browne Electrical',
+            'CJ Bakery',
+            'Kathryn Jons Bakery',
+            'Jonah Smithers Plumbing'
+        ]
+    })
+    acronym_dict = {
+        'JS': 'John Smith',
+        'JB': 'James Brown',
+        'CJ': 'Catherine Jones'
+    }
+    return df, acronym_dict
+
+def test_match_index_scores_like_dataframe_matchers():
+    df, acronym_dict = _sample()
+    index = MatchIndex.from_dataframe(df, 'full_name', acronym_dict)
+    user_input = "John Smith Plumbing"
+
+    for matcher in (ngram_match, jaro_winkler_match):
+        expected = matcher(user_input, df, 'full_name', acronym_dict)
+        actual = matcher(user_input, None, 'full_name', match_index=index)
+        assert actual.values.tolist() == expected.values.tolist()
+
+def test_match_index_save_and_load(tmp_path):
+    df, acronym_dict = _sample()
+    MatchIndex.from_dataframe(df, 'full_name', acronym_dict).save(tmp_path / 'names.idx')
+    index = MatchIndex.load(tmp_path / 'names.idx')
+
+    assert len(index) == len(df)
+    assert index.acronym_dict == acronym_dict
+    for method in ('hybrid', 'levenshtein', 'jaccard'):
+        top_matches = find_top_matches("John Smith Plumbing", None, 'full_name', method=method, match_index=index)
+        assert top_matches.iloc[0]['full_name'] == 'JS Plumbing'
+
+def test_ngram_inverted_index_matches_full_scan():
+    df, acronym_dict = _sample()
+    index = MatchIndex.from_dataframe(df, 'full_name', acronym_dict)
+    user_input = "John Smith Plumbing"
+
+    full_scan = find_top_matches(user_input, df, 'full_name', acronym_dict, top_n=3, method='ngram')
+    indexed = find_top_matches(user_input, None, 'full_name', top_n=3, method='ngram', match_index=index)
+    assert indexed['ngram_score'].tolist() == full_scan['ngram_score'].tolist()
+    assert indexed.attrs['candidate_count'] <= len(index.variations)
+
+    strict = index.search_ngram(user_input, top_n=3, min_shared=15)
+    assert strict.attrs['candidate_count'] < indexed.attrs['candidate_count']
+    assert strict.iloc[0]['full_name'] == 'JS Plumbing'
+
+def test_phonetic_bucket_index():
+    df, acronym_dict = _sample()
+    index = MatchIndex.from_dataframe(df, 'full_name', acronym_dict)
+    user_input = "John Smith Plumbing"
+
+    for algorithm in ('soundex', 'metaphone', 'nysiis'):
+        full_scan = phonetic_match(user_input, df, 'full_name', acronym_dict, phonetic_algorithm=algorithm)
+        hits = find_top_matches(user_input, None, 'full_name', top_n=10, method='phonetic',
+                                match_index=index, phonetic_algorithm=algorithm)
+        assert hits['full_name'].tolist() == full_scan[full_scan['phonetic_match'] == 1]['full_name'].tolist()
+
+    hybrid = find_top_matches(user_input, None, 'full_name', method='hybrid', match_index=index)
+    assert list(hybrid.columns) == ['full_name', 'ngram_score', 'phonetic_match']
+    assert hybrid.iloc[0]['full_name'] == 'JS Plumbing'
@@ -1,5 +1,9 @@
+import sqlite3
+
 import pandas as pd
-from utils.matching import find_top_matches
+from database.sqlite_client import SQLiteClient
+from utils.matching import find_top_matches, find_top_matches_batch, find_top_matches_streaming
+from utils.sharded_matching import ShardedColumn
 
 def test_matching():
     # Sample data with acronyms in the values
@@ -59,4 +63,76 @@ def test_matching():
     # Test with jaccard method
     top_matches = find_top_matches(user_input, df, 'full_name', acronym_dict=acronym_dict, method='jaccard')
     print(f"\nTop {len(top_matches)} Jaccard matches for '{user_input}':")
-    print(top_matches)
\ No newline at end of file
+    print(top_matches)
+
+def test_hybrid_keeps_duplicate_values_once():
+    df = pd.DataFrame({'full_name': ['JS Plumbing', 'JS Plumbing', 'Jon Smyth Plumbing', 'JB Electrical']})
+    top_matches = find_top_matches("John Smith Plumbing", df, 'full_name', acronym_dict={'JS': 'John Smith'}, method='hybrid')
+
+    assert list(top_matches.columns) == ['full_name', 'ngram_score', 'phonetic_match']
+    assert top_matches.index.tolist() == [0, 1, 2]
+    assert (top_matches['phonetic_match'] == 1).all()
+
+
+def test_weighted_matching():
+    df = pd.DataFrame({'full_name': ['JS Plumbing', 'Jon Smyth Plumbing', 'JB Electrical']})
+    acronym_dict = {'JS': 'John Smith'}
+
+    top_matches = find_top_matches("John Smith Plumbing", df, 'full_name', acronym_dict=acronym_dict, method='weighted')
+    assert top_matches['full_name'].tolist() == ['JS Plumbing', 'Jon Smyth Plumbing', 'JB Electrical']
+    assert top_matches.iloc[0]['weighted_score'] == 1.0
+
+    ngram_only = find_top_matches("John Smith Plumbing", df, 'full_name', acronym_dict=acronym_dict,
+                                  method='weighted', weights={'ngram': 1.0})
+    ngram = find_top_matches("John Smith Plumbing", df, 'full_name', acronym_dict=acronym_dict, method='ngram')
+    assert ngram_only['weighted_score'].tolist() == ngram['ngram_score'].tolist()
+
+def test_find_top_matches_batch_matches_single_queries():
+    df = pd.DataFrame(
+        {'full_name': ['JS Plumbing', 'Jon Smyth Plumbing', 'JB Electrical', 'Jim Browne Electrical', 'CJ Bakery']},
+        index=[10, 20, 30, 40, 50],
+    )
+    acronym_dict = {'JS': 'John Smith', 'JB': 'James Brown', 'CJ': 'Catherine Jones'}
+    queries = ["John Smith Plumbing", "James Brown", "Kathy Jones Bakery"]
+
+    for method in ('hybrid', 'ngram', 'levenshtein', 'jarowinkler', 'weighted'):
+        batch = find_top_matches_batch(queries, df, 'full_name', acronym_dict=acronym_dict, top_n=3, method=method)
+        for query in queries:
+            single = find_top_matches(query, df, 'full_name', acronym_dict=acronym_dict, top_n=3, method=method)
+            rows = batch[batch['query'] == query]
+            assert rows.index.tolist() == single.index.tolist()
+            assert rows['rank'].tolist() == list(range(1, len(single) + 1))
+            assert rows[single.columns].values.tolist() == single.values.tolist()
+
+def test_sharded_matching_merges_shards_like_a_full_scan():
+    df = pd.DataFrame({'full_name': ['JS Plumbing', 'Jon Smyth Plumbing', 'JB Electrical', 'Jim Browne Electrical',
+                                     'CJ Bakery', 'Kathryn Jons Bakery', 'Jonah Smithers Plumbing']})
+    acronym_dict = {'JS': 'John Smith', 'JB': 'James Brown', 'CJ': 'Catherine Jones'}
+
+    with ShardedColumn(df, 'full_name', acronym_dict, workers=2, chunk_size=2) as column:
+        for method in ('hybrid', 'ngram', 'jarowinkler'):
+            sharded = column.find_top_matches("John Smith Plumbing", top_n=3, method=method)
+            full_scan = find_top_matches("John Smith Plumbing", df, 'full_name', acronym_dict=acronym_dict, top_n=3, method=method)
+            assert sharded.index.tolist() == full_scan.index.tolist()
+            assert sharded.values.tolist() == full_scan.values.tolist()
+
+def test_streaming_matching_over_sqlite_batches(tmp_path):
+    names = ['JS Plumbing', 'Jon Smyth Plumbing', 'JB Electrical', 'Jim Browne Electrical',
+             'CJ Bakery', 'Kathryn Jons Bakery', 'Jonah Smithers Plumbing']
+    connection = sqlite3.connect(tmp_path / 'customers.db')
+    connection.execute("CREATE TABLE customers (full_name TEXT)")
+    connection.executemany("INSERT INTO customers VALUES (?)", [(name,) for name in names])
+    connection.commit()
+    connection.close()
+
+    client = SQLiteClient(str(tmp_path / 'customers.db'))
+    df = client.execute_query("SELECT full_name FROM customers")
+    acronym_dict = {'JS': 'John Smith', 'JB': 'James Brown', 'CJ': 'Catherine Jones'}
+
+    for method in ('hybrid', 'levenshtein'):
+        batches = client.iter_query("SELECT full_name FROM customers", batch_size=2)
+        streamed = find_top_matches_streaming("John Smith Plumbing", batches, 'full_name', acronym_dict, top_n=3, method=method)
+        full = find_top_matches("John Smith Plumbing", df, 'full_name', acronym_dict, top_n=3, method=method)
+        assert streamed.index.tolist() == full.index.tolist()
+        assert streamed.values.tolist() == full.values.tolist()
+    client.close()
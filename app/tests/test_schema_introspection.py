@@ -0,0 +1,67 @@
+import sqlite3
+
+from database.schema_introspection import ColumnInfo, introspect_schema
+
+def test_introspect_schema_reads_columns_keys_and_relationships(tmp_path):
+    path = tmp_path / 'pets.sqlite'
+    connection = sqlite3.connect(path)
+    connection.executescript('''
+        CREATE TABLE Owners (owner_id INTEGER PRIMARY KEY, email TEXT UNIQUE, name VARCHAR(80) NOT NULL);
+        CREATE TABLE Documents (code TEXT, kind TEXT, PRIMARY KEY (code, kind));
+        CREATE TABLE Pets (
+            pet_id INTEGER,
+            owner_id INTEGER REFERENCES Owners,
+            passport TEXT,
+            nickname TEXT DEFAULT 'Rex',
+            PRIMARY KEY (pet_id),
+            FOREIGN KEY (passport) REFERENCES Documents(code)
+        );
+        CREATE UNIQUE INDEX ix_pets_passport ON Pets (passport);
+    ''')
+    connection.close()
+
+    documents, owners, pets = introspect_schema(str(path))
+    assert [table.name for table in (documents, owners, pets)] == ['Documents', 'Owners', 'Pets']
+    assert pets.sql.startswith('CREATE TABLE Pets')
+
+    assert documents.primary_keys == ['code', 'kind']
+    assert not any(column.is_unique for column in documents.columns)
+    assert owners.columns == [
+        ColumnInfo('owner_id', 'INTEGER', True, False, True),
+        ColumnInfo('email', 'TEXT', False, True, True),
+        ColumnInfo('name', 'VARCHAR(80)', False, False, False),
+    ]
+
+    pet_id, owner_id, passport, nickname = pets.columns
+    assert pet_id.is_primary_key and not pet_id.is_nullable
+    assert (owner_id.references_table, owner_id.references_column) == ('Owners', 'owner_id')
+    assert owner_id.is_foreign_key and not nickname.is_foreign_key
+    assert nickname.default_value == "'Rex'"
+    assert [(fk.from_column, fk.to_table, fk.to_column, fk.relationship_type) for fk in pets.foreign_keys] == [
+        ('owner_id', 'Owners', 'owner_id', 'many_to_one'),
+        ('passport', 'Documents', 'code', 'one_to_one'),
+    ]
+
+def test_introspect_schema_resolves_references_case_insensitively(tmp_path):
+    path = tmp_path / 'school.sqlite'
+    connection = sqlite3.connect(path)
+    connection.executescript('''
+        CREATE TABLE student (Student_ID INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE notes (text TEXT);
+        CREATE TABLE enrolment (
+            student_id INTEGER REFERENCES Student,
+            advisor_id INTEGER REFERENCES STUDENT(student_id),
+            note TEXT REFERENCES Notes,
+            course_id INTEGER REFERENCES Course(course_id)
+        );
+    ''')
+    connection.close()
+
+    enrolment, notes, student = introspect_schema(str(path))
+    assert [(fk.from_column, fk.to_table, fk.to_column) for fk in enrolment.foreign_keys] == [
+        ('student_id', 'student', 'Student_ID'),
+        ('advisor_id', 'student', 'Student_ID'),
+    ]
+    student_id, advisor_id, note, course_id = enrolment.columns
+    assert (student_id.references_table, student_id.references_column) == ('student', 'Student_ID')
+    assert not note.is_foreign_key and not course_id.is_foreign_key
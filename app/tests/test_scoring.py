@@ -0,0 +1,44 @@
+import pandas as pd
+from ngram import NGram
+from rapidfuzz import fuzz
+import numpy as np
+from utils.scoring import score_column, expand_values, jaro_winkler_scores, jaro_winkler_similarity
+
+def test_expand_values():
+    variations, owners = expand_values(['JS Plumbing', 'Bakery'], {'JS': 'John Smith'})
+    assert list(variations) == ['JS Plumbing', 'John Smith Plumbing', 'Bakery']
+    assert list(owners) == [0, 0, 1]
+
+def test_score_column_matches_reference_scorers():
+    values = pd.Series(['JS Plumbing', 'Jon Smyth Plumbing', 'Kathryn Jons Bakery', 'spam', ''])
+    user_input = 'John Smith Plumbing'
+
+    scores, forms = score_column(user_input, values, 'ngram')
+    assert list(scores) == [NGram.compare(user_input, value, N=3) for value in values]
+    assert list(forms) == list(values)
+
+    scores, _ = score_column(user_input, values, 'levenshtein')
+    assert list(scores) == [fuzz.ratio(user_input, value) / 100 for value in values]
+
+def test_score_column_picks_best_acronym_form():
+    values = pd.Series(['JS Plumbing', 'Jon Smyth Plumbing'])
+    scores, forms = score_column('John Smith Plumbing', values, 'jaccard', {'JS': 'John Smith'})
+    assert scores[0] == 1.0
+    assert forms[0] == 'John Smith Plumbing'
+    assert forms[1] == 'Jon Smyth Plumbing'
+
+def test_vectorized_jaro_winkler_matches_reference():
+    values = np.array(['JS Plumbing', 'Jon Smyth Plumbing', 'Kathryn Jons Bakery', 'spam', '', 'John Smith Plumbing'], dtype=object)
+    user_input = 'John Smith Plumbing'
+    expected = [jaro_winkler_similarity(user_input, value) for value in values]
+    assert np.allclose(jaro_winkler_scores(user_input, values), expected)
+
+    cut = jaro_winkler_scores(user_input, values, score_cutoff=0.8)
+    assert np.allclose(cut, [score if score >= 0.8 else 0.0 for score in expected])
+
+def test_jaro_winkler_top_n_keeps_best_scores():
+    values = pd.Series(['JS Plumbing', 'Jon Smyth Plumbing', 'Kathryn Jons Bakery', 'spam', 'Jonah Smithers Plumbing'])
+    full, _ = score_column('John Smith Plumbing', values, 'jarowinkler', {'JS': 'John Smith'})
+    top, _ = score_column('John Smith Plumbing', values, 'jarowinkler', {'JS': 'John Smith'}, top_n=2)
+    best = np.argsort(-full, kind='stable')[:2]
+    assert np.allclose(top[best], full[best])
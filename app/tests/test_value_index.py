@@ -0,0 +1,39 @@
+import sqlite3
+
+from database.sqlite_client import SQLiteClient
+from utils.value_index import ValueIndexes, build_value_indexes, is_text_type, value_index_path
+
+def _database(tmp_path):
+    db_path = str(tmp_path / 'school.sqlite')
+    connection = sqlite3.connect(db_path)
+    connection.execute('CREATE TABLE "Departments" (department_id INTEGER, department_name VARCHAR(255))')
+    connection.executemany('INSERT INTO "Departments" VALUES (?, ?)', [
+        (1, 'Computer Science'), (2, 'History'), (3, 'Mathematics'), (4, 'History'), (5, None),
+    ])
+    connection.execute('CREATE TABLE "Students" (student_id INTEGER, first_name TEXT)')
+    connection.executemany('INSERT INTO "Students" VALUES (?, ?)', [(1, 'Jonathan'), (2, 'Maria'), (3, 'Joanna')])
+    connection.commit()
+    connection.close()
+    return db_path
+
+def test_is_text_type():
+    assert is_text_type('VARCHAR(255)')
+    assert is_text_type('text')
+    assert not is_text_type('INTEGER')
+    assert not is_text_type(None)
+
+def test_build_and_link_value_indexes(tmp_path):
+    db_path = _database(tmp_path)
+    client = SQLiteClient(db_path)
+    manifest = build_value_indexes(client, [('Departments', 'department_name'), ('Students', 'first_name')], value_index_path(db_path))
+    client.close()
+
+    assert [entry['distinct_values'] for entry in manifest['columns']] == [3, 3]
+
+    indexes = ValueIndexes.for_database(db_path)
+    assert indexes.columns == [('Departments', 'department_name'), ('Students', 'first_name')]
+    links = indexes.link('Computer Sceince', top_n=2)
+    assert links.iloc[0][['table_name', 'column_name', 'value']].tolist() == ['Departments', 'department_name', 'Computer Science']
+
+    names = indexes.link('Jonathon', columns=[('Students', 'first_name')], method='levenshtein')
+    assert names.iloc[0]['value'] == 'Jonathan'
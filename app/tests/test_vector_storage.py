@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from database.vector_storage import VectorStorage
+
+def test_index_and_search_sql():
+    storage = VectorStorage('halfvec', 512)
+    assert storage.index_name('db_columns') == 'idx_db_columns_embedding_halfvec512'
+    assert storage.create_index_sql('db_columns') == (
+        'CREATE INDEX IF NOT EXISTS idx_db_columns_embedding_halfvec512 ON db_columns '
+        'USING hnsw ((l2_normalize(subvector(embedding, 1, 512))::halfvec(512)) halfvec_cosine_ops)'
+    )
+    binary = VectorStorage('binary')
+    assert binary.expression('embedding') == '(binary_quantize(embedding)::bit(1536))'
+    sql = binary.search_sql('db_columns', ['id', 'column_name'])
+    assert '<~> (binary_quantize(%(embedding)s::vector(1536))::bit(1536))' in sql
+    assert sql.endswith('LIMIT %(candidates)s) candidates ORDER BY distance LIMIT %(k)s')
+    assert (binary.candidates(10), VectorStorage().candidates(10)) == (40, 10)
+    assert VectorStorage().index_name('db_tables') == 'idx_db_tables_embedding'
+    assert 'ORDER BY embedding <=>' in VectorStorage().search_sql('db_tables', ['id'])
+    assert [s.bytes_per_vector for s in (VectorStorage(), storage, binary)] == [6144, 1024, 192]
+    with pytest.raises(ValueError):
+        VectorStorage('int8')
+
+def test_compressed_search_recall():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((40, 256))
+    vectors = (centers[rng.integers(0, 40, 2000)] + 0.5 * rng.standard_normal((2000, 256))).astype(np.float32)
+    queries = vectors[:20] + 0.05 * rng.standard_normal((20, 256)).astype(np.float32)
+    exact = VectorStorage(full_dimensions=256)
+    truth = [exact.search(query, exact.encode(vectors), vectors, 10) for query in queries]
+    assert all(result[0] == i for i, result in enumerate(truth))
+
+    for storage, minimum in [
+        (VectorStorage('halfvec', full_dimensions=256), 0.99),
+        (VectorStorage('vector', 128, full_dimensions=256), 0.9),
+        (VectorStorage('binary', full_dimensions=256, rerank_factor=10), 0.95),
+    ]:
+        encoded = storage.encode(vectors)
+        found = [storage.search(query, encoded, vectors, 10) for query in queries]
+        recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(found, truth)])
+        assert recall >= minimum, (storage, recall)
+    assert VectorStorage('binary', full_dimensions=256).encode(vectors).shape == (2000, 32)
+
+def test_search_without_rows_or_k():
+    vectors = np.ones((3, 8), dtype=np.float32)
+    for mode in ('vector', 'halfvec', 'binary'):
+        storage = VectorStorage(mode, full_dimensions=8)
+        empty = np.zeros((0, 8), dtype=np.float32)
+        assert storage.search(vectors[0], storage.encode(empty), empty, 5).tolist() == []
+        assert storage.search(vectors[0], storage.encode(vectors), vectors, 0).tolist() == []
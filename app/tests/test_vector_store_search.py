@@ -0,0 +1,108 @@
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from timescale_vector import client
+
+from test_vector_store_upsert import _offline_store
+
+class _Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, query, params):
+        self.connection.executed.append((query, params))
+
+    def fetchall(self):
+        return self.connection.rows
+
+class _Connection:
+    """Stand-in for a psycopg2 connection returning canned rows."""
+
+    def __init__(self, rows):
+        self.rows, self.executed = rows, []
+
+    def cursor(self):
+        return _Cursor(self)
+
+def _store(rows):
+    store = _offline_store(client.Sync('postgres://localhost/test', 'embeddings', 1536), 1536)
+    connection = _Connection(rows)
+
+    @contextmanager
+    def connect():
+        yield connection
+
+    store.vec_client.connect = connect
+    return store, connection
+
+def test_lean_search_projects_selected_metadata_in_sql():
+    hit = uuid.uuid4()
+    store, connection = _store([(hit, 'Q: shipping?', 0.12, {'category': 'Shipping', 'rank': None})])
+    df = store.search('shipping', limit=3, predicates=client.Predicates('category', '==', 'Shipping'), lean=True, metadata_keys=['category', 'rank'])
+
+    query, params = connection.executed[0]
+    assert 'embedding,' not in query and 'SELECT id, contents, embedding <=> %(1)s AS distance, jsonb_build_object(' in query
+    assert "metadata->%(metadata_key_0)s::text" in query and 'LIMIT 3' in query
+    assert (params['metadata_key_0'], params['metadata_key_1']) == ('category', 'rank')
+    assert list(df.columns) == ['id', 'content', 'distance', 'category', 'rank']
+    assert df.iloc[0].tolist()[:4] == [str(hit), 'Q: shipping?', 0.12, 'Shipping']
+
+def test_lean_search_records_and_empty_results():
+    store, connection = _store([])
+    assert store.search('anything', lean=True, return_dataframe=False) == []
+    assert ', metadata AS metadata' in connection.executed[0][0]
+    assert list(store.search('anything', lean=True).columns) == ['id', 'content', 'distance']
+
+def test_full_search_expands_metadata_columns():
+    store, _ = _store([])
+    results = [(uuid.uuid4(), {'category': 'Returns', 'tags': {'a': 1}}, 'Q: returns?', [0.0] * 4, 0.3)]
+    df = store._create_dataframe_from_results(results)
+    assert list(df.columns) == ['id', 'content', 'embedding', 'distance', 'category', 'tags']
+    assert df.loc[0, 'tags'] == {'a': 1}
+
+def test_search_many_embeds_once_and_queries_once():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    store, connection = _store([(0, first, 'Q: shipping?', 0.1, {'category': 'Shipping'}),
+                                (1, second, 'Q: refunds?', 0.2, {'category': 'Returns'}),
+                                (1, first, 'Q: shipping?', 0.4, {'category': 'Shipping'})])
+    requests = []
+    create = store.embedding_client.embeddings.create
+    store.embedding_client.embeddings.create = lambda **kwargs: requests.append(kwargs['input']) or create(**kwargs)
+
+    shipping, refunds, empty = store.search_many(
+        ['shipping', {'query_text': 'refunds', 'limit': 2, 'metadata_filter': {'category': 'Returns'}}, 'nothing'],
+        lean=True, metadata_keys=['category'],
+    )
+    assert requests == [['shipping', 'refunds', 'nothing']]
+    assert len(connection.executed) == 1
+    query, params = connection.executed[0]
+    assert query.count('UNION ALL') == 2 and query.endswith('ORDER BY query_index, distance')
+    assert '(SELECT 1 AS query_index, hits.* FROM (' in query and 'metadata @> %(q1_2)s' in query
+    assert 'LIMIT 2' in query and 'LIMIT 5' in query
+    assert {'q0_1', 'q1_1', 'q1_2', 'q2_1', 'q1_metadata_key_0'} <= set(params)
+    assert shipping['id'].tolist() == [str(first)]
+    assert refunds['category'].tolist() == ['Returns', 'Shipping']
+    assert empty.empty and store.search_many([]) == []
+
+def test_search_query_is_built_without_the_client_query_builder():
+    store, _ = _store([])
+    query, params = store._search_query(
+        [0.1] * 1536, False, None, limit=4,
+        filter=[{'category': 'Shipping'}, {'category': 'Returns'}],
+        predicates=client.Predicates('rank', '>=', 2),
+        uuid_time_filter=client.UUIDTimeRange(datetime(2024, 1, 1), datetime(2024, 2, 1)),
+    )
+    assert query == (
+        'SELECT id, metadata, contents, embedding, embedding <=> %(1)s AS distance FROM "embeddings" '
+        "WHERE (metadata @> ANY(%(2)s::jsonb[])) AND ((metadata->>'rank')::int >= %(3)s) "
+        'AND (uuid_timestamp(id) >= %(4)s AND uuid_timestamp(id) < %(5)s) ORDER BY embedding <=> %(1)s LIMIT 4'
+    )
+    assert params['2'] == ['{"category": "Shipping"}', '{"category": "Returns"}'] and params['3'] == 2
+    assert set(params) == {'1', '2', '3', '4', '5'}
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pandas as pd
+
+from config.settings import Settings
+from database.embedding_providers import LocalEmbeddingClient, hashing_embedding
+from database.vector_store import VectorStore
+
+class _RecordingClient:
+    """Stand-in for the Timescale Vector client: records upserted chunks and the thread that inserted them."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def upsert(self, records):
+        time.sleep(0.01)
+        self.chunks.append((threading.current_thread().name, records))
+
+def _offline_store(vec_client, dimensions):
+    """VectorStore with a local embedding client and no cache; __init__ (OpenAI client, on-disk cache) is skipped."""
+    store = VectorStore.__new__(VectorStore)
+    store.settings = Settings()
+    store.vector_settings = store.settings.vector_store
+    store.vec_client = vec_client
+    store.embedding_client = LocalEmbeddingClient(dimensions=dimensions)
+    store.embedding_model = f'local-hashing-{dimensions}'
+    store.embedding_cache = None
+    store._embedding_service = None
+    store._async_search = None
+    return store
+
+def _store():
+    return _offline_store(_RecordingClient(), 8)
+
+def test_upsert_stream_chunks_embeds_and_reports_progress():
+    store = _store()
+    consumed = []
+
+    def records():
+        for i in range(7):
+            consumed.append(threading.current_thread().name)
+            yield {'id': f'id-{i}', 'metadata': {'n': i}, 'contents': '' if i == 3 else f'Question {i}\nAnswer', 'embedding': [1.0] * 8 if i == 0 else None}
+
+    reports = []
+    progress = store.upsert_stream(records(), chunk_size=3, on_progress=lambda p: reports.append((p.chunks, p.records)))
+    assert [len(chunk) for _, chunk in store.vec_client.chunks] == [3, 2, 1]
+    assert {name for name, _ in store.vec_client.chunks} == {threading.current_thread().name}
+    first = store.vec_client.chunks[0][1]
+    assert first[0] == ('id-0', {'n': 0}, 'Question 0\nAnswer', [1.0] * 8)
+    assert first[1][3] == hashing_embedding('Question 1 Answer', 8)
+    assert reports == [(1, 3), (2, 5), (3, 6)]
+    assert (progress.records, progress.skipped, progress.embedded, progress.chunks) == (6, 1, 6, 3)
+    assert progress.records_per_second > 0 and len(consumed) == 7
+    # The source is only read by the worker thread, overlapping with the inserts
+    assert threading.current_thread().name not in consumed
+
+def test_upsert_dataframe_goes_through_the_stream():
+    store = _store()
+    df = pd.DataFrame({'id': ['a', 'b', 'c'], 'metadata': [{}, {}, {}], 'contents': ['x', 'y', 'z'], 'embedding': [[0.5] * 8] * 3})
+    store.upsert(df, chunk_size=2)
+    assert [len(chunk) for _, chunk in store.vec_client.chunks] == [2, 1]
+    assert store.vec_client.chunks[1][1] == [('c', {}, 'z', [0.5] * 8)]
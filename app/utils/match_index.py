@@ -0,0 +1,425 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.scoring import (
+    METRICS,
+    NGRAM_N,
+    NGramPostings,
+    NGramProfiles,
+    PHONETIC_ALGORITHMS,
+    PhoneticBuckets,
+    RESULT_COLUMNS,
+    TokenSets,
+    best_per_owner,
+    best_per_owner_sparse,
+    blend_scores,
+    expand_ranges,
+    expand_values,
+    jaccard_scores,
+    jaro_winkler_scores,
+    jaro_winkler_top_scores,
+    levenshtein_score_matrix,
+    levenshtein_scores,
+    map_queries,
+    match_frame,
+    ngram_scores,
+    top_n_positions,
+)
+
+INDEX_FORMAT_VERSION = 3
+META_FILE = "meta.json"
+
+
+def _pack_strings(strings):
+    """Encode strings as one UTF-8 byte buffer plus offsets."""
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def _unpack_strings(data, offsets):
+    """Decode a byte buffer written by ``_pack_strings`` back into an object array."""
+    raw = data.tobytes()
+    strings = np.empty(len(offsets) - 1, dtype=object)
+    for i in range(len(strings)):
+        strings[i] = raw[offsets[i]:offsets[i + 1]].decode("utf-8")
+    return strings
+
+
+class MatchIndex:
+    """
+    Pre-built matching data for one candidate column.
+
+    Acronym variations, phonetic buckets (Soundex, Metaphone, NYSIIS), n-gram profiles and
+    token sets are computed once when the index is built, so each query only pays for scoring.
+
+    Example:
+        index = MatchIndex.from_dataframe(df, 'full_name', acronym_dict)
+        index.save('customer_names.idx')
+        index = MatchIndex.load('customer_names.idx')
+        find_top_matches('John Smith', None, 'full_name', match_index=index)
+    """
+
+    def __init__(self, column_name, values, variations, owners, phonetic=None, ngrams=None, tokens=None, acronym_dict=None, ngram_postings=None):
+        self.column_name = column_name
+        self.values = values
+        self.variations = variations
+        self.owners = owners
+        self.acronym_dict = acronym_dict or {}
+        # Components left as None are built from the variations on first use
+        self._lazy_phonetic = phonetic is None
+        self._phonetic = {} if phonetic is None else phonetic
+        self._ngrams = ngrams
+        self._tokens = tokens
+        self._ngram_postings = ngram_postings
+
+    @property
+    def phonetic(self):
+        """Phonetic buckets per algorithm."""
+        if self._lazy_phonetic:
+            for algorithm in PHONETIC_ALGORITHMS:
+                self._phonetic_buckets(algorithm)
+        return self._phonetic
+
+    @property
+    def ngrams(self):
+        if self._ngrams is None:
+            self._ngrams = NGramProfiles.build(self.variations)
+        return self._ngrams
+
+    @property
+    def ngram_postings(self):
+        if self._ngram_postings is None:
+            self._ngram_postings = NGramPostings.from_profiles(self.ngrams)
+        return self._ngram_postings
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = TokenSets.build(self.variations)
+        return self._tokens
+
+    @classmethod
+    def from_dataframe(cls, customer_df, column_to_check, acronym_dict=None):
+        """
+        Build an index over a DataFrame column.
+
+        Args:
+            customer_df (pd.DataFrame): DataFrame containing the candidate values.
+            column_to_check (str): Column to index.
+            acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+
+        Returns:
+            MatchIndex: The built index.
+        """
+        if column_to_check not in customer_df.columns:
+            raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+        return cls.from_values(customer_df[column_to_check], column_to_check, acronym_dict)
+
+    @classmethod
+    def from_values(cls, values, column_name, acronym_dict=None, prebuild=True):
+        """
+        Build an index over an iterable of candidate values.
+
+        With ``prebuild=False`` only the acronym variations are computed up front; phonetic
+        buckets, n-gram profiles and token sets are built the first time a query needs them.
+        """
+        values = np.array([str(value) for value in values], dtype=object)
+        variations, owners = expand_values(values, acronym_dict)
+        if not prebuild:
+            return cls(column_name, values, variations, owners, acronym_dict=acronym_dict)
+        return cls(
+            column_name,
+            values,
+            variations,
+            owners,
+            {algorithm: PhoneticBuckets.build(variations, algorithm) for algorithm in PHONETIC_ALGORITHMS},
+            NGramProfiles.build(variations),
+            TokenSets.build(variations),
+            acronym_dict,
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def score_variations(self, user_input, metric, workers=-1, phonetic_algorithm='soundex', weights=None):
+        """Score the query against every stored variation."""
+        if metric == 'weighted':
+            return blend_scores(
+                user_input,
+                weights,
+                lambda text, component: self.score_variations(text, component, workers, phonetic_algorithm),
+            )
+        if metric == 'ngram':
+            return ngram_scores(user_input, self.ngrams)
+        if metric == 'phonetic':
+            return self._phonetic_buckets(phonetic_algorithm).scores(user_input)
+        if metric == 'levenshtein':
+            return levenshtein_scores(user_input, self.variations, workers=workers)
+        if metric == 'jarowinkler':
+            return jaro_winkler_scores(user_input, self.variations)
+        if metric == 'jaccard':
+            return jaccard_scores(user_input, self.tokens)
+        raise ValueError(f"Metric must be one of {', '.join(METRICS)}.")
+
+    def score_batch(self, queries, metric, workers=-1, phonetic_algorithm='soundex', weights=None):
+        """
+        Score several queries against every stored variation.
+
+        Levenshtein scores the whole query matrix in one multi-threaded ``cdist`` call; the
+        other metrics score the queries on a thread pool over the shared index data.
+
+        Returns:
+            np.ndarray: (queries, variations) score matrix.
+        """
+        queries = list(queries)
+        if metric == 'weighted':
+            return blend_scores(
+                queries,
+                weights,
+                lambda texts, component: self.score_batch(texts, component, workers, phonetic_algorithm),
+            )
+        if metric == 'levenshtein':
+            return levenshtein_score_matrix(queries, self.variations, workers=workers)
+        if not queries:
+            return np.zeros((0, len(self.variations)))
+        # The first query builds any lazily created component before the threads share them
+        first = self.score_variations(queries[0], metric, workers=workers, phonetic_algorithm=phonetic_algorithm)
+        rest = map_queries(
+            lambda query: self.score_variations(query, metric, workers=1, phonetic_algorithm=phonetic_algorithm),
+            queries[1:],
+            workers,
+        )
+        return np.vstack([first] + rest)
+
+    def score(self, user_input, metric, workers=-1, phonetic_algorithm='soundex', weights=None, top_n=None):
+        """
+        Score the query against every indexed value.
+
+        With ``top_n``, only the ``top_n`` best values are guaranteed exact (see ``score_column``).
+
+        Returns:
+            tuple: (scores, best_forms) NumPy arrays aligned with ``values``.
+        """
+        if metric == 'jarowinkler' and top_n is not None:
+            scores = jaro_winkler_top_scores(user_input, self.variations, self.owners, len(self.values), top_n)
+        else:
+            scores = self.score_variations(user_input, metric, workers=workers, phonetic_algorithm=phonetic_algorithm, weights=weights)
+        best, best_index = best_per_owner(scores, self.owners, len(self.values))
+        return best, self.variations[best_index]
+
+    def match(self, user_input, metric, workers=-1, phonetic_algorithm='soundex', weights=None, top_n=None):
+        """Return the same [value, score, best form] frame as the matchers in ``utils.matching``."""
+        scores, forms = self.score(user_input, metric, workers=workers, phonetic_algorithm=phonetic_algorithm, weights=weights, top_n=top_n)
+        return match_frame(self.values, self.column_name, metric, scores, forms)
+
+    def ngram_candidates(self, user_input, min_shared=1):
+        """
+        Variations sharing at least ``min_shared`` n-grams with the query, read from the inverted index.
+
+        Raising ``min_shared`` trades recall for latency: fewer candidates are returned, and
+        values sharing fewer n-grams are skipped even if their score is positive.
+
+        Returns:
+            tuple: (candidate variation positions, their exact n-gram scores).
+        """
+        query_vector, query_size = self.ngrams.query_vector(user_input)
+        rows, shared = self.ngram_postings.shared_counts(query_vector, max(min_shared, 1))
+        scores = shared / (query_size + self.ngrams.sizes[rows] - shared)
+        return rows, scores
+
+    def search_ngram(self, user_input, top_n=5, min_shared=1):
+        """
+        Top n-gram matches scored only over the candidates returned by ``ngram_candidates``.
+
+        With ``min_shared=1`` every value with a positive score is a candidate, so the result
+        equals a full scan apart from zero-score rows. The number of candidate variations is
+        stored in ``result.attrs['candidate_count']``.
+
+        Returns:
+            pd.DataFrame: [column, 'ngram_score'] rows indexed by value position.
+        """
+        rows, scores = self.ngram_candidates(user_input, min_shared)
+        owners, best, _ = best_per_owner_sparse(scores, self.owners[rows])
+        top = top_n_positions(best, top_n)
+        result_df = pd.DataFrame(
+            {self.column_name: self.values[owners[top]], RESULT_COLUMNS['ngram'][0]: best[top]},
+            index=owners[top],
+        )
+        result_df.attrs['candidate_count'] = len(rows)
+        logging.debug(f"n-gram lookup for '{user_input}' scored {len(rows)} of {len(self.variations)} variations")
+        return result_df
+
+    def _phonetic_buckets(self, algorithm):
+        if self._lazy_phonetic and algorithm in PHONETIC_ALGORITHMS and algorithm not in self._phonetic:
+            self._phonetic[algorithm] = PhoneticBuckets.build(self.variations, algorithm)
+        if algorithm not in self._phonetic:
+            algorithms = PHONETIC_ALGORITHMS if self._lazy_phonetic else self._phonetic
+            raise ValueError(f"Phonetic algorithm must be one of {', '.join(algorithms)}.")
+        return self._phonetic[algorithm]
+
+    def _top_frame(self, owners, columns, top_n):
+        """Frame of the first ``top_n`` owners (already ranked) with the given score columns."""
+        owners = owners[:top_n]
+        data = {self.column_name: self.values[owners]}
+        data.update({name: scores[:top_n] for name, scores in columns.items()})
+        return pd.DataFrame(data, index=owners)
+
+    def phonetic_owners(self, user_input, phonetic_algorithm='soundex'):
+        """Positions of the values with a variation whose phonetic code equals the query's code."""
+        rows = self._phonetic_buckets(phonetic_algorithm).lookup(user_input)
+        return np.unique(self.owners[rows])
+
+    def search_phonetic(self, user_input, top_n=5, phonetic_algorithm='soundex'):
+        """
+        Values that match the query phonetically, found with one bucket lookup.
+
+        Unlike a full scan, non-matching values (``phonetic_match`` 0) are not returned.
+
+        Returns:
+            pd.DataFrame: [column, 'phonetic_match'] rows indexed by value position, in value order.
+        """
+        owners = self.phonetic_owners(user_input, phonetic_algorithm)
+        flags = np.ones(len(owners), dtype=np.int64)
+        return self._top_frame(owners, {RESULT_COLUMNS['phonetic'][0]: flags}, top_n)
+
+    def search_hybrid(self, user_input, top_n=5, phonetic_algorithm='soundex'):
+        """
+        Phonetic matches ranked by n-gram score; only the phonetic hits are n-gram scored.
+
+        As in the DataFrame hybrid, a value's n-gram score is the best over all of its variations.
+
+        Returns:
+            pd.DataFrame: [column, 'ngram_score', 'phonetic_match'] rows indexed by value position.
+        """
+        owners = self.phonetic_owners(user_input, phonetic_algorithm)
+        starts = np.searchsorted(self.owners, owners, side='left')
+        lengths = np.searchsorted(self.owners, owners, side='right') - starts
+        rows = expand_ranges(starts, lengths)
+        if self._ngrams is None:
+            # Lazily built index: profile the phonetic hits only rather than the whole column
+            scores = ngram_scores(user_input, NGramProfiles.build(self.variations[rows]))
+        else:
+            scores = ngram_scores(user_input, self.ngrams, rows=rows)
+        _, best, _ = best_per_owner_sparse(scores, self.owners[rows])
+        top = top_n_positions(best, top_n)
+        return self._top_frame(
+            owners[top],
+            {
+                RESULT_COLUMNS['ngram'][0]: best[top],
+                RESULT_COLUMNS['phonetic'][0]: np.ones(len(top), dtype=np.int64),
+            },
+            top_n,
+        )
+
+    # --- Persistence ---
+    def save(self, path):
+        """
+        Write the index to a directory of ``.npy`` arrays plus a JSON metadata file.
+
+        Numeric arrays can be memory-mapped by ``load`` so several worker processes share
+        one copy through the OS page cache.
+        """
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            "owners": self.owners,
+            "ngram_indptr": self.ngrams.indptr,
+            "ngram_ids": self.ngrams.ids,
+            "ngram_counts": self.ngrams.counts,
+            "ngram_sizes": self.ngrams.sizes,
+            "ngram_posting_indptr": self.ngram_postings.indptr,
+            "ngram_posting_rows": self.ngram_postings.rows,
+            "ngram_posting_counts": self.ngram_postings.counts,
+            "token_indptr": self.tokens.indptr,
+            "token_ids": self.tokens.ids,
+            "token_lengths": self.tokens.lengths,
+        }
+        packed = {
+            "values": self.values,
+            "variations": self.variations,
+            "ngram_vocab": list(self.ngrams.vocab),
+            "token_vocab": list(self.tokens.vocab),
+        }
+        for algorithm, buckets in self.phonetic.items():
+            arrays[f"phonetic_{algorithm}_indptr"] = buckets.indptr
+            arrays[f"phonetic_{algorithm}_rows"] = buckets.rows
+            packed[f"phonetic_{algorithm}_codes"] = buckets.codes
+        for name, strings in packed.items():
+            arrays[f"{name}_data"], arrays[f"{name}_offsets"] = _pack_strings(strings)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "column_name": self.column_name,
+            "acronym_dict": self.acronym_dict,
+            "ngram_n": self.ngrams.n,
+            "phonetic_algorithms": list(self.phonetic),
+        }
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load an index written by ``save``.
+
+        Args:
+            path (str): Directory the index was saved to.
+            mmap (bool): Memory-map the numeric arrays instead of reading them into memory.
+
+        Returns:
+            MatchIndex: The loaded index.
+        """
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported match index format: {meta.get('format_version')}")
+
+        mmap_mode = "r" if mmap else None
+
+        def array(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+        def strings(name):
+            return _unpack_strings(array(f"{name}_data"), array(f"{name}_offsets"))
+
+        ngram_vocab = {gram: i for i, gram in enumerate(strings("ngram_vocab"))}
+        token_vocab = {token: i for i, token in enumerate(strings("token_vocab"))}
+        ngrams = NGramProfiles(
+            ngram_vocab,
+            array("ngram_indptr"),
+            array("ngram_ids"),
+            array("ngram_counts"),
+            array("ngram_sizes"),
+            n=meta.get("ngram_n", NGRAM_N),
+        )
+        postings = NGramPostings(array("ngram_posting_indptr"), array("ngram_posting_rows"), array("ngram_posting_counts"), len(ngrams))
+        tokens = TokenSets(token_vocab, array("token_indptr"), array("token_ids"), array("token_lengths"))
+        phonetic = {
+            algorithm: PhoneticBuckets(
+                algorithm,
+                strings(f"phonetic_{algorithm}_codes"),
+                array(f"phonetic_{algorithm}_indptr"),
+                array(f"phonetic_{algorithm}_rows"),
+                len(ngrams),
+            )
+            for algorithm in meta["phonetic_algorithms"]
+        }
+        return cls(
+            meta["column_name"],
+            strings("values"),
+            strings("variations"),
+            array("owners"),
+            phonetic,
+            ngrams,
+            tokens,
+            meta.get("acronym_dict"),
+            ngram_postings=postings,
+        )
@@ -1,155 +1,64 @@
+import heapq
+
+import numpy as np
 import pandas as pd
-from ngram import NGram
-import jellyfish
-from rapidfuzz import fuzz
+from utils.match_index import MatchIndex
+from utils.sharded_matching import DEFAULT_CHUNK_SIZE, ShardedColumn
+from utils.scoring import (
+    QUERY_BATCH_CELLS,
+    RESULT_COLUMNS,
+    best_per_owner,
+    hybrid_scores,
+    map_queries,
+    match_frame,
+    score_column,
+    top_n_positions,
+)
+
+def _check_column(customer_df, column_to_check):
+    if column_to_check not in customer_df.columns:
+        raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+
+def _match(user_input, customer_df, column_to_check, metric, acronym_dict=None, workers=-1, match_index=None, phonetic_algorithm='soundex', weights=None, top_n=None):
+    """Score every value of the column with one metric, using the pre-built index when one is given."""
+    if match_index is not None:
+        return match_index.match(user_input, metric, workers=workers, phonetic_algorithm=phonetic_algorithm, weights=weights, top_n=top_n)
 
-def ngram_match(user_input, customer_df, column_to_check, acronym_dict=None):
+    _check_column(customer_df, column_to_check)
+    values = customer_df[column_to_check]
+    scores, forms = score_column(user_input, values, metric, acronym_dict, workers, phonetic_algorithm, weights, top_n)
+    return match_frame(values, column_to_check, metric, scores, forms)
+
+def ngram_match(user_input, customer_df, column_to_check, acronym_dict=None, workers=-1, match_index=None):
     """
     Perform n-gram matching between user input and DataFrame values, handling acronyms in values.
     
     Returns:
     - pd.DataFrame: DataFrame with n-gram scores and matched forms.
     """
-    if column_to_check not in customer_df.columns:
-        raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+    return _match(user_input, customer_df, column_to_check, 'ngram', acronym_dict, workers, match_index)
 
-    temp_df = customer_df.copy()
-    if acronym_dict is None:
-        acronym_dict = {}
-
-    def ngram_similarity(name1, name2, n=3):
-        return NGram.compare(name1, name2, N=n)
-
-    def expand_acronyms(text, acronym_dict):
-        variations = [text]
-        words = text.split()
-        for i, word in enumerate(words):
-            if word in acronym_dict:
-                expanded = acronym_dict[word]
-                new_variation = " ".join(words[:i] + [expanded] + words[i+1:])
-                variations.append(new_variation)
-        return variations
-
-    temp_df['ngram_score'] = 0.0
-    temp_df['best_ngram_form'] = ""
-
-    for index, row in temp_df.iterrows():
-        original_value = row[column_to_check]
-        value_variations = expand_acronyms(original_value, acronym_dict)
-        
-        best_ngram_score = 0.0
-        best_form = original_value
-        
-        for variation in value_variations:
-            score = ngram_similarity(user_input, variation, n=3)
-            if score > best_ngram_score:
-                best_ngram_score = score
-                best_form = variation
-        
-        temp_df.at[index, 'ngram_score'] = best_ngram_score
-        temp_df.at[index, 'best_ngram_form'] = best_form
-
-    return temp_df[[column_to_check, 'ngram_score', 'best_ngram_form']]
-
-def phonetic_match(user_input, customer_df, column_to_check, acronym_dict=None):
+def phonetic_match(user_input, customer_df, column_to_check, acronym_dict=None, workers=-1, match_index=None, phonetic_algorithm='soundex'):
     """
     Perform phonetic matching between user input and DataFrame values, handling acronyms in values.
     
+    phonetic_algorithm selects the code compared: 'soundex' (default), 'metaphone' or 'nysiis'.
+    
     Returns:
     - pd.DataFrame: DataFrame with phonetic match flags and matched forms.
     """
-    if column_to_check not in customer_df.columns:
-        raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+    return _match(user_input, customer_df, column_to_check, 'phonetic', acronym_dict, workers, match_index, phonetic_algorithm)
 
-    temp_df = customer_df.copy()
-    if acronym_dict is None:
-        acronym_dict = {}
-
-    def phonetic_similarity(name1, name2):
-        soundex1 = jellyfish.soundex(name1)
-        soundex2 = jellyfish.soundex(name2)
-        return 1 if soundex1 == soundex2 else 0
-
-    def expand_acronyms(text, acronym_dict):
-        variations = [text]
-        words = text.split()
-        for i, word in enumerate(words):
-            if word in acronym_dict:
-                expanded = acronym_dict[word]
-                new_variation = " ".join(words[:i] + [expanded] + words[i+1:])
-                variations.append(new_variation)
-        return variations
-
-    temp_df['phonetic_match'] = 0
-    temp_df['best_phonetic_form'] = ""
-
-    for index, row in temp_df.iterrows():
-        original_value = row[column_to_check]
-        value_variations = expand_acronyms(original_value, acronym_dict)
-        
-        best_phonetic_score = 0
-        best_form = original_value
-        
-        for variation in value_variations:
-            score = phonetic_similarity(user_input, variation)
-            if score > best_phonetic_score:
-                best_phonetic_score = score
-                best_form = variation
-        
-        temp_df.at[index, 'phonetic_match'] = best_phonetic_score
-        temp_df.at[index, 'best_phonetic_form'] = best_form
-
-    return temp_df[[column_to_check, 'phonetic_match', 'best_phonetic_form']]
-
-def levenshtein_match(user_input, customer_df, column_to_check, acronym_dict=None):
+def levenshtein_match(user_input, customer_df, column_to_check, acronym_dict=None, workers=-1, match_index=None):
     """
     Perform Levenshtein distance matching between user input and DataFrame values, handling acronyms.
     
     Returns:
     - pd.DataFrame: DataFrame with Levenshtein scores (0-1) and matched forms.
     """
-    if column_to_check not in customer_df.columns:
-        raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+    return _match(user_input, customer_df, column_to_check, 'levenshtein', acronym_dict, workers, match_index)
 
-    temp_df = customer_df.copy()
-    if acronym_dict is None:
-        acronym_dict = {}
-
-    def levenshtein_similarity(name1, name2):
-        return fuzz.ratio(name1, name2) / 100  # Normalize to 0-1
-
-    def expand_acronyms(text, acronym_dict):
-        variations = [text]
-        words = text.split()
-        for i, word in enumerate(words):
-            if word in acronym_dict:
-                expanded = acronym_dict[word]
-                new_variation = " ".join(words[:i] + [expanded] + words[i+1:])
-                variations.append(new_variation)
-        return variations
-
-    temp_df['levenshtein_score'] = 0.0
-    temp_df['best_levenshtein_form'] = ""
-
-    for index, row in temp_df.iterrows():
-        original_value = row[column_to_check]
-        value_variations = expand_acronyms(original_value, acronym_dict)
-        
-        best_levenshtein_score = 0.0
-        best_form = original_value
-        
-        for variation in value_variations:
-            score = levenshtein_similarity(user_input, variation)
-            if score > best_levenshtein_score:
-                best_levenshtein_score = score
-                best_form = variation
-        
-        temp_df.at[index, 'levenshtein_score'] = best_levenshtein_score
-        temp_df.at[index, 'best_levenshtein_form'] = best_form
-
-    return temp_df[[column_to_check, 'levenshtein_score', 'best_levenshtein_form']]
-
-def jaro_winkler_match(user_input, customer_df, column_to_check, acronym_dict=None):
+def jaro_winkler_match(user_input, customer_df, column_to_check, acronym_dict=None, workers=-1, match_index=None):
     """
     Perform Jaro-Winkler similarity matching between user input and DataFrame values, handling acronyms.
     
@@ -158,98 +67,15 @@ def jaro_winkler_match(user_input, customer_df, column_to_check, acronym_dict=No
         customer_df (pd.DataFrame): DataFrame containing the data to match against.
         column_to_check (str): Column in the DataFrame to perform matching on.
         acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+        workers (int): Threads used by the vectorized scorers (-1 uses all cores).
+        match_index (MatchIndex, optional): Pre-built index to score against instead of the DataFrame.
     
     Returns:
         pd.DataFrame: DataFrame with Jaro-Winkler scores (0-1) and matched forms.
     """
-    if column_to_check not in customer_df.columns:
-        raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+    return _match(user_input, customer_df, column_to_check, 'jarowinkler', acronym_dict, workers, match_index)
 
-    temp_df = customer_df.copy()
-    if acronym_dict is None:
-        acronym_dict = {}
-
-    def jaro_winkler_similarity(s1, s2):
-        # Handle empty strings
-        if len(s1) == 0 and len(s2) == 0:
-            return 1.0
-        if len(s1) == 0 or len(s2) == 0:
-            return 0.0
-
-        # Find matching characters and their pairs
-        max_distance = (max(len(s1), len(s2)) // 2) - 1
-        possible_j_for_i = [[] for _ in range(len(s1))]
-        for i in range(len(s1)):
-            for j in range(len(s2)):
-                if s1[i] == s2[j] and abs(i - j) <= max_distance:
-                    possible_j_for_i[i].append(j)
-
-        # Find matching pairs (greedy approach)
-        used_j = set()
-        matching_pairs = []
-        for i in range(len(s1)):
-            for j in possible_j_for_i[i]:
-                if j not in used_j:
-                    used_j.add(j)
-                    matching_pairs.append((i, j))
-                    break
-
-        m = len(matching_pairs)
-        if m == 0:
-            return 0.0
-
-        # Calculate transpositions (t)
-        t = sum(1 for i, j in matching_pairs if i != j) / 2.0
-
-        # Calculate Jaro similarity
-        jaro = (m / len(s1) + m / len(s2) + (m - t) / m) / 3.0
-
-        # Calculate common prefix length (up to 4)
-        l = 0
-        for i in range(min(len(s1), len(s2), 4)):
-            if s1[i] == s2[i]:
-                l += 1
-            else:
-                break
-
-        # Calculate Jaro-Winkler similarity with p=0.1
-        p = 0.1
-        jaro_winkler = jaro + l * p * (1 - jaro)
-
-        return jaro_winkler
-
-    def expand_acronyms(text, acronym_dict):
-        variations = [text]
-        words = text.split()
-        for i, word in enumerate(words):
-            if word in acronym_dict:
-                expanded = acronym_dict[word]
-                new_variation = " ".join(words[:i] + [expanded] + words[i+1:])
-                variations.append(new_variation)
-        return variations
-
-    temp_df['jaro_winkler_score'] = 0.0
-    temp_df['best_jaro_winkler_form'] = ""
-
-    for index, row in temp_df.iterrows():
-        original_value = str(row[column_to_check])  # Ensure string type
-        value_variations = expand_acronyms(original_value, acronym_dict)
-        
-        best_jaro_winkler_score = 0.0
-        best_form = original_value
-        
-        for variation in value_variations:
-            score = jaro_winkler_similarity(user_input, variation)
-            if score > best_jaro_winkler_score:
-                best_jaro_winkler_score = score
-                best_form = variation
-        
-        temp_df.at[index, 'jaro_winkler_score'] = best_jaro_winkler_score
-        temp_df.at[index, 'best_jaro_winkler_form'] = best_form
-
-    return temp_df[[column_to_check, 'jaro_winkler_score', 'best_jaro_winkler_form']]
-
-def jaccard_match(user_input, customer_df, column_to_check, acronym_dict=None):
+def jaccard_match(user_input, customer_df, column_to_check, acronym_dict=None, workers=-1, match_index=None):
     """
     Perform Jaccard similarity matching between user input and DataFrame values, handling acronyms.
     
@@ -258,118 +84,247 @@ def jaccard_match(user_input, customer_df, column_to_check, acronym_dict=None):
         customer_df (pd.DataFrame): DataFrame containing the data to match against.
         column_to_check (str): Column in the DataFrame to perform matching on.
         acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+        workers (int): Threads used by the vectorized scorers (-1 uses all cores).
+        match_index (MatchIndex, optional): Pre-built index to score against instead of the DataFrame.
     
     Returns:
         pd.DataFrame: DataFrame with Jaccard scores (0-1) and matched forms.
     """
-    if column_to_check not in customer_df.columns:
-        raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+    return _match(user_input, customer_df, column_to_check, 'jaccard', acronym_dict, workers, match_index)
 
-    temp_df = customer_df.copy()
-    if acronym_dict is None:
-        acronym_dict = {}
-
-    def jaccard_similarity(s1, s2):
-        # Handle empty strings
-        if len(s1) == 0 and len(s2) == 0:
-            return 1.0
-        if len(s1) == 0 or len(s2) == 0:
-            return 0.0
-
-        # Convert strings to sets of words
-        set1 = set(s1.split())
-        set2 = set(s2.split())
-        
-        # Calculate intersection and union
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
-        
-        # Jaccard similarity is intersection over union
-        return intersection / union if union > 0 else 0.0
-
-    def expand_acronyms(text, acronym_dict):
-        variations = [text]
-        words = text.split()
-        for i, word in enumerate(words):
-            if word in acronym_dict:
-                expanded = acronym_dict[word]
-                new_variation = " ".join(words[:i] + [expanded] + words[i+1:])
-                variations.append(new_variation)
-        return variations
-
-    temp_df['jaccard_score'] = 0.0
-    temp_df['best_jaccard_form'] = ""
-
-    for index, row in temp_df.iterrows():
-        original_value = str(row[column_to_check])  # Ensure string type
-        value_variations = expand_acronyms(original_value, acronym_dict)
-        
-        best_jaccard_score = 0.0
-        best_form = original_value
-        
-        for variation in value_variations:
-            score = jaccard_similarity(user_input, variation)
-            if score > best_jaccard_score:
-                best_jaccard_score = score
-                best_form = variation
-        
-        temp_df.at[index, 'jaccard_score'] = best_jaccard_score
-        temp_df.at[index, 'best_jaccard_form'] = best_form
-
-    return temp_df[[column_to_check, 'jaccard_score', 'best_jaccard_form']]
-
-def find_top_matches(user_input, customer_df, column_to_check, acronym_dict=None, top_n=5, method='hybrid'):
+def weighted_match(user_input, customer_df, column_to_check, acronym_dict=None, workers=-1, match_index=None, weights=None):
+    """
+    Blend several similarity metrics into one weighted score per value, handling acronyms.
+    
+    Each metric is computed once over all variations and the weighted average is taken per
+    variation, so no per-metric frames are built or merged.
+    
+    Args:
+        user_input (str): The input string to match against.
+        customer_df (pd.DataFrame): DataFrame containing the data to match against.
+        column_to_check (str): Column in the DataFrame to perform matching on.
+        acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+        workers (int): Threads used by the vectorized scorers (-1 uses all cores).
+        match_index (MatchIndex, optional): Pre-built index to score against instead of the DataFrame.
+        weights (dict, optional): Metric name to weight, e.g. {'ngram': 0.5, 'levenshtein': 0.3, 'jarowinkler': 0.2}.
+            Defaults to n-gram 0.4, Levenshtein 0.3, Jaro-Winkler 0.3.
+    
+    Returns:
+        pd.DataFrame: DataFrame with weighted scores (0-1) and matched forms.
+    """
+    return _match(user_input, customer_df, column_to_check, 'weighted', acronym_dict, workers, match_index, weights=weights)
+
+def find_top_matches(user_input, customer_df, column_to_check, acronym_dict=None, top_n=5, method='hybrid', workers=-1, match_index=None, min_shared=1, phonetic_algorithm='soundex', weights=None):
     """
     Find top matches using n-gram, phonetic, Levenshtein, or hybrid approaches.
     
     Parameters:
     - user_input (str): The input string to match.
-    - customer_df (pd.DataFrame): DataFrame containing the data.
+    - customer_df (pd.DataFrame): DataFrame containing the data (may be None when match_index is given).
     - column_to_check (str): The column name to match against.
     - acronym_dict (dict, optional): Dictionary of acronyms to expanded forms.
     - top_n (int): Number of top results to return (default is 5).
-    - method (str): 'hybrid' (default), 'ngram', 'phonetic', or 'levenshtein'.
+    - method (str): 'hybrid' (default), 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', or 'weighted'.
+    - workers (int): Threads used by the vectorized scorers (-1 uses all cores).
+    - match_index (MatchIndex, optional): Pre-built index of the column; its own acronym_dict is used.
+    - min_shared (int): With a match_index and method='ngram', only values sharing at least this many
+      trigrams with the input are scored (higher is faster, lower has better recall).
+    - phonetic_algorithm (str): Phonetic code used by 'phonetic' and 'hybrid': 'soundex' (default),
+      'metaphone' or 'nysiis'. With a match_index these methods become bucket lookups and only
+      return phonetic hits.
+    - weights (dict, optional): Metric weights for method='weighted' (see weighted_match).
     
     Returns:
     - pd.DataFrame: Top N matches with scores and match flags.
     """
-    if method not in ['hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard']:
-        raise ValueError("Method must be 'hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', or 'jaccard'.")
+    if method not in ['hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', 'weighted']:
+        raise ValueError("Method must be 'hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', or 'weighted'.")
+
+    if match_index is not None:
+        column_to_check = match_index.column_name
+
+    if method == 'ngram' and match_index is not None:
+        return match_index.search_ngram(user_input, top_n=top_n, min_shared=min_shared)
+
+    if method == 'phonetic' and match_index is not None:
+        return match_index.search_phonetic(user_input, top_n=top_n, phonetic_algorithm=phonetic_algorithm)
+
+    if method == 'hybrid' and match_index is not None:
+        return match_index.search_hybrid(user_input, top_n=top_n, phonetic_algorithm=phonetic_algorithm)
+
+    if method != 'hybrid':
+        score_column_name = RESULT_COLUMNS[method][0]
+        result_df = _match(user_input, customer_df, column_to_check, method, acronym_dict, workers, match_index, phonetic_algorithm, weights, top_n)
+        top = top_n_positions(result_df[score_column_name].to_numpy(), top_n)
+        return result_df[[column_to_check, score_column_name]].iloc[top]
+
+    else:  # hybrid (default): phonetic hits only, ranked by n-gram score
+        _check_column(customer_df, column_to_check)
+        values = customer_df[column_to_check]
+        hit_positions, ngram_scores = hybrid_scores(user_input, values, acronym_dict, phonetic_algorithm)
+        top = top_n_positions(ngram_scores, top_n)
+        return pd.DataFrame(
+            {
+                column_to_check: values.iloc[hit_positions[top]],
+                'ngram_score': ngram_scores[top],
+                'phonetic_match': 1,
+            },
+            index=customer_df.index[hit_positions[top]],
+        )
+
+def find_top_matches_batch(queries, customer_df, column_to_check, acronym_dict=None, top_n=5, method='hybrid', workers=-1, match_index=None, min_shared=1, phonetic_algorithm='soundex', weights=None):
+    """
+    Find the top matches of several user literals against the same column in one pass.
+
+    The column is expanded and profiled once for the whole batch instead of once per literal.
+    Levenshtein scores the full query matrix in one multi-threaded call, the other methods
+    score the queries on a thread pool (``workers`` threads, -1 uses all cores).
+
+    Each query gets the same rows and scores as ``find_top_matches`` called with the same
+    arguments.
 
-    if method == 'ngram':
-        result_df = ngram_match(user_input, customer_df, column_to_check, acronym_dict)
-        return result_df[[column_to_check, 'ngram_score']].sort_values(by='ngram_score', ascending=False).head(top_n)
+    Parameters:
+    - queries (iterable of str): The input strings to match.
+    - customer_df, column_to_check, acronym_dict, top_n, method, workers, match_index, min_shared,
+      phonetic_algorithm, weights: As in find_top_matches.
     
-    elif method == 'phonetic':
-        result_df = phonetic_match(user_input, customer_df, column_to_check, acronym_dict)
-        return result_df[[column_to_check, 'phonetic_match']].sort_values(by='phonetic_match', ascending=False).head(top_n)
+    Returns:
+    - pd.DataFrame: One tidy frame with a 'query' and 'rank' (1 = best) column plus the columns
+      returned by find_top_matches, ordered by query then rank and indexed like find_top_matches.
+    """
+    if method not in ['hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', 'weighted']:
+        raise ValueError("Method must be 'hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', or 'weighted'.")
+
+    queries = list(queries)
+    if match_index is not None:
+        index = match_index
+        column_to_check = index.column_name
+        values = pd.Series(index.values)
+        labels = None
+    else:
+        _check_column(customer_df, column_to_check)
+        values = customer_df[column_to_check]
+        labels = customer_df.index
+        # Only the components the method needs are built, once for all queries
+        index = MatchIndex.from_values(values, column_to_check, acronym_dict, prebuild=False)
+
+    if method == 'hybrid' or (match_index is not None and method in ('ngram', 'phonetic')):
+        # Candidate lookups: each query only touches its own candidates
+        if method == 'hybrid':
+            search = lambda query: index.search_hybrid(query, top_n=top_n, phonetic_algorithm=phonetic_algorithm)
+            score_columns = [RESULT_COLUMNS['ngram'][0], RESULT_COLUMNS['phonetic'][0]]
+        elif method == 'ngram':
+            search = lambda query: index.search_ngram(query, top_n=top_n, min_shared=min_shared)
+            score_columns = [RESULT_COLUMNS['ngram'][0]]
+        else:
+            search = lambda query: index.search_phonetic(query, top_n=top_n, phonetic_algorithm=phonetic_algorithm)
+            score_columns = [RESULT_COLUMNS['phonetic'][0]]
+        # The first query builds any lazily created component before the threads share them
+        frames = [search(queries[0])] + map_queries(search, queries[1:], workers) if queries else []
+        positions = [frame.index.to_numpy() for frame in frames]
+        scores = {name: [frame[name].to_numpy() for frame in frames] for name in score_columns}
+    else:
+        score_column_name = RESULT_COLUMNS[method][0]
+        score_columns = [score_column_name]
+        positions, best_scores = [], []
+        chunk = max(1, QUERY_BATCH_CELLS // max(len(index.variations), 1))
+        for start in range(0, len(queries), chunk):
+            matrix = index.score_batch(queries[start:start + chunk], method, workers, phonetic_algorithm, weights)
+            for row in matrix:
+                best, _ = best_per_owner(row, index.owners, len(index))
+                top = top_n_positions(best, top_n)
+                positions.append(top)
+                best_scores.append(best[top])
+        scores = {score_column_name: best_scores}
+
+    counts = np.array([len(rows) for rows in positions], dtype=np.int64)
+    rows = np.concatenate(positions + [np.zeros(0, dtype=np.int64)]).astype(np.int64)
+    result_df = pd.DataFrame(
+        {
+            'query': np.repeat(np.array(queries, dtype=object), counts),
+            'rank': np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts) + 1,
+            column_to_check: values.iloc[rows].to_numpy(),
+        },
+        index=rows if labels is None else labels[rows],
+    )
+    for name in score_columns:
+        result_df[name] = np.concatenate(scores[name]) if scores[name] else np.zeros(0)
+    return result_df
+
+def find_top_matches_sharded(user_input, customer_df, column_to_check, acronym_dict=None, top_n=5, method='hybrid', workers=None, chunk_size=DEFAULT_CHUNK_SIZE, phonetic_algorithm='soundex', weights=None):
+    """
+    Find top matches by scoring shards of the column in parallel worker processes.
+
+    Returns the same rows as find_top_matches. This one-off helper starts and stops a
+    worker pool; keep a ShardedColumn open to reuse the workers across queries.
+
+    Parameters:
+    - workers (int, optional): Worker processes (defaults to the number of cores).
+    - chunk_size (int): Number of values scored per shard.
+    - The other parameters are as in find_top_matches.
     
-    elif method == 'levenshtein':
-        result_df = levenshtein_match(user_input, customer_df, column_to_check, acronym_dict)
-        return result_df[[column_to_check, 'levenshtein_score']].sort_values(by='levenshtein_score', ascending=False).head(top_n)
+    Returns:
+    - pd.DataFrame: Top N matches with scores and match flags.
+    """
+    with ShardedColumn(customer_df, column_to_check, acronym_dict, workers=workers, chunk_size=chunk_size) as column:
+        return column.find_top_matches(user_input, top_n=top_n, method=method, phonetic_algorithm=phonetic_algorithm, weights=weights)
+
+def find_top_matches_streaming(user_input, batches, column_to_check, acronym_dict=None, top_n=5, method='hybrid', workers=-1, phonetic_algorithm='soundex', weights=None):
+    """
+    Find top matches over an iterator of DataFrame batches, e.g. SQLiteClient.iter_query(...).
     
-    elif method == "jarowinkler":
-        result_df = jaro_winkler_match(user_input, customer_df, column_to_check, acronym_dict)
-        return result_df[[column_to_check, 'jaro_winkler_score']].sort_values(by='jaro_winkler_score', ascending=False).head(top_n)
+    Each batch is scored and reduced to its own top N, which is merged into a bounded heap,
+    so memory depends on the batch size and top_n rather than on the number of candidates.
+    The result equals find_top_matches on the concatenated batches (with a default RangeIndex).
     
-    elif method == "jaccard":
-        result_df = jaccard_match(user_input, customer_df, column_to_check, acronym_dict)
-        return result_df[[column_to_check, 'jaccard_score']].sort_values(by='jaccard_score', ascending=False).head(top_n)
+    Parameters:
+    - user_input (str): The input string to match.
+    - batches (iterable of pd.DataFrame): Candidate rows, batch by batch.
+    - column_to_check (str): The column name to match against.
+    - acronym_dict, top_n, method, workers, phonetic_algorithm, weights: As in find_top_matches.
     
-    else:  # hybrid (default)
-        ngram_df = ngram_match(user_input, customer_df, column_to_check, acronym_dict)
-        phonetic_df = phonetic_match(user_input, customer_df, column_to_check, acronym_dict)
-        
-        result_df = ngram_df[[column_to_check, 'ngram_score']].merge(
-            phonetic_df[[column_to_check, 'phonetic_match']],
-            on=column_to_check,
-            how='inner'
-        )
-        
-        top_matches = (result_df[result_df['phonetic_match'] == 1]
-                    .sort_values(by='ngram_score', ascending=False)
-                    .head(top_n))
-        return top_matches
+    Returns:
+    - pd.DataFrame: Top N matches indexed by their position in the stream.
+    """
+    if method not in ['hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', 'weighted']:
+        raise ValueError("Method must be 'hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', or 'weighted'.")
+
+    # Min-heap of (score, -position, value): the root is the weakest kept match, and on
+    # equal scores the later position is the weaker one, as in find_top_matches
+    heap = []
+    offset = 0
+    value_dtype = None
+    for batch in batches:
+        if batch.empty:
+            continue
+        _check_column(batch, column_to_check)
+        values = batch[column_to_check]
+        value_dtype = values.dtype
+        if method == 'hybrid':
+            positions, scores = hybrid_scores(user_input, values, acronym_dict, phonetic_algorithm)
+        else:
+            scores, _ = score_column(user_input, values, method, acronym_dict, workers, phonetic_algorithm, weights, top_n)
+            positions = np.arange(len(values))
+        for i in top_n_positions(scores, top_n):
+            entry = (scores[i].item(), -(offset + int(positions[i])), values.iloc[positions[i]])
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        offset += len(batch)
+
+    best = sorted(heap, key=lambda entry: entry[:2], reverse=True)
+    score_column_name = RESULT_COLUMNS['ngram' if method == 'hybrid' else method][0]
+    result_df = pd.DataFrame(
+        {
+            column_to_check: pd.array([value for _, _, value in best], dtype=value_dtype),
+            score_column_name: [score for score, _, _ in best],
+        },
+        index=pd.Index([-position for _, position, _ in best], dtype=np.int64),
+    )
+    if method == 'hybrid':
+        result_df['phonetic_match'] = 1
+    return result_df
 
 # Example usage
 if __name__ == "__main__":
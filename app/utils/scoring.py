@@ -0,0 +1,823 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import jellyfish
+from rapidfuzz import fuzz, process
+
+METRICS = ('ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard')
+
+# (score column, best form column) produced by each metric
+RESULT_COLUMNS = {
+    'ngram': ('ngram_score', 'best_ngram_form'),
+    'phonetic': ('phonetic_match', 'best_phonetic_form'),
+    'levenshtein': ('levenshtein_score', 'best_levenshtein_form'),
+    'jarowinkler': ('jaro_winkler_score', 'best_jaro_winkler_form'),
+    'jaccard': ('jaccard_score', 'best_jaccard_form'),
+    'weighted': ('weighted_score', 'best_weighted_form'),
+}
+
+# Default blend for the 'weighted' metric
+DEFAULT_BLEND_WEIGHTS = {'ngram': 0.4, 'levenshtein': 0.3, 'jarowinkler': 0.3}
+
+NGRAM_N = 3
+NGRAM_PAD_CHAR = '$'
+
+# Upper bound on query x variation cells held in memory when scoring a batch of queries (128 MB of float64)
+QUERY_BATCH_CELLS = 1 << 24
+
+
+def expand_acronyms(text, acronym_dict):
+    """
+    Return the original text followed by one variation per word found in the acronym dictionary.
+
+    Args:
+        text (str): The value to expand.
+        acronym_dict (dict): Dictionary mapping acronyms to their expanded forms.
+
+    Returns:
+        list: The original text and its expanded variations, in word order.
+    """
+    variations = [text]
+    words = text.split()
+    for i, word in enumerate(words):
+        if word in acronym_dict:
+            expanded = acronym_dict[word]
+            new_variation = " ".join(words[:i] + [expanded] + words[i+1:])
+            variations.append(new_variation)
+    return variations
+
+
+def expand_values(values, acronym_dict=None):
+    """
+    Flatten the acronym variations of every value into one array.
+
+    Args:
+        values (iterable): Candidate values (converted to str).
+        acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+
+    Returns:
+        tuple: (variations, owners) where variations is an object array of strings and
+        owners holds the position of the value each variation was derived from.
+        Variations of one value are contiguous and start with the original value.
+    """
+    values = [str(value) for value in values]
+    if not acronym_dict:
+        return np.array(values, dtype=object), np.arange(len(values), dtype=np.int64)
+
+    variations = []
+    owners = []
+    for position, value in enumerate(values):
+        expanded = expand_acronyms(value, acronym_dict)
+        variations.extend(expanded)
+        owners.extend([position] * len(expanded))
+    return np.array(variations, dtype=object), np.array(owners, dtype=np.int64)
+
+
+def expand_ranges(starts, lengths):
+    """Concatenate ``range(start, start + length)`` for every pair, without a Python loop."""
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+# --- N-gram profiles ---
+def ngram_split(text, n=NGRAM_N):
+    """Split a string into padded n-grams, the same way ``NGram.compare`` does."""
+    padding = NGRAM_PAD_CHAR * (n - 1)
+    padded = padding + text + padding
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+class NGramProfiles:
+    """
+    Sparse n-gram count vectors for a list of strings, stored in CSR layout.
+
+    Attributes:
+        vocab (dict): Mapping from n-gram to integer id.
+        indptr (np.ndarray): Row offsets into ``ids``/``counts`` (length = rows + 1).
+        ids (np.ndarray): N-gram ids of every row, row after row.
+        counts (np.ndarray): Occurrences of each n-gram in its row.
+        sizes (np.ndarray): Total number of n-grams per row.
+    """
+
+    def __init__(self, vocab, indptr, ids, counts, sizes, n=NGRAM_N):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.ids = ids
+        self.counts = counts
+        self.sizes = sizes
+        self.n = n
+
+    @classmethod
+    def build(cls, texts, n=NGRAM_N):
+        """Build the profiles for the given strings."""
+        vocab = {}
+        indptr = [0]
+        ids = []
+        counts = []
+        sizes = []
+        for text in texts:
+            grams = ngram_split(text, n)
+            row = {}
+            for gram in grams:
+                gram_id = vocab.setdefault(gram, len(vocab))
+                row[gram_id] = row.get(gram_id, 0) + 1
+            ids.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(ids))
+            sizes.append(len(grams))
+        return cls(
+            vocab,
+            np.array(indptr, dtype=np.int64),
+            np.array(ids, dtype=np.int32),
+            np.array(counts, dtype=np.int32),
+            np.array(sizes, dtype=np.int32),
+            n=n,
+        )
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def query_vector(self, text):
+        """
+        Count the query n-grams that exist in the vocabulary.
+
+        Returns:
+            tuple: (dense count vector over the vocabulary, total number of query n-grams).
+        """
+        grams = ngram_split(text, self.n)
+        vector = np.zeros(len(self.vocab), dtype=np.int32)
+        for gram in grams:
+            gram_id = self.vocab.get(gram)
+            if gram_id is not None:
+                vector[gram_id] += 1
+        return vector, len(grams)
+
+    def row_owners(self):
+        """Row number of every stored (id, count) entry."""
+        return np.repeat(np.arange(len(self.sizes)), np.diff(self.indptr))
+
+
+class NGramPostings:
+    """
+    Inverted n-gram index: for every n-gram id, the rows containing it and how often.
+
+    Attributes:
+        indptr (np.ndarray): Offsets into ``rows``/``counts`` per n-gram id (length = vocab + 1).
+        rows (np.ndarray): Row numbers of each posting list, in ascending order.
+        counts (np.ndarray): Occurrences of the n-gram in each posted row.
+        n_rows (int): Number of indexed rows.
+    """
+
+    def __init__(self, indptr, rows, counts, n_rows):
+        self.indptr = indptr
+        self.rows = rows
+        self.counts = counts
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_profiles(cls, profiles):
+        """Transpose CSR profiles into posting lists."""
+        order = np.argsort(profiles.ids, kind='stable')
+        indptr = np.zeros(len(profiles.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(profiles.ids, minlength=len(profiles.vocab)), out=indptr[1:])
+        return cls(indptr, profiles.row_owners()[order].astype(np.int64), np.asarray(profiles.counts)[order], len(profiles))
+
+    def _gather(self, gram_ids, query_counts):
+        """Sum the shared counts of every row posted under the given n-grams."""
+        starts = self.indptr[gram_ids]
+        lengths = self.indptr[gram_ids + 1] - starts
+        total = int(lengths.sum())
+        positions = expand_ranges(starts, lengths)
+        shared_per_posting = np.minimum(self.counts[positions], np.repeat(query_counts, lengths))
+        posted_rows = self.rows[positions]
+        if total * 8 > self.n_rows:
+            shared = np.bincount(posted_rows, weights=shared_per_posting, minlength=self.n_rows).astype(np.int64)
+            rows = np.flatnonzero(shared)
+            return rows, shared[rows]
+        rows, inverse = np.unique(posted_rows, return_inverse=True)
+        return rows, np.bincount(inverse, weights=shared_per_posting, minlength=len(rows)).astype(np.int64)
+
+    def shared_counts(self, query_vector, min_shared=1):
+        """
+        Count the n-grams shared with a query for every row that can share at least ``min_shared``.
+
+        Uses prefix filtering: the most frequent query n-grams, whose query counts add up to less
+        than ``min_shared``, are not used to generate candidates (a row can only reach
+        ``min_shared`` by also containing a rarer n-gram). They are added to the candidates'
+        counts by binary search in their sorted posting lists.
+
+        Args:
+            query_vector (np.ndarray): Dense query counts from ``NGramProfiles.query_vector``.
+            min_shared (int): Minimum number of shared n-grams a row needs to be returned.
+
+        Returns:
+            tuple: (candidate rows, shared n-gram count per row), rows in ascending order.
+        """
+        gram_ids = np.flatnonzero(query_vector)
+        query_counts = query_vector[gram_ids]
+        lengths = self.indptr[gram_ids + 1] - self.indptr[gram_ids]
+        by_frequency = np.argsort(-lengths, kind='stable')
+        skipped = int(np.searchsorted(np.cumsum(query_counts[by_frequency]), min_shared, side='left'))
+        frequent, rare = by_frequency[:skipped], by_frequency[skipped:]
+
+        if len(rare) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        rows, shared = self._gather(gram_ids[rare], query_counts[rare])
+
+        # Rarest skipped n-grams first; drop rows that cannot reach min_shared any more
+        remaining = int(query_counts[frequent].sum())
+        for position in frequent[::-1]:
+            reachable = shared + remaining >= min_shared
+            rows, shared = rows[reachable], shared[reachable]
+            remaining -= int(query_counts[position])
+            start, end = self.indptr[gram_ids[position]], self.indptr[gram_ids[position] + 1]
+            posted_rows = self.rows[start:end]
+            found = np.searchsorted(posted_rows, rows)
+            hit = found < len(posted_rows)
+            hit[hit] = posted_rows[found[hit]] == rows[hit]
+            shared[hit] += np.minimum(self.counts[start + found[hit]], query_counts[position])
+
+        keep = shared >= min_shared
+        return rows[keep], shared[keep]
+
+
+def ngram_scores(user_input, profiles, rows=None):
+    """
+    Score a query against profiled strings with the ``NGram.compare`` formula.
+
+    similarity = shared / (query_grams + candidate_grams - shared), where shared counts
+    n-grams common to both strings including repeats.
+
+    Args:
+        user_input (str): The input string to match.
+        profiles (NGramProfiles): Profiles of the candidate strings.
+        rows (np.ndarray, optional): Only score these rows (defaults to all rows).
+
+    Returns:
+        np.ndarray: float64 scores in the range 0-1, one per scored row.
+    """
+    query_vector, query_size = profiles.query_vector(user_input)
+    if rows is None:
+        entries = slice(None)
+        entry_rows = profiles.row_owners()
+        sizes = profiles.sizes
+    else:
+        starts = profiles.indptr[rows]
+        lengths = profiles.indptr[rows + 1] - starts
+        entries = expand_ranges(starts, lengths)
+        entry_rows = np.repeat(np.arange(len(rows)), lengths)
+        sizes = profiles.sizes[rows]
+    shared_per_entry = np.minimum(query_vector[profiles.ids[entries]], profiles.counts[entries])
+    shared = np.bincount(entry_rows, weights=shared_per_entry, minlength=len(sizes))
+    allgrams = query_size + sizes - shared
+    return np.divide(shared, allgrams, out=np.zeros(len(sizes)), where=allgrams > 0)
+
+
+# --- Other metrics ---
+def levenshtein_scores(user_input, variations, workers=-1):
+    """Normalised ``fuzz.ratio`` (0-1) of the query against every variation."""
+    if len(variations) == 0:
+        return np.zeros(0)
+    scores = process.cdist([user_input], list(variations), scorer=fuzz.ratio, dtype=np.float64, workers=workers)
+    return scores[0] / 100
+
+
+def levenshtein_score_matrix(queries, variations, workers=-1):
+    """Normalised ``fuzz.ratio`` (0-1) of every query against every variation, as a (queries, variations) matrix."""
+    if len(queries) == 0 or len(variations) == 0:
+        return np.zeros((len(queries), len(variations)))
+    return process.cdist(list(queries), list(variations), scorer=fuzz.ratio, dtype=np.float64, workers=workers) / 100
+
+
+PHONETIC_ALGORITHMS = {
+    'soundex': jellyfish.soundex,
+    'metaphone': jellyfish.metaphone,
+    'nysiis': jellyfish.nysiis,
+}
+
+
+def _phonetic_encoder(algorithm):
+    if algorithm not in PHONETIC_ALGORITHMS:
+        raise ValueError(f"Phonetic algorithm must be one of {', '.join(PHONETIC_ALGORITHMS)}.")
+    return PHONETIC_ALGORITHMS[algorithm]
+
+
+def phonetic_codes(variations, algorithm='soundex'):
+    """Phonetic code of every variation, computed once per distinct string."""
+    encode = _phonetic_encoder(algorithm)
+    codes = {text: encode(text) for text in pd.unique(np.asarray(variations, dtype=object))}
+    return np.array([codes[text] for text in variations], dtype=object)
+
+
+def phonetic_scores(user_input, codes, algorithm='soundex'):
+    """1 where the phonetic code equals the query's code, else 0."""
+    return (np.asarray(codes) == _phonetic_encoder(algorithm)(user_input)).astype(np.int64)
+
+
+class PhoneticBuckets:
+    """
+    Rows grouped by phonetic code, so a phonetic lookup is one dictionary access.
+
+    Attributes:
+        algorithm (str): Key of ``PHONETIC_ALGORITHMS``.
+        codes (np.ndarray): Distinct codes, one per bucket.
+        indptr (np.ndarray): Offsets into ``rows`` per bucket (length = buckets + 1).
+        rows (np.ndarray): Rows of every bucket, ascending within a bucket.
+        n_rows (int): Number of indexed rows.
+    """
+
+    def __init__(self, algorithm, codes, indptr, rows, n_rows):
+        self.algorithm = algorithm
+        self.codes = codes
+        self.indptr = indptr
+        self.rows = rows
+        self.n_rows = n_rows
+        self.buckets = {code: i for i, code in enumerate(codes)}
+
+    @classmethod
+    def build(cls, variations, algorithm='soundex'):
+        """Bucket the given strings by their phonetic code."""
+        codes, bucket_of_row = np.unique(phonetic_codes(variations, algorithm).astype(str), return_inverse=True)
+        rows = np.argsort(bucket_of_row, kind='stable')
+        indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(bucket_of_row, minlength=len(codes)), out=indptr[1:])
+        return cls(algorithm, codes.astype(object), indptr, rows.astype(np.int64), len(variations))
+
+    def lookup(self, user_input):
+        """Rows whose phonetic code equals the code of the query."""
+        bucket = self.buckets.get(_phonetic_encoder(self.algorithm)(user_input))
+        if bucket is None:
+            return self.rows[:0]
+        return self.rows[self.indptr[bucket]:self.indptr[bucket + 1]]
+
+    def scores(self, user_input):
+        """Binary match flag for every row, as ``phonetic_scores`` would return."""
+        scores = np.zeros(self.n_rows, dtype=np.int64)
+        scores[self.lookup(user_input)] = 1
+        return scores
+
+
+def jaro_winkler_similarity(s1, s2):
+    """
+    Jaro-Winkler similarity using a greedy match of characters within the match window.
+
+    Transpositions are counted as matched pairs whose positions differ, and the prefix
+    bonus (p=0.1, up to 4 characters) is always applied.
+    """
+    # Handle empty strings
+    if len(s1) == 0 and len(s2) == 0:
+        return 1.0
+    if len(s1) == 0 or len(s2) == 0:
+        return 0.0
+
+    # Find matching characters and their pairs
+    max_distance = (max(len(s1), len(s2)) // 2) - 1
+    possible_j_for_i = [[] for _ in range(len(s1))]
+    for i in range(len(s1)):
+        for j in range(len(s2)):
+            if s1[i] == s2[j] and abs(i - j) <= max_distance:
+                possible_j_for_i[i].append(j)
+
+    # Find matching pairs (greedy approach)
+    used_j = set()
+    matching_pairs = []
+    for i in range(len(s1)):
+        for j in possible_j_for_i[i]:
+            if j not in used_j:
+                used_j.add(j)
+                matching_pairs.append((i, j))
+                break
+
+    m = len(matching_pairs)
+    if m == 0:
+        return 0.0
+
+    # Calculate transpositions (t)
+    t = sum(1 for i, j in matching_pairs if i != j) / 2.0
+
+    # Calculate Jaro similarity
+    jaro = (m / len(s1) + m / len(s2) + (m - t) / m) / 3.0
+
+    # Calculate common prefix length (up to 4)
+    l = 0
+    for i in range(min(len(s1), len(s2), 4)):
+        if s1[i] == s2[i]:
+            l += 1
+        else:
+            break
+
+    # Calculate Jaro-Winkler similarity with p=0.1
+    p = 0.1
+    return jaro + l * p * (1 - jaro)
+
+
+JARO_WINKLER_BLOCK_SIZE = 8192
+
+
+def _jaro_winkler_upper_bound(m, t, n1, n2, prefix):
+    """Best Jaro-Winkler score reachable with ``m`` matches and ``t`` out-of-place pairs."""
+    safe_m = np.maximum(m, 1)
+    jaro = np.where(m > 0, (m / n1 + m / np.maximum(n2, 1) + (m - t / 2.0) / safe_m) / 3.0, 0.0)
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def _jaro_winkler_block(user_input, texts, score_cutoff=0.0):
+    """
+    Vectorized ``jaro_winkler_similarity`` of one query against a block of strings.
+
+    The greedy matching runs once per query character over all strings at the same time
+    (strings are laid out as a padded code point matrix). Strings whose best reachable
+    score drops below ``score_cutoff`` are abandoned and scored 0.0.
+    """
+    n_rows = len(texts)
+    scores = np.zeros(n_rows)
+    if n_rows == 0:
+        return scores
+    texts = np.array(texts, dtype=str)
+    width = texts.dtype.itemsize // 4
+    chars = texts.view(np.uint32).reshape(n_rows, width)
+    n2 = np.char.str_len(texts).astype(np.int64)
+    n1 = len(user_input)
+    if n1 == 0:
+        scores[n2 == 0] = 1.0
+        return scores
+    query = np.array([ord(char) for char in user_input], dtype=np.uint32)
+
+    # Common prefix (up to 4); padding never equals a query character
+    k = min(n1, width, 4)
+    prefix = np.cumprod(chars[:, :k] == query[:k], axis=1).sum(axis=1)
+
+    max_distance = np.maximum(n1, n2) // 2 - 1
+    active = np.flatnonzero((n2 > 0) & (_jaro_winkler_upper_bound(np.minimum(n1, n2), 0, n1, n2, prefix) >= score_cutoff))
+    chars, n2, max_distance, prefix = chars[active], n2[active], max_distance[active], prefix[active]
+    used = np.zeros(chars.shape, dtype=bool)
+    matches = np.zeros(len(active), dtype=np.int64)
+    out_of_place = np.zeros(len(active), dtype=np.int64)
+    columns = np.arange(width)
+
+    for i in range(n1):
+        if len(active) == 0:
+            break
+        # First unused matching character within the window, as in the greedy loop
+        window = (np.abs(columns - i) <= max_distance[:, None])
+        candidates = (chars == query[i]) & window & ~used
+        found = candidates.any(axis=1)
+        j = candidates.argmax(axis=1)
+        used[found, j[found]] = True
+        matches += found
+        out_of_place += found & (j != i)
+
+        if score_cutoff > 0:
+            reachable = np.minimum(matches + (n1 - i - 1), np.minimum(n1, n2))
+            keep = _jaro_winkler_upper_bound(reachable, out_of_place, n1, n2, prefix) >= score_cutoff
+            # Abandoned strings end below the cut-off anyway; only compact when it pays off
+            if keep.sum() * 4 <= len(keep) * 3:
+                active, chars, used, n2, max_distance, prefix, matches, out_of_place = (
+                    array[keep] for array in (active, chars, used, n2, max_distance, prefix, matches, out_of_place)
+                )
+
+    final = np.zeros(len(active))
+    matched = matches > 0
+    m = matches[matched]
+    t = out_of_place[matched] / 2.0
+    jaro = (m / n1 + m / n2[matched] + (m - t) / m) / 3.0
+    final[matched] = jaro + prefix[matched] * 0.1 * (1 - jaro)
+    final[final < score_cutoff] = 0.0
+    scores[active] = final
+    return scores
+
+
+def _jaro_winkler_scan(user_input, variations, score_cutoff=0.0, on_block=None):
+    """
+    Score all variations block by block, strings closest in length to the query first.
+
+    ``on_block(rows, scores)`` is called after every block and may return a raised cut-off
+    for the following blocks.
+    """
+    variations = np.asarray(variations, dtype=object)
+    scores = np.zeros(len(variations))
+    lengths = np.fromiter((len(text) for text in variations), dtype=np.int64, count=len(variations))
+    order = np.argsort(np.abs(lengths - len(user_input)), kind='stable')
+    for start in range(0, len(order), JARO_WINKLER_BLOCK_SIZE):
+        rows = order[start:start + JARO_WINKLER_BLOCK_SIZE]
+        # Similar lengths inside a block keep the padded matrix narrow
+        rows = rows[np.argsort(lengths[rows], kind='stable')]
+        scores[rows] = _jaro_winkler_block(user_input, variations[rows].tolist(), score_cutoff)
+        if on_block is not None:
+            score_cutoff = max(score_cutoff, on_block(rows, scores[rows]))
+    return scores
+
+
+def jaro_winkler_scores(user_input, variations, score_cutoff=0.0):
+    """
+    Jaro-Winkler similarity of the query against every variation.
+
+    Matches ``jaro_winkler_similarity`` exactly. Variations scoring below ``score_cutoff``
+    are abandoned as soon as they cannot reach it and reported as 0.0.
+    """
+    return _jaro_winkler_scan(user_input, variations, score_cutoff)
+
+
+def jaro_winkler_top_scores(user_input, variations, owners, n_rows, top_n):
+    """
+    Jaro-Winkler scores where only the ``top_n`` best values are guaranteed exact.
+
+    The n-th best value score seen so far is used as the cut-off for the remaining blocks,
+    so variations that cannot enter the top ``top_n`` are abandoned early (scored 0.0).
+    """
+    best = np.zeros(n_rows)
+    leaders = np.zeros(0, dtype=np.int64)
+
+    def raise_cutoff(rows, scores):
+        nonlocal leaders
+        np.maximum.at(best, owners[rows], scores)
+        # Only the previous leaders and the owners touched by this block can be in the top now
+        contenders = np.union1d(leaders, owners[rows])
+        if top_n <= 0 or len(contenders) < top_n:
+            leaders = contenders
+            return 0.0
+        leaders = contenders[np.argpartition(best[contenders], len(contenders) - top_n)[-top_n:]]
+        return best[leaders].min()
+
+    return _jaro_winkler_scan(user_input, variations, on_block=raise_cutoff)
+
+
+class TokenSets:
+    """Distinct whitespace tokens of a list of strings, stored in CSR layout."""
+
+    def __init__(self, vocab, indptr, ids, lengths):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.ids = ids
+        self.lengths = lengths
+
+    @classmethod
+    def build(cls, texts):
+        """Build the token sets for the given strings."""
+        vocab = {}
+        indptr = [0]
+        ids = []
+        lengths = []
+        for text in texts:
+            ids.extend({vocab.setdefault(token, len(vocab)) for token in text.split()})
+            indptr.append(len(ids))
+            lengths.append(len(text))
+        return cls(
+            vocab,
+            np.array(indptr, dtype=np.int64),
+            np.array(ids, dtype=np.int32),
+            np.array(lengths, dtype=np.int32),
+        )
+
+    def __len__(self):
+        return len(self.lengths)
+
+
+def jaccard_scores(user_input, token_sets):
+    """
+    Word-level Jaccard similarity (intersection over union) of the query against every string.
+
+    Two empty strings score 1.0; an empty string against a non-empty one scores 0.0.
+    """
+    n_rows = len(token_sets)
+    query_tokens = set(user_input.split())
+    query_mask = np.zeros(len(token_sets.vocab), dtype=np.int64)
+    for token in query_tokens:
+        token_id = token_sets.vocab.get(token)
+        if token_id is not None:
+            query_mask[token_id] = 1
+
+    owners = np.repeat(np.arange(n_rows), np.diff(token_sets.indptr))
+    intersection = np.bincount(owners, weights=query_mask[token_sets.ids], minlength=n_rows)
+    union = len(query_tokens) + np.diff(token_sets.indptr) - intersection
+    scores = np.divide(intersection, union, out=np.zeros(n_rows), where=union > 0)
+
+    if len(user_input) == 0:
+        scores = (token_sets.lengths == 0).astype(np.float64)
+    else:
+        scores[token_sets.lengths == 0] = 0.0
+    return scores
+
+
+# --- Engine ---
+def best_per_owner(scores, owners, n_rows):
+    """
+    Reduce variation scores to one score per value.
+
+    The first variation reaching the maximum wins, so the original value is kept on ties.
+
+    Returns:
+        tuple: (best score per value, index into the variations of the winning form).
+    """
+    if n_rows == 0:
+        return scores[:0], np.zeros(0, dtype=np.int64)
+    if len(scores) == n_rows:
+        return scores, np.arange(n_rows)
+
+    best = np.full(n_rows, -np.inf)
+    np.maximum.at(best, owners, scores)
+    positions = np.arange(len(scores))
+    first_best = np.full(n_rows, len(scores), dtype=np.int64)
+    is_best = scores == best[owners]
+    np.minimum.at(first_best, owners[is_best], positions[is_best])
+    return best.astype(scores.dtype), first_best
+
+
+def best_per_owner_sparse(scores, owners):
+    """
+    Reduce the scores of a subset of variations to one score per value.
+
+    Like ``best_per_owner`` but only for the owners present in ``owners``; the first
+    (lowest positioned) variation wins on ties.
+
+    Args:
+        scores (np.ndarray): Scores of the candidate variations.
+        owners (np.ndarray): Owner of each candidate, in ascending variation order.
+
+    Returns:
+        tuple: (unique owners, best score per owner, position in ``scores`` of the winning variation).
+    """
+    order = np.lexsort((np.arange(len(scores)), -scores, owners))
+    sorted_owners = owners[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_owners[1:] != sorted_owners[:-1]
+    winners = order[first]
+    return owners[winners], scores[winners], winners
+
+
+def top_n_positions(scores, top_n):
+    """
+    Positions of the ``top_n`` highest scores, highest first (ties keep position order).
+
+    Uses ``np.partition`` to find the cut-off so only the selected entries are sorted.
+    """
+    if top_n <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if top_n < len(scores):
+        threshold = np.partition(scores, len(scores) - top_n)[len(scores) - top_n]
+        selected = np.flatnonzero(scores >= threshold)
+    else:
+        selected = np.arange(len(scores))
+    order = np.lexsort((selected, -scores[selected]))
+    return selected[order][:top_n]
+
+
+def map_queries(fn, queries, workers=-1):
+    """
+    Apply ``fn`` to every query on a thread pool, keeping the query order.
+
+    The scorers spend most of their time in NumPy/rapidfuzz, which release the GIL, so
+    threads let one batch of queries use several cores without copying the candidates.
+
+    Args:
+        fn (callable): Function of one query.
+        queries (list): The queries.
+        workers (int): Number of threads (-1 uses all cores).
+    """
+    workers = (os.cpu_count() or 1) if workers == -1 else max(workers, 1)
+    if workers == 1 or len(queries) <= 1:
+        return [fn(query) for query in queries]
+    with ThreadPoolExecutor(max_workers=min(workers, len(queries))) as pool:
+        return list(pool.map(fn, queries))
+
+
+def blend_scores(user_input, weights, score_fn):
+    """
+    Weighted average of several metrics, each computed once over the same candidates.
+
+    Args:
+        user_input (str): The input string to match.
+        weights (dict): Mapping from metric (one of ``METRICS``) to its weight.
+        score_fn (callable): ``score_fn(user_input, metric)`` returning one score array per metric.
+
+    Returns:
+        np.ndarray: Blended scores, normalised by the sum of the weights.
+    """
+    weights = DEFAULT_BLEND_WEIGHTS if weights is None else weights
+    unknown = set(weights) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics in weights: {', '.join(sorted(unknown))}.")
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Weights must add up to a positive number.")
+
+    blended = None
+    for metric, weight in weights.items():
+        if weight == 0:
+            continue
+        component = score_fn(user_input, metric) * (weight / total)
+        blended = component if blended is None else blended + component
+    return blended
+
+
+def hybrid_scores(user_input, values, acronym_dict=None, phonetic_algorithm='soundex'):
+    """
+    Fused hybrid scoring: phonetic filter first, then n-grams on the phonetic hits only.
+
+    A value is a hit when any of its variations has the query's phonetic code; its n-gram
+    score is the best over all of its variations.
+
+    Returns:
+        tuple: (positions of the hit values in ``values``, their best n-gram score).
+    """
+    variations, owners = expand_values(values, acronym_dict)
+    codes = phonetic_codes(variations, phonetic_algorithm)
+    hit_owners = np.unique(owners[codes == _phonetic_encoder(phonetic_algorithm)(user_input)])
+    starts = np.searchsorted(owners, hit_owners, side='left')
+    lengths = np.searchsorted(owners, hit_owners, side='right') - starts
+    rows = expand_ranges(starts, lengths)
+    scores = ngram_scores(user_input, NGramProfiles.build(variations[rows]))
+    _, best, _ = best_per_owner_sparse(scores, owners[rows])
+    return hit_owners, best
+
+
+def score_variations(user_input, variations, metric, workers=-1, phonetic_algorithm='soundex', weights=None):
+    """
+    Score the query against an array of strings with one of the supported metrics.
+
+    Args:
+        user_input (str): The input string to match.
+        variations (np.ndarray): Candidate strings.
+        metric (str): One of ``METRICS``.
+        workers (int): Threads used by rapidfuzz (-1 uses all cores).
+        phonetic_algorithm (str): Key of ``PHONETIC_ALGORITHMS`` used by the phonetic metric.
+        weights (dict, optional): Metric weights for the 'weighted' metric (see ``blend_scores``).
+
+    Returns:
+        np.ndarray: One score per candidate string.
+    """
+    if metric == 'weighted':
+        return blend_scores(
+            user_input,
+            weights,
+            lambda text, component: score_variations(text, variations, component, workers, phonetic_algorithm),
+        )
+    if metric == 'ngram':
+        return ngram_scores(user_input, NGramProfiles.build(variations))
+    if metric == 'phonetic':
+        return phonetic_scores(user_input, phonetic_codes(variations, phonetic_algorithm), phonetic_algorithm)
+    if metric == 'levenshtein':
+        return levenshtein_scores(user_input, variations, workers=workers)
+    if metric == 'jarowinkler':
+        return jaro_winkler_scores(user_input, variations)
+    if metric == 'jaccard':
+        return jaccard_scores(user_input, TokenSets.build(variations))
+    raise ValueError(f"Metric must be one of {', '.join(METRICS)}.")
+
+
+def score_column(user_input, values, metric, acronym_dict=None, workers=-1, phonetic_algorithm='soundex', weights=None, top_n=None):
+    """
+    Score one query against a whole column in a single vectorized pass.
+
+    Args:
+        user_input (str): The input string to match.
+        values (pd.Series or iterable): Candidate values.
+        metric (str): One of ``METRICS``.
+        acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+        workers (int): Threads used by rapidfuzz (-1 uses all cores).
+        phonetic_algorithm (str): Key of ``PHONETIC_ALGORITHMS`` used by the phonetic metric.
+        weights (dict, optional): Metric weights for the 'weighted' metric (see ``blend_scores``).
+        top_n (int, optional): Only the ``top_n`` best values need exact scores. The 'jarowinkler'
+            metric then abandons candidates that cannot reach them (their scores are reported as 0).
+
+    Returns:
+        tuple: (scores, best_forms) NumPy arrays aligned with ``values``.
+    """
+    variations, owners = expand_values(values, acronym_dict)
+    n_rows = len(values)
+    if metric == 'jarowinkler' and top_n is not None:
+        scores = jaro_winkler_top_scores(user_input, variations, owners, n_rows, top_n)
+    else:
+        scores = score_variations(user_input, variations, metric, workers=workers, phonetic_algorithm=phonetic_algorithm, weights=weights)
+    best, best_index = best_per_owner(scores, owners, n_rows)
+    return best, variations[best_index]
+
+
+def match_frame(values, column_name, metric, scores, forms, index=None):
+    """
+    Assemble the [value, score, best form] frame returned by the matchers.
+
+    Args:
+        values (pd.Series or array): The candidate values.
+        column_name (str): Name of the value column.
+        metric (str): One of ``METRICS``; selects the score and form column names.
+        scores (np.ndarray): Best score per value.
+        forms (np.ndarray): Best matching form per value.
+        index (pd.Index, optional): Index of the returned frame (defaults to the index of ``values``).
+    """
+    score_column_name, form_column_name = RESULT_COLUMNS[metric]
+    if isinstance(values, pd.Series):
+        if index is None:
+            index = values.index
+        values = values.set_axis(index)
+    elif index is None:
+        index = pd.RangeIndex(len(values))
+    return pd.DataFrame(
+        {
+            column_name: values,
+            score_column_name: scores,
+            form_column_name: forms,
+        },
+        index=index,
+    )
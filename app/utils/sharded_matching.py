@@ -0,0 +1,143 @@
+import heapq
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.match_index import _pack_strings
+from utils.scoring import RESULT_COLUMNS, hybrid_scores, score_column
+
+# Values scored by one task; small enough to balance the load, large enough to amortise the dispatch
+DEFAULT_CHUNK_SIZE = 250_000
+
+# Memory-mapped column arrays opened by this (worker) process, keyed by directory
+_worker_columns = {}
+
+
+def _open_column(path):
+    """Memory-map the packed column written by ``ShardedColumn`` (once per process)."""
+    if path not in _worker_columns:
+        _worker_columns[path] = (
+            np.load(os.path.join(path, "values_data.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "values_offsets.npy"), mmap_mode="r"),
+        )
+    return _worker_columns[path]
+
+
+def _read_values(path, start, stop):
+    """Decode values ``start:stop`` of the packed column."""
+    data, offsets = _open_column(path)
+    offsets = np.asarray(offsets[start:stop + 1])
+    raw = data[offsets[0]:offsets[-1]].tobytes()
+    offsets = offsets - offsets[0]
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(stop - start)]
+
+
+def _score_shard(path, start, stop, user_input, method, acronym_dict, top_n, phonetic_algorithm, weights):
+    """
+    Score one shard and keep its top ``top_n`` values.
+
+    Runs in a worker process; only the shard boundaries and the query are sent to it.
+
+    Returns:
+        list: (-score, global position) pairs, best first, ready for ``heapq.merge``.
+    """
+    values = _read_values(path, start, stop)
+    if method == 'hybrid':
+        positions, scores = hybrid_scores(user_input, values, acronym_dict, phonetic_algorithm)
+    else:
+        scores, _ = score_column(user_input, values, method, acronym_dict, 1, phonetic_algorithm, weights, top_n)
+        positions = np.arange(len(values))
+    # Ties keep position order, as in find_top_matches
+    order = np.lexsort((positions, -scores))[:top_n]
+    return [(-float(scores[i]), int(positions[i]) + start) for i in order]
+
+
+class ShardedColumn:
+    """
+    A candidate column split into shards that are scored in parallel worker processes.
+
+    The values are packed once into memory-mapped files, so workers read only their shard
+    from the OS page cache instead of receiving a pickled DataFrame with every call. Each
+    shard returns its own top n, and the shard results are merged into the global top n.
+
+    Example:
+        with ShardedColumn(df, 'full_name', acronym_dict, workers=8) as column:
+            column.find_top_matches('John Smith', method='ngram')
+    """
+
+    def __init__(self, customer_df, column_to_check, acronym_dict=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            customer_df (pd.DataFrame): DataFrame containing the candidate values.
+            column_to_check (str): Column to match against.
+            acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+            workers (int, optional): Worker processes (defaults to the number of cores).
+            chunk_size (int): Number of values per shard.
+        """
+        if column_to_check not in customer_df.columns:
+            raise ValueError(f"Column '{column_to_check}' not found in DataFrame.")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive.")
+        self.column_name = column_to_check
+        self.values = customer_df[column_to_check]
+        self.index = customer_df.index
+        self.acronym_dict = acronym_dict
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+
+        self._directory = tempfile.TemporaryDirectory(prefix="sharded_column_")
+        data, offsets = _pack_strings([str(value) for value in self.values])
+        np.save(os.path.join(self._directory.name, "values_data.npy"), data)
+        np.save(os.path.join(self._directory.name, "values_offsets.npy"), offsets)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    @property
+    def shards(self):
+        """(start, stop) value positions of every shard."""
+        return [(start, min(start + self.chunk_size, len(self.values))) for start in range(0, len(self.values), self.chunk_size)]
+
+    def find_top_matches(self, user_input, top_n=5, method='hybrid', phonetic_algorithm='soundex', weights=None):
+        """
+        Same result as ``utils.matching.find_top_matches`` on the whole column, computed shard by shard.
+
+        Returns:
+            pd.DataFrame: Top N matches with scores (and match flags for 'hybrid').
+        """
+        if method not in ['hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', 'weighted']:
+            raise ValueError("Method must be 'hybrid', 'ngram', 'phonetic', 'levenshtein', 'jarowinkler', 'jaccard', or 'weighted'.")
+
+        futures = [
+            self._executor.submit(
+                _score_shard, self._directory.name, start, stop, user_input, method,
+                self.acronym_dict, top_n, phonetic_algorithm, weights,
+            )
+            for start, stop in self.shards
+        ]
+        best = list(heapq.merge(*(future.result() for future in futures)))[:top_n]
+        positions = np.array([position for _, position in best], dtype=np.int64)
+        scores = np.array([-score for score, _ in best])
+
+        if method == 'hybrid':
+            columns = {RESULT_COLUMNS['ngram'][0]: scores, RESULT_COLUMNS['phonetic'][0]: 1}
+        else:
+            score_column_name = RESULT_COLUMNS[method][0]
+            if method == 'phonetic':
+                scores = scores.astype(np.int64)
+            columns = {score_column_name: scores}
+        result_df = self.values.iloc[positions].to_frame(self.column_name)
+        for name, column in columns.items():
+            result_df[name] = column
+        return result_df
+
+    def close(self):
+        """Stop the worker processes and delete the packed column."""
+        self._executor.shutdown()
+        self._directory.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import re
+
+import pandas as pd
+
+from utils.match_index import MatchIndex
+from utils.matching import find_top_matches
+from utils.scoring import RESULT_COLUMNS
+
+VALUE_INDEX_SUFFIX = ".value_index"
+MANIFEST_FILE = "manifest.json"
+
+# SQLite type affinity rule: a declared type containing CHAR, CLOB or TEXT stores text
+_TEXT_TYPE = re.compile(r"CHAR|CLOB|TEXT", re.IGNORECASE)
+
+
+def is_text_type(data_type):
+    """Whether a declared column type has SQLite TEXT affinity (e.g. TEXT, VARCHAR(255), NCHAR)."""
+    return bool(data_type) and _TEXT_TYPE.search(data_type) is not None
+
+
+def value_index_path(db_path):
+    """Directory the value indexes of a database are stored in, next to the database file."""
+    return os.path.splitext(db_path)[0] + VALUE_INDEX_SUFFIX
+
+
+def _quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def distinct_values(client, table_name, column_name, batch_size=10000):
+    """
+    Distinct non-null values of one column, read batch by batch with ``SQLiteClient.iter_query``.
+
+    Returns:
+        list: The distinct values as strings.
+    """
+    column = _quote_identifier(column_name)
+    query = f"SELECT DISTINCT {column} AS value FROM {_quote_identifier(table_name)} WHERE {column} IS NOT NULL"
+    values = []
+    for batch in client.iter_query(query, batch_size=batch_size):
+        values.extend(str(value) for value in batch["value"])
+    return values
+
+
+def build_value_indexes(client, columns, output_dir, acronym_dict=None, batch_size=10000):
+    """
+    Build and save one ``MatchIndex`` per column over its distinct values.
+
+    Args:
+        client (SQLiteClient): Client of the database to read the values from.
+        columns (iterable): (table_name, column_name) pairs to index.
+        output_dir (str): Directory to write the indexes and their manifest to.
+        acronym_dict (dict, optional): Dictionary mapping acronyms to their expanded forms.
+        batch_size (int): Rows fetched per batch while reading distinct values.
+
+    Returns:
+        dict: The manifest written to ``output_dir``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {"columns": []}
+    for table_name, column_name in columns:
+        values = distinct_values(client, table_name, column_name, batch_size=batch_size)
+        directory = f"{table_name}.{column_name}"
+        MatchIndex.from_values(values, column_name, acronym_dict).save(os.path.join(output_dir, directory))
+        manifest["columns"].append(
+            {"table_name": table_name, "column_name": column_name, "path": directory, "distinct_values": len(values)}
+        )
+        logging.info(f"Indexed {len(values)} distinct values of {table_name}.{column_name}")
+
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class ValueIndexes:
+    """
+    The value indexes of one database, as written by ``build_value_indexes``.
+
+    Indexes are memory-mapped on first use, so linking a literal is an index lookup instead
+    of a ``SELECT DISTINCT`` plus a full fuzzy scan.
+
+    Example:
+        indexes = ValueIndexes.for_database('data/spider/sqlite/student_transcripts_tracking.sqlite')
+        indexes.link('Computer Sceince')
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        self._paths = {(entry["table_name"], entry["column_name"]): entry["path"] for entry in manifest["columns"]}
+        self._indexes = {}
+
+    @classmethod
+    def for_database(cls, db_path):
+        """Load the value indexes stored next to a database file."""
+        return cls(value_index_path(db_path))
+
+    @property
+    def columns(self):
+        """(table_name, column_name) pairs that have a value index."""
+        return list(self._paths)
+
+    def get(self, table_name, column_name):
+        """The ``MatchIndex`` of one column."""
+        key = (table_name, column_name)
+        if key not in self._paths:
+            raise KeyError(f"No value index for column {table_name}.{column_name}")
+        if key not in self._indexes:
+            self._indexes[key] = MatchIndex.load(os.path.join(self.path, self._paths[key]))
+        return self._indexes[key]
+
+    def link(self, literal, top_n=5, method='ngram', columns=None, min_shared=1):
+        """
+        Find the cell values closest to a literal of the user's question.
+
+        Args:
+            literal (str): The literal to resolve.
+            top_n (int): Number of values returned overall.
+            method (str): Any find_top_matches method; 'ngram' and 'hybrid' use the index lookups.
+            columns (iterable, optional): (table_name, column_name) pairs to search (defaults to all).
+            min_shared (int): Minimum shared trigrams for method='ngram' (see find_top_matches).
+
+        Returns:
+            pd.DataFrame: [table_name, column_name, value, score] rows, best first.
+        """
+        score_column_name = RESULT_COLUMNS['ngram' if method == 'hybrid' else method][0]
+        frames = []
+        for table_name, column_name in columns or self.columns:
+            index = self.get(table_name, column_name)
+            matches = find_top_matches(literal, None, column_name, top_n=top_n, method=method, match_index=index, min_shared=min_shared)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "table_name": table_name,
+                        "column_name": column_name,
+                        "value": matches[column_name].to_numpy(),
+                        "score": matches[score_column_name].to_numpy(),
+                    }
+                )
+            )
+        if not frames:
+            return pd.DataFrame(columns=["table_name", "column_name", "value", "score"])
+        result_df = pd.concat(frames, ignore_index=True)
+        return result_df.sort_values("score", ascending=False, kind="stable").head(top_n).reset_index(drop=True)
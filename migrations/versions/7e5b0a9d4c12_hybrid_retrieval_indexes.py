@@ -0,0 +1,41 @@
+"""Lexical indexes for hybrid retrieval
+
+pg_trgm and the identifier indexes used by the lexical leg of
+app.database.hybrid_retrieval.HybridRetriever: exact (lower), full-text
+(identifier words) and trigram matches on table and column names. The
+trigram index is probed once per candidate identifier (GIN indexes do
+not support `% ANY(array)`).
+
+Revision ID: 7e5b0a9d4c12
+Revises: d3a8f61c2b94
+Create Date: 2025-06-16 11:05:39.872410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e5b0a9d4c12'
+down_revision: Union[str, None] = 'd3a8f61c2b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+IDENTIFIERS = (("db_tables", "table_name"), ("db_columns", "column_name"))
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column in IDENTIFIERS:
+        op.execute(f"CREATE INDEX idx_{table}_{column}_lower ON {table} (lower({column}))")
+        op.execute(f"CREATE INDEX idx_{table}_{column}_trgm ON {table} USING gin (lower({column}) gin_trgm_ops)")
+        op.execute(f"CREATE INDEX idx_{table}_{column}_fts ON {table} USING gin (to_tsvector('simple', replace({column}, '_', ' ')))")
+
+
+def downgrade() -> None:
+    for table, column in IDENTIFIERS:
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_{column}_fts")
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_{column}_trgm")
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_{column}_lower")
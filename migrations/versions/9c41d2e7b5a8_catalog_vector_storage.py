@@ -0,0 +1,62 @@
+"""Compressed vector indexes for the catalog
+
+Replaces the full-precision HNSW indexes on db_tables and db_columns with indexes over
+a compressed expression of the same column (see app.database.vector_storage).
+The storage is chosen with -x arguments, defaulting to CATALOG_VECTOR_STORAGE /
+CATALOG_INDEX_DIMENSIONS and then to full-dimension halfvec:
+
+    alembic -x vector_storage=binary -x vector_dimensions=512 upgrade head
+
+Requires pgvector 0.7+.
+
+Revision ID: 9c41d2e7b5a8
+Revises: 62cd064c3665
+Create Date: 2025-06-02 10:14:52.381906
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.database.vector_storage import VectorStorage
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41d2e7b5a8'
+down_revision: Union[str, None] = '62cd064c3665'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATALOG_TABLES = ("db_tables", "db_columns")
+
+
+def _storage() -> VectorStorage:
+    arguments = context.get_x_argument(as_dictionary=True)
+    mode = arguments.get("vector_storage", os.getenv("CATALOG_VECTOR_STORAGE", "halfvec"))
+    dimensions = int(arguments.get("vector_dimensions", os.getenv("CATALOG_INDEX_DIMENSIONS", "0"))) or None
+    return VectorStorage(mode, dimensions)
+
+
+def upgrade() -> None:
+    storage = _storage()
+    for table in CATALOG_TABLES:
+        op.execute(f"DROP INDEX IF EXISTS idx_{table}_embedding")
+        op.execute(storage.create_index_sql(table))
+
+
+def downgrade() -> None:
+    for table in CATALOG_TABLES:
+        # Drop whichever compressed index the upgrade created
+        op.execute(f"""
+            DO $$
+            DECLARE index_name text;
+            BEGIN
+                FOR index_name IN SELECT indexname FROM pg_indexes WHERE tablename = '{table}' AND indexname LIKE 'idx\\_{table}\\_embedding\\_%'
+                LOOP
+                    EXECUTE format('DROP INDEX IF EXISTS %I', index_name);
+                END LOOP;
+            END $$;
+        """)
+        op.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_embedding ON {table} USING hnsw (embedding vector_cosine_ops)")
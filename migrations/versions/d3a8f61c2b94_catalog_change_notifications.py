@@ -0,0 +1,47 @@
+"""Notify catalog changes
+
+Statement-level triggers send NOTIFY catalog_changed (payload: table name) whenever
+db_tables, db_columns or table_relationships change, so in-process catalog indexes
+(app.database.catalog_index.CatalogIndex.watch) refresh without polling.
+
+Revision ID: d3a8f61c2b94
+Revises: 9c41d2e7b5a8
+Create Date: 2025-06-09 16:42:07.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f61c2b94'
+down_revision: Union[str, None] = '9c41d2e7b5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATALOG_TABLES = ("db_tables", "db_columns", "table_relationships")
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_catalog_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('catalog_changed', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for table in CATALOG_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_catalog_changed
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed();
+        """)
+
+
+def downgrade() -> None:
+    for table in CATALOG_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_changed ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_catalog_changed()")
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Move two levels up to the project root directory
+project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
+# The matching utilities use app-rooted imports (utils.scoring)
+sys.path.append(os.path.join(project_root, "app"))
+
+from utils.scoring import jaro_winkler_scores, jaro_winkler_similarity, jaro_winkler_top_scores
+
+# Usage: python playground/matching/benchmark_jaro_winkler.py [sizes...]
+sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+# The pure-Python reference is only timed up to this many strings
+reference_limit = 100_000
+user_input = "Jonathan Smithers Plumbing"
+
+rng = np.random.default_rng(0)
+alphabet = np.array(list("abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+def random_strings(count):
+    lengths = rng.integers(5, 30, size=count)
+    return np.array(["".join(rng.choice(alphabet, size=length)) for length in lengths], dtype=object)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+for size in sizes:
+    values = random_strings(size)
+    owners = np.arange(size)
+
+    vectorized, vectorized_time = timed(lambda: jaro_winkler_scores(user_input, values))
+    _, cutoff_time = timed(lambda: jaro_winkler_scores(user_input, values, score_cutoff=0.7))
+    _, top_time = timed(lambda: jaro_winkler_top_scores(user_input, values, owners, size, 5))
+    line = f"{size:>9} strings | vectorized {vectorized_time:7.3f}s | cutoff 0.7 {cutoff_time:7.3f}s | top-5 {top_time:7.3f}s"
+
+    if size <= reference_limit:
+        reference, reference_time = timed(lambda: [jaro_winkler_similarity(user_input, value) for value in values])
+        assert np.allclose(vectorized, reference)
+        line += f" | python {reference_time:7.3f}s ({reference_time / vectorized_time:.1f}x)"
+    print(line)
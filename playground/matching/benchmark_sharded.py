@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Move two levels up to the project root directory
+project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
+# The matching utilities use app-rooted imports (utils.scoring)
+sys.path.append(os.path.join(project_root, "app"))
+
+from utils.sharded_matching import ShardedColumn
+
+# Usage: python playground/matching/benchmark_sharded.py [values] [chunk_size] [method]
+size = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 125_000
+method = sys.argv[3] if len(sys.argv) > 3 else "levenshtein"
+worker_counts = [workers for workers in (1, 2, 4, 8, 16) if workers <= (os.cpu_count() or 1)]
+queries = ["Jonathan Smithers Plumbing", "Acme Trading Ltd", "North Sea Fisheries", "Catherine Jones Bakery"]
+
+rng = np.random.default_rng(0)
+alphabet = np.array(list("abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+lengths = rng.integers(5, 30, size=size)
+df = pd.DataFrame({"name": ["".join(rng.choice(alphabet, size=length)) for length in lengths]})
+print(f"{size} values, {len(range(0, size, chunk_size))} shards of {chunk_size}, method={method}, {os.cpu_count()} cores")
+
+baseline = None
+for workers in worker_counts:
+    with ShardedColumn(df, "name", workers=workers, chunk_size=chunk_size) as column:
+        column.find_top_matches(queries[0], method=method)  # start the workers
+        start = time.perf_counter()
+        for query in queries:
+            column.find_top_matches(query, method=method)
+        elapsed = (time.perf_counter() - start) / len(queries)
+    baseline = baseline or elapsed
+    print(f"{workers:>3} workers | {elapsed:7.3f}s per query | speedup {baseline / elapsed:5.2f}x")
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pgvector.psycopg2
+import psycopg2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Move two levels up to the project root directory
+project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
+# The catalog helpers use app-rooted imports (database.catalog_index)
+sys.path.append(os.path.join(project_root, "app"))
+
+from config.settings import get_settings
+from database.catalog_index import CATALOG_TABLES, CatalogIndex
+from database.vector_storage import VectorStorage
+
+# Usage: python playground/similarity/benchmark_catalog_index.py [queries] [k]
+# Latency of the in-process catalog index against the exact pgvector query, and the
+# share of top-k results on which both agree. Queries are catalog vectors plus noise.
+n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+service_url = get_settings().database.service_url
+
+start = time.perf_counter()
+index = CatalogIndex(service_url).refresh()
+print(f"Snapshot loaded in {time.perf_counter() - start:.3f}s")
+
+connection = psycopg2.connect(service_url)
+pgvector.psycopg2.register_vector(connection)
+rng = np.random.default_rng(0)
+rows = []
+for kind, vector_index in index.indexes.items():
+    if not len(vector_index):
+        continue
+    sql = VectorStorage().search_sql(CATALOG_TABLES[kind], ["id"])
+    sample = vector_index.matrix[rng.integers(0, len(vector_index), n_queries)]
+    queries = sample + 0.02 * rng.standard_normal(sample.shape).astype(np.float32)
+    local_seconds, database_seconds, agreement = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        local = [hit.id for hit in vector_index.search(query, k)]
+        local_seconds.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"embedding": "[" + ",".join(map(str, query.tolist())) + "]", "k": k})
+            remote = [str(row[0]) for row in cursor.fetchall()]
+        database_seconds.append(time.perf_counter() - start)
+        agreement.append(len(set(local) & set(remote)) / max(len(remote), 1))
+    rows.append({
+        "kind": kind,
+        "vectors": len(vector_index),
+        "search": "hnsw" if vector_index.graph is not None else "exact",
+        "local_p50_ms": round(np.percentile(local_seconds, 50) * 1000, 3),
+        "local_p99_ms": round(np.percentile(local_seconds, 99) * 1000, 3),
+        "pgvector_p50_ms": round(np.percentile(database_seconds, 50) * 1000, 3),
+        f"agreement@{k}": round(float(np.mean(agreement)), 4),
+    })
+connection.close()
+print(pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Move two levels up to the project root directory
+project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
+# The embedding helpers use app-rooted imports (database.embedding_service)
+sys.path.append(os.path.join(project_root, "app"))
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+
+from config.settings import get_settings
+from database.catalog_ingest import discover_databases, introspect_databases
+from database.embedding_providers import create_embedding_client, embedding_model
+from database.embedding_service import embed_texts_concurrently
+from database.vector_storage import VectorStorage
+
+# Usage: EMBEDDING_LOCAL_LATENCY=0.2 python playground/similarity/benchmark_offline_embeddings.py [batch_size] [k]
+# Ingestion embedding throughput and catalog search latency over the Spider column and
+# table texts, with the provider from EmbeddingSettings (the local hashing one by default,
+# so no network access is needed).
+batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+settings = get_settings()
+spider_dir = os.path.join(project_root, "data", "spider")
+
+schemas = introspect_databases(discover_databases(spider_dir, os.path.join(spider_dir, "tables.json")), None)
+texts = sorted({f"Table Name: {table.name}" for schema in schemas for table in schema["tables"]}
+               | {f"Column Name: {column.name}" for schema in schemas for table in schema["tables"] for column in table.columns})
+model = embedding_model(settings)
+print(f"{len(schemas)} databases, {len(texts)} unique texts, provider={settings.embedding.provider} model={model}")
+
+rows = []
+for max_concurrency in (1, 4, 16):
+    start = time.perf_counter()
+    embeddings = embed_texts_concurrently(
+        create_embedding_client(settings, asynchronous=True), texts, model,
+        batch_size=batch_size, max_concurrency=max_concurrency,
+    )
+    elapsed = time.perf_counter() - start
+    rows.append({"max_concurrency": max_concurrency, "seconds": round(elapsed, 3), "texts_per_second": round(len(texts) / elapsed)})
+print(pd.DataFrame(rows).to_string(index=False))
+
+vectors = np.array(embeddings, dtype=np.float32)
+client = create_embedding_client(settings)
+queries = ["student name", "date of enrolment", "flight destination airport", "employee salary"]
+for storage in (VectorStorage(), VectorStorage("halfvec"), VectorStorage("binary")):
+    encoded = storage.encode(vectors)
+    start = time.perf_counter()
+    for query in queries:
+        query_embedding = client.embeddings.create(input=[query], model=model).data[0].embedding
+        top = storage.search(query_embedding, encoded, vectors, k)
+    elapsed = (time.perf_counter() - start) / len(queries)
+    print(f"{storage.mode:>8} | {elapsed * 1000:7.2f} ms per query | top match for '{queries[-1]}': {texts[top[0]]}")
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Move two levels up to the project root directory
+project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
+# The storage helpers use app-rooted imports (database.vector_storage)
+sys.path.append(os.path.join(project_root, "app"))
+
+from database.vector_storage import VectorStorage
+
+# Usage: python playground/similarity/benchmark_vector_storage.py [queries] [k]
+# Recall@k of each catalog index storage against exact cosine search over the db_columns
+# and db_tables embeddings ingested by app/database/ingest_spider_catalog.py.
+n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+storages = [
+    VectorStorage("vector"),
+    VectorStorage("vector", 512),
+    VectorStorage("vector", 256),
+    VectorStorage("halfvec"),
+    VectorStorage("halfvec", 512),
+    VectorStorage("halfvec", 256),
+    VectorStorage("binary"),
+    VectorStorage("binary", rerank_factor=10),
+    VectorStorage("binary", 512, rerank_factor=10),
+]
+
+
+def load_catalog_embeddings(service_url):
+    with psycopg2.connect(service_url) as connection, connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT embedding::text FROM db_columns WHERE embedding IS NOT NULL "
+            "UNION ALL SELECT embedding::text FROM db_tables WHERE embedding IS NOT NULL"
+        )
+        return np.array([np.fromstring(row[0][1:-1], sep=",") for row in cursor], dtype=np.float32)
+
+
+vectors = load_catalog_embeddings(os.environ["TIMESCALE_SERVICE_URL"])
+rng = np.random.default_rng(0)
+order = rng.permutation(len(vectors))
+queries, corpus = vectors[order[:n_queries]], vectors[order[n_queries:]]
+print(f"{len(corpus)} catalog vectors, {len(queries)} held-out queries, recall@{k}")
+
+normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+exact = [np.argsort(1 - normalized @ (query / np.linalg.norm(query)))[:k] for query in queries]
+
+rows = []
+for storage in storages:
+    encoded = storage.encode(corpus)
+    start = time.perf_counter()
+    found = [storage.search(query, encoded, corpus, k) for query in queries]
+    elapsed = (time.perf_counter() - start) / len(queries)
+    recall = np.mean([len(set(result) & set(truth)) / k for result, truth in zip(found, exact)])
+    rows.append({
+        "storage": storage.mode,
+        "dimensions": storage.index_dimensions,
+        "rerank": "-" if storage.is_exact else f"{storage.rerank_factor}x",
+        "bytes_per_vector": storage.bytes_per_vector,
+        "index_vectors_mb": round(storage.bytes_per_vector * len(corpus) / 2**20, 2),
+        f"recall@{k}": round(recall, 4),
+        "ms_per_query": round(elapsed * 1000, 3),
+    })
+print(pd.DataFrame(rows).to_string(index=False))
@@ -21,8 +21,8 @@ vec = VectorStore()
 
 csv_file = os.path.join(project_root, "..", "data", "faq_dataset.csv")
 
-# Read the CSV file
-df = pd.read_csv(csv_file, sep=";")
+# Read the CSV file in chunks, so large files never sit in memory at once
+df_chunks = pd.read_csv(csv_file, sep=";", chunksize=500)
 
 # Prepare data for insertion
 def prepare_record(row):
@@ -46,23 +46,21 @@ def prepare_record(row):
         This is useful when your content already has an associated datetime.
     """
     content = f"Question: {row['question']}\nAnswer: {row['answer']}"
-    embedding = vec.get_embedding(content)
-    return pd.Series(
-        {
-            "id": str(uuid_from_time(datetime.now())),
-            "metadata": {
-                "category": row["category"],
-                "created_at": datetime.now().isoformat(),
-            },
-            "contents": content,
-            "embedding": embedding,
-        }
-    )
-
-
-records_df = df.apply(prepare_record, axis=1)
-
-# Create tables and insert data
+    return {
+        "id": str(uuid_from_time(datetime.now())),
+        "metadata": {
+            "category": row["category"],
+            "created_at": datetime.now().isoformat(),
+        },
+        "contents": content,
+        "embedding": None,  # Embedded in batches by upsert_stream
+    }
+
+
+records = (prepare_record(row) for df in df_chunks for _, row in df.iterrows())
+
+# Create tables and insert data; each chunk is embedded while the previous one is inserted
 vec.create_tables()
 vec.create_index()  # DiskAnnIndex
-vec.upsert(records_df)
+progress = vec.upsert_stream(records, chunk_size=100)
+print(f"Inserted {progress.records} records in {progress.elapsed_seconds:.2f}s ({progress.records_per_second:.1f} records/s)")